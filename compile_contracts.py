@@ -1,169 +1,711 @@
-from contracts.modules.auction import auction_approval, auction_clear
-from contracts.modules.list import list_approval, list_clear
-from contracts.modules.creator_app import (
-    creator_app_approval,
-    creator_app_clear,
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from compiler.assembler import assemble_base64
+from compiler.cache import BuildCache, BuildState, graph, output_hashes, target_key
+from compiler.cost import (
+    average_dispatch_cost,
+    cost_report,
+    dispatch_costs,
+    selector_costs,
 )
-from contracts.modules.nft_app import nft_app_approval, nft_app_clear
-from contracts.admin import admin_approval, admin_clear
-from contracts.modules.rewards_module import (
-    rewards_module_approval,
-    rewards_module_clear,
+from compiler.graph import changed_symbols
+from compiler.manifest import build_interface, build_manifest
+from compiler.registry import registry
+from compiler.targets import TARGETS
+from compiler.watch import reload_modules, watch
+
+OUTPUT_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "compiled_contract"
 )
-from contracts.modules.subscription_module import (
-    subscription_module_approval,
-    subscription_module_clear,
+ALGOD_ADDRESS = "https://testnet-api.algonode.cloud"
+# * --check-algod local compares against the recorded algod fixtures
+LOCAL_ALGOD = "local"
+# * <program>.v<version>.json: the teal of a program, the bytecode algod returns
+# * for it and where that bytecode came from
+FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "compiler", "fixtures"
 )
-from contracts.modules.subscription_app import (
-    subscription_app_approval,
-    subscription_app_clear,
-)
-from contracts.creator_pool.creator_pool import (
-    creator_pool_approval,
-    creator_pool_clear,
-)
-
-from algosdk.v2client import algod
-
-client = algod.AlgodClient("", "https://testnet-api.algonode.cloud")
-
-def compile_auction():
-    print("Compiling auction teal...")
-
-    approval_program = auction_approval()
-    approval = open("./compiled_contract/auction_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = auction_clear()
-    clear = open("./compiled_contract/auction_clear.teal", "w")
-    clear.write(clear_program)
-
-    print("Compiled auction teal!\n")
-
-
-def compile_list():
-    print("Compiling list teal...")
-
-    approval_program = list_approval()
-    approval = open("./compiled_contract/list_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = list_clear()
-    clear = open("./compiled_contract/list_clear.teal", "w")
-    clear.write(clear_program)
-
-    print("Compiled list teal!\n")
-
 
-def compile_nft_app():
-    print("Compiling nft app teal...")
-
-    approval_program = nft_app_approval()
-    approval = open("./compiled_contract/nft_app_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = nft_app_clear()
-    clear = open("./compiled_contract/nft_app_clear.teal", "w")
-    clear.write(clear_program)
-
-    print("Compiled nft app teal!\n")
-
-
-def compile_admin():
-    print("Compiling admin app teal...")
-
-    approval_program = admin_approval()
-    approval = open("./compiled_contract/admin_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = admin_clear()
-    clear = open("./compiled_contract/admin_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled admin app teal!\n")
-
-
-def compile_creator_app():
-    print("Compiling creator deployer module teal...")
-    nft_app_approval_compile_response = client.compile(nft_app_approval())
-    nft_app_approval_program = nft_app_approval_compile_response["result"]
-    nft_app_clear_compile_response = client.compile(nft_app_clear())
-    nft_app_clear_program = nft_app_clear_compile_response["result"]
-
-    approval_program = creator_app_approval(
-        nft_app_approval_program, nft_app_clear_program
+# * Seconds allowed for importing this script; pyteal and the contracts are only
+# * imported once a target is actually compiled or checked
+IMPORT_BUDGET = 0.1
+
+cache = BuildCache()
+
+
+def check_against_algod(names, client):
+    """
+    - assembles every program of the targets locally and through algod (compiles
+      run concurrently over the client's connection pool) and returns the names
+      of the programs whose bytecode differs with each compile's round trip time
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    programs = {}
+    for name in names:
+        programs.update(generate(name))
+
+    def remote_compile(teal):
+        start = time.perf_counter()
+        result = client.compile(teal)["result"]
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=client.pool_size) as pool:
+        results = dict(zip(programs, pool.map(remote_compile, programs.values())))
+
+    mismatches = [
+        file_name
+        for file_name, (result, _) in results.items()
+        if assemble_base64(programs[file_name]) != result
+    ]
+    latencies = {file_name: seconds for file_name, (_, seconds) in results.items()}
+    return mismatches, latencies
+
+
+def fixture_name(file_name, teal):
+    version = teal.split("\n", 1)[0].split()[-1]
+    return "%s.v%s.json" % (file_name, version)
+
+
+def record_algod_fixtures(names, client):
+    """
+    - compiles every program of the targets through algod and stores its teal
+      with algod's bytecode in FIXTURES_DIR; returns the fixtures written
+    """
+    programs = {}
+    for name in names:
+        programs.update(generate(name))
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    recorded = []
+    for file_name, teal in programs.items():
+        fixture = {
+            "teal": teal,
+            "result": client.compile(teal)["result"],
+            "source": "algod at %s" % client.netloc,
+        }
+        recorded.append(fixture_name(file_name, teal))
+        write_output(FIXTURES_DIR, recorded[-1], json.dumps(fixture, indent=2) + "\n")
+    return recorded
+
+
+def check_against_fixtures():
+    """
+    - assembles the teal of every fixture and returns the names of the fixtures
+      whose bytecode differs from the recorded one, with the number checked
+    """
+    if os.path.isdir(FIXTURES_DIR):
+        file_names = sorted(
+            name for name in os.listdir(FIXTURES_DIR) if name.endswith(".json")
+        )
+    else:
+        file_names = []
+    if not file_names:
+        raise SystemExit(
+            "No algod fixtures in %s: record them with --record-algod [URL]"
+            % FIXTURES_DIR
+        )
+
+    mismatches = []
+    for file_name in file_names:
+        with open(os.path.join(FIXTURES_DIR, file_name)) as source:
+            fixture = json.load(source)
+        if assemble_base64(fixture["teal"]) != fixture["result"]:
+            mismatches.append(file_name)
+    return mismatches, len(file_names)
+
+
+def generate(name, embedded=None):
+    """
+    - embedded: programs of the contract this target embeds, if built elsewhere
+    """
+    if embedded is not None:
+        for file_name, program in embedded.items():
+            registry.add(file_name, program)
+
+    return registry.target(name)
+
+
+def write_output(output_dir, file_name, content):
+    path = os.path.join(output_dir, file_name)
+
+    if os.path.exists(path):
+        with open(path) as current:
+            if current.read() == content:
+                return
+
+    with open(path, "w") as output:
+        output.write(content)
+
+
+def write_manifest(name, output_dir):
+    manifest = build_manifest(name, registry)
+    write_output(
+        output_dir, name + "_manifest.json", json.dumps(manifest, indent=2) + "\n"
     )
-    approval = open("./compiled_contract/creator_app_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = creator_app_clear()
-    clear = open("./compiled_contract/creator_app_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled creator deployer module teal!\n")
-
-
-def compile_rewards():
-    print("Compiling rewards module...")
-    approval_program = rewards_module_approval()
-    approval = open("./compiled_contract/rewards_module_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = rewards_module_clear()
-    clear = open("./compiled_contract/rewards_module_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled rewards module!\n")
 
-
-def compile_subscription_module():
-    print("Compiling subscription module...")
-    subscription_app_approval_compiled = client.compile(subscription_app_approval())
-    subscription_app_approval_program = subscription_app_approval_compiled["result"]
-
-    subscription_app_clear_compiled = client.compile(subscription_app_clear())
-    subscription_app_clear_program = subscription_app_clear_compiled["result"]
-
-    approval_program = subscription_module_approval(
-        subscription_app_approval_program, subscription_app_clear_program
-    )
-    approval = open("./compiled_contract/subscription_module_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = subscription_module_clear()
-    clear = open("./compiled_contract/subscription_module_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled subscription module!\n")
-
-
-def compile_subscription_app():
-    print("Compiling subscription app...")
-    approval_program = subscription_app_approval()
-    approval = open("./compiled_contract/subscription_app_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = subscription_app_clear()
-    clear = open("./compiled_contract/subscription_app_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled subscription app!\n")
-
-
-def compile_creator_pool():
-    print("Compiling creator pool app...")
-    approval_program = creator_pool_approval()
-    approval = open("./compiled_contract/creator_pool_approval.teal", "w")
-    approval.write(approval_program)
-
-    clear_program = creator_pool_clear()
-    clear = open("./compiled_contract/creator_pool_clear.teal", "w")
-    clear.write(clear_program)
-    print("Compiled creator pool app!\n")
+    pages = manifest["pages"]
+    if pages["status"] in ("under-allocated", "too large"):
+        print(
+            "WARNING: %s needs %d extra program pages, deployed with %s"
+            % (name, pages["extra_program_pages_needed"], pages["extra_program_pages"])
+        )
+
+
+def write_interface(name, output_dir):
+    interface = build_interface(name)
+    if interface is not None:
+        write_output(
+            output_dir, name + "_contract.json", json.dumps(interface, indent=2) + "\n"
+        )
+
+
+def compile_target(name, output_dir, embedded=None, force=False):
+    """
+    - embedded: programs of the contract this target embeds, if already built
+    - force: regenerate the programs instead of reading them from the cache
+    - returns the target's programs, the wall-clock seconds spent and whether
+      they came from the cache
+    """
+    print("Compiling %s teal..." % name)
+    start = time.perf_counter()
+
+    key = target_key(name)
+    programs = None if force else cache.get(key)
+    cached = programs is not None
+    if cached:
+        for file_name, program in programs.items():
+            registry.add(file_name, program)
+    else:
+        programs = generate(name, embedded)
+        cache.put(key, programs)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for file_name, program in programs.items():
+        write_output(output_dir, file_name + ".teal", program)
+    write_manifest(name, output_dir)
+    write_interface(name, output_dir)
+
+    print("Compiled %s teal!%s\n" % (name, " (cached)" if cached else ""))
+    return programs, time.perf_counter() - start, cached
+
+
+def compile_serial(names, output_dir, built=None, force=False):
+    """
+    - built: called with each target's name once its outputs are written
+    """
+    results = {}
+    for name in names:
+        embedded = _embedded_programs(name, results)
+        results[name] = compile_target(name, output_dir, embedded, force)
+        if built is not None:
+            built(name)
+    return results
+
+
+def compile_parallel(names, output_dir, workers=None, built=None, force=False):
+    """
+    - independent targets are fanned out across a process pool; a target that
+      embeds another contract is only submitted once that contract is built
+    - built: called with each target's name once its outputs are written
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    results = {}
+    waiting = [name for name in names if TARGETS[name].embeds in names]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {
+            pool.submit(compile_target, name, output_dir, None, force): name
+            for name in names
+            if name not in waiting
+        }
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                results[name] = future.result()
+                if built is not None:
+                    built(name)
+
+            for name in [name for name in waiting if TARGETS[name].embeds in results]:
+                waiting.remove(name)
+                embedded = _embedded_programs(name, results)
+                future = pool.submit(compile_target, name, output_dir, embedded, force)
+                pending[future] = name
+
+    return {name: results[name] for name in names}
+
+
+def _embedded_programs(name, results):
+    embeds = TARGETS[name].embeds
+    if embeds in results:
+        return results[embeds][0]
+    return None
+
+
+def target_outputs(name, output_dir):
+    """
+    - returns the paths of the files a build of the target writes
+    """
+    target = TARGETS[name]
+    file_names = [
+        target.approval + ".teal",
+        target.clear + ".teal",
+        name + "_manifest.json",
+    ]
+    if target.interface is not None:
+        file_names.append(name + "_contract.json")
+    return [os.path.join(output_dir, file_name) for file_name in file_names]
+
+
+def plan_build(names, output_dir, state, force=False):
+    """
+    - returns {target: (key, symbols, reason)} for the targets to rebuild and the
+      list of targets skipped because nothing they depend on changed and their
+      outputs are still the files the recorded build wrote
+    """
+    plan = {}
+    skipped = []
+
+    for name in names:
+        symbols = graph.target_symbols(name)
+        key = target_key(name, symbols)
+        previous = state.get(name)
+        outputs = target_outputs(name, output_dir)
+
+        if force:
+            reason = "forced"
+        elif previous is None:
+            reason = "not built yet"
+        elif not all(os.path.exists(output) for output in outputs):
+            reason = "output missing"
+        elif previous.get("outputs") != output_hashes(outputs):
+            reason = "output changed"
+        elif previous["key"] != key:
+            changed = changed_symbols(previous["symbols"], symbols)
+            reason = "changed: %s" % ", ".join(changed[:3]) if changed else "toolchain"
+            if len(changed) > 3:
+                reason += " (+%d more)" % (len(changed) - 3)
+        else:
+            skipped.append(name)
+            continue
+
+        plan[name] = (key, symbols, reason)
+
+    return plan, skipped
+
+
+def print_plan(plan, skipped):
+    for name, (_, _, reason) in plan.items():
+        print("Rebuilding %s (%s)" % (name, reason))
+    if skipped:
+        print("Skipped (up to date): %s" % ", ".join(skipped))
+    print()
+
+
+def print_timings(results, elapsed):
+    print("Target timings (wall-clock):")
+    for name, (_, seconds, cached) in results.items():
+        print("  %-20s %8.3fs%s" % (name, seconds, " (cached)" if cached else ""))
+    print("  %-20s %8.3fs" % ("total", elapsed))
+
+
+def build(names, output_dir, force=False, parallel=False, workers=None):
+    start = time.perf_counter()
+    state = BuildState(output_dir)
+    plan, skipped = plan_build(names, output_dir, state, force)
+    print_plan(plan, skipped)
+
+    def built(name):
+        # * Recorded as soon as the target's outputs are written, so an
+        # * interrupted or failed build never leaves them under another record
+        key, symbols, _ = plan[name]
+        state.record(
+            name, key, symbols, output_hashes(target_outputs(name, output_dir))
+        )
+
+    if parallel:
+        results = compile_parallel(list(plan), output_dir, workers, built, force)
+    else:
+        results = compile_serial(list(plan), output_dir, built, force)
+
+    print_timings(results, time.perf_counter() - start)
+
+
+def watch_build(names, output_dir, interval):
+    """
+    - rebuilds the selected targets in this process after every source edit
+    """
+
+    def rebuild(changed):
+        print("\nChanged: %s" % ", ".join(changed))
+        try:
+            reload_modules(graph, changed)
+            registry.clear()
+            build(names, output_dir)
+        except Exception as error:
+            print("Build failed: %r" % error)
+        print("Watching for changes...")
+
+    print("Watching for changes...")
+    try:
+        watch(rebuild, interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def print_cost_report(title, report, versions):
+    print(title)
+    header = "".join("%8s" % ("v%d" % version) for version in versions)
+    for name, methods in report.items():
+        print("  %-40s%s" % (name, header))
+        for method, costs in methods.items():
+            row = "".join("%8s" % costs.get(version, "-") for version in versions)
+            print("    %-38s%s" % (method, row))
+
+
+def profile_report(names, versions):
+    """
+    - returns {target: {order: {version: average dispatch cost}}} over the calls of
+      the DISPATCH_PROFILE file, for the routers built without and with it
+    """
+    # * Imported here: pyteal is only loaded once a target is built
+    from contracts.router import PROFILE_VARIABLE, dispatch_profile
+
+    profile = {
+        "0x" + selector.hex(): count for selector, count in dispatch_profile().items()
+    }
+    path = os.environ.pop(PROFILE_VARIABLE)
+    try:
+        unordered = cost_report(names, versions, measure=selector_costs)
+    finally:
+        os.environ[PROFILE_VARIABLE] = path
+    ordered = cost_report(names, versions, measure=selector_costs)
+
+    report = {}
+    for name in names:
+        for order, costs in (("given order", unordered), ("profile order", ordered)):
+            for version in versions:
+                average = average_dispatch_cost(
+                    {selector: cost[version] for selector, cost in costs[name].items()},
+                    profile,
+                )
+                if average is not None:
+                    report.setdefault(name, {}).setdefault(order, {})[version] = (
+                        "%.1f" % average
+                    )
+    return report
+
+
+def print_bench(results):
+    print("Marketplace flows on the local evaluator:")
+    print("  %-32s%8s%8s%8s" % ("step", "ops", "inner", "fee"))
+    for name, steps in results.items():
+        print("  %s" % name)
+        for step in steps:
+            row = "    %-30s%8d%8d%8d" % (
+                step.label,
+                step.cost,
+                step.inner_txns,
+                step.fee,
+            )
+            print(row if step.passed else "%s  FAILED: %s" % (row, step.error))
+        # * Every group is its own submission and confirmation
+        print(
+            "    %-30s%8d%8d%8d"
+            % (
+                "%d group(s)" % len(steps),
+                sum(step.cost for step in steps),
+                sum(step.inner_txns for step in steps),
+                sum(step.fee for step in steps),
+            )
+        )
+
+
+def print_comparison(baseline, sizes, steps):
+    revision, predates, _ = baseline
+    print("Before %s (baseline %s) and now:" % (predates, revision))
+    print("  %-32s%16s" % ("approval program", "bytes"))
+    for program, (before, after) in sizes.items():
+        print("    %-30s%16s" % (program, "%d -> %d" % (before, after)))
+    print("  %-32s%16s%16s%16s" % ("step", "ops", "inner", "fee"))
+    for scenario, pairs in steps.items():
+        for before, after in pairs:
+            row = "    %-30s%16s%16s%16s" % (
+                "%s: %s" % (scenario, before.label),
+                "%d -> %d" % (before.cost, after.cost),
+                "%d -> %d" % (before.inner_txns, after.inner_txns),
+                "%d -> %d" % (before.fee, after.fee),
+            )
+            failed = [step for step in (before, after) if not step.passed]
+            print(row if not failed else "%s  FAILED: %s" % (row, failed[0].error))
+
+
+def import_time():
+    """
+    - returns the seconds a fresh interpreter spends importing this script
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import compile_contracts"],
+        cwd=script_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    for line in output.splitlines():
+        _, cumulative, module = line.split("|")
+        if module.strip() == "compile_contracts":
+            return int(cumulative) / 1e6
+    raise RuntimeError("compile_contracts was not imported")
+
+
+def target_names(value):
+    """
+    - parses a comma separated list of targets, kept in build order
+    """
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names - set(TARGETS))
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            "unknown target(s) %s, expected some of: %s"
+            % (", ".join(unknown), ", ".join(TARGETS))
+        )
+    return [name for name in TARGETS if name in names]
 
 
 if __name__ == "__main__":
-    compile_auction()
-    compile_list()
-    compile_nft_app()
-    compile_admin()
-    compile_creator_app()
-    compile_rewards()
-    compile_subscription_app()
-    compile_subscription_module()
-    compile_creator_pool()
+    parser = argparse.ArgumentParser(description="Compile the contracts to TEAL")
+    parser.add_argument(
+        "--only",
+        metavar="TARGETS",
+        type=target_names,
+        default=list(TARGETS),
+        help="comma separated targets to compile, e.g. auction,list (default: all)",
+    )
+    parser.add_argument(
+        "--out",
+        metavar="DIR",
+        default=OUTPUT_DIR,
+        help="directory the programs and manifests are written to",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="stay running and recompile the touched targets on every source edit",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="seconds between source polls in watch mode",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="compile independent contracts across a process pool",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="process pool size (default: CPU count)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="rebuild every target from source, bypassing the build state and cache",
+    )
+    parser.add_argument(
+        "--check-algod",
+        metavar="URL",
+        nargs="?",
+        const=ALGOD_ADDRESS,
+        help="compare the local assembler against algod's /v2/teal/compile "
+        "('%s' against the fixtures recorded with --record-algod)" % LOCAL_ALGOD,
+    )
+    parser.add_argument(
+        "--record-algod",
+        metavar="URL",
+        nargs="?",
+        const=ALGOD_ADDRESS,
+        help="record the teal of every program and algod's bytecode for it as "
+        "fixtures in %s" % os.path.relpath(FIXTURES_DIR),
+    )
+    parser.add_argument(
+        "--teal-version",
+        type=int,
+        help="AVM version to compile to (default: contracts.teal.DEFAULT_TEAL_VERSION)",
+    )
+    parser.add_argument(
+        "--cost-report",
+        metavar="VERSIONS",
+        nargs="?",
+        const="6,8",
+        help="print the static and dispatch opcode cost of every method for each AVM version",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="JSON {ARC-4 method name: call count}; every router compares the most "
+        "called methods first",
+    )
+    parser.add_argument(
+        "--bench",
+        metavar="SCENARIOS",
+        nargs="?",
+        const="",
+        help="replay marketplace flows on the local evaluator and print the ops, "
+        "inner transactions and fee of every step (default: all scenarios)",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINES",
+        nargs="?",
+        const="",
+        help="replay the benchmarked steps against the programs recorded before a "
+        "change and print their size, ops, inner transactions and fee before and "
+        "after (default: all baselines)",
+    )
+    parser.add_argument(
+        "--record-baselines",
+        action="store_true",
+        help="build the programs of every baseline's revision from git history and "
+        "record them in compiler/baselines",
+    )
+    parser.add_argument(
+        "--check-startup",
+        action="store_true",
+        help="fail if importing this script exceeds %dms" % (IMPORT_BUDGET * 1000),
+    )
+    args = parser.parse_args()
+
+    if args.check_startup:
+        seconds = import_time()
+        print(
+            "Startup imports: %.1fms (budget %dms)"
+            % (seconds * 1000, IMPORT_BUDGET * 1000)
+        )
+        if seconds > IMPORT_BUDGET:
+            raise SystemExit("Startup import budget exceeded")
+        raise SystemExit(0)
+
+    if args.teal_version is not None:
+        # * Read by contracts.teal, here and in the build worker processes
+        os.environ["TEAL_VERSION"] = str(args.teal_version)
+
+    if args.profile is not None:
+        # * Read by contracts.router, here and in the build worker processes
+        os.environ["DISPATCH_PROFILE"] = os.path.abspath(args.profile)
+
+    if args.cost_report:
+        versions = [int(version) for version in args.cost_report.split(",")]
+        print_cost_report(
+            "Static opcode cost per method:",
+            cost_report(args.only, versions),
+            versions,
+        )
+        print_cost_report(
+            "Opcode cost to reach each method (dispatch and group checks):",
+            cost_report(args.only, versions, measure=dispatch_costs),
+            versions,
+        )
+        if args.profile is not None:
+            print_cost_report(
+                "Average dispatch cost over the profiled calls:",
+                profile_report(args.only, versions),
+                versions,
+            )
+        raise SystemExit(0)
+
+    if args.bench is not None:
+        # * Imported here: the scenarios build the contracts they deploy
+        from compiler.bench import SCENARIOS, bench
+
+        names = [name.strip() for name in args.bench.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(SCENARIOS))
+        if unknown:
+            raise SystemExit(
+                "unknown scenario(s) %s, expected some of: %s"
+                % (", ".join(unknown), ", ".join(SCENARIOS))
+            )
+        results = bench(names)
+        print_bench(results)
+        if not all(step.passed for steps in results.values() for step in steps):
+            raise SystemExit("A benchmarked step failed")
+        raise SystemExit(0)
+
+    if args.record_baselines:
+        from compiler.bench import BASELINES, record_baseline
+
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in BASELINES:
+            print("Recorded %s" % os.path.relpath(record_baseline(name, script_dir)))
+        raise SystemExit(0)
+
+    if args.compare is not None:
+        from compiler.bench import BASELINES, compare
+
+        names = [name.strip() for name in args.compare.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(BASELINES))
+        if unknown:
+            raise SystemExit(
+                "unknown baseline(s) %s, expected some of: %s"
+                % (", ".join(unknown), ", ".join(BASELINES))
+            )
+        passed = True
+        for name in names or BASELINES:
+            sizes, steps = compare(name)
+            print_comparison(BASELINES[name], sizes, steps)
+            passed = passed and all(
+                step.passed
+                for pairs in steps.values()
+                for pair in pairs
+                for step in pair
+            )
+        if not passed:
+            raise SystemExit("A compared step failed")
+        raise SystemExit(0)
+
+    if args.record_algod:
+        from compiler.client import AlgodClient
+
+        client = AlgodClient(args.record_algod)
+        recorded = record_algod_fixtures(args.only, client)
+        client.close()
+        print(
+            "Recorded %d algod fixtures from %s in %s"
+            % (len(recorded), args.record_algod, FIXTURES_DIR)
+        )
+        raise SystemExit(0)
+
+    if args.check_algod == LOCAL_ALGOD:
+        mismatches, checked = check_against_fixtures()
+        if mismatches:
+            raise SystemExit(
+                "Bytecode differs from the algod fixtures: %s" % ", ".join(mismatches)
+            )
+        print("Local assembler matches the %d recorded fixtures" % checked)
+        raise SystemExit(0)
+
+    if args.check_algod:
+        from compiler.client import AlgodClient
+
+        address = args.check_algod
+        client = AlgodClient(address)
+        mismatches, latencies = check_against_algod(args.only, client)
+        client.close()
+        for file_name, seconds in latencies.items():
+            print("  %-30s %8.1fms" % (file_name, seconds * 1000))
+        if mismatches:
+            raise SystemExit("Bytecode differs from algod: %s" % ", ".join(mismatches))
+        print("Local assembler matches algod at %s for every program" % address)
+        raise SystemExit(0)
+
+    build(args.only, args.out, args.force, args.parallel, args.workers)
+    if args.watch:
+        watch_build(args.only, args.out, args.interval)
@@ -0,0 +1,934 @@
+"""
+Offline TEAL assembler.
+
+Assembles TEAL into the same bytes algod's /v2/teal/compile returns for that
+source: the output of PyTeal with assembleConstants=True (explicit
+intcblock/bytecblock, intc_N/bytec_N and pushint/pushbytes) as well as
+hand-written TEAL using the int/byte/addr/method pseudo-ops. Like algod, the
+constants of the pseudo-ops go into blocks prepended to the program, sorted by
+use count from v4 on with the ones used once pushed instead. Like algod, it only
+accepts an opcode or a field from the AVM version that introduced it.
+"""
+
+import base64
+import hashlib
+import re
+
+TXN_FIELDS = [
+    "Sender",
+    "Fee",
+    "FirstValid",
+    "FirstValidTime",
+    "LastValid",
+    "Note",
+    "Lease",
+    "Receiver",
+    "Amount",
+    "CloseRemainderTo",
+    "VotePK",
+    "SelectionPK",
+    "VoteFirst",
+    "VoteLast",
+    "VoteKeyDilution",
+    "Type",
+    "TypeEnum",
+    "XferAsset",
+    "AssetAmount",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "GroupIndex",
+    "TxID",
+    "ApplicationID",
+    "OnCompletion",
+    "ApplicationArgs",
+    "NumAppArgs",
+    "Accounts",
+    "NumAccounts",
+    "ApprovalProgram",
+    "ClearStateProgram",
+    "RekeyTo",
+    "ConfigAsset",
+    "ConfigAssetTotal",
+    "ConfigAssetDecimals",
+    "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName",
+    "ConfigAssetName",
+    "ConfigAssetURL",
+    "ConfigAssetMetadataHash",
+    "ConfigAssetManager",
+    "ConfigAssetReserve",
+    "ConfigAssetFreeze",
+    "ConfigAssetClawback",
+    "FreezeAsset",
+    "FreezeAssetAccount",
+    "FreezeAssetFrozen",
+    "Assets",
+    "NumAssets",
+    "Applications",
+    "NumApplications",
+    "GlobalNumUint",
+    "GlobalNumByteSlice",
+    "LocalNumUint",
+    "LocalNumByteSlice",
+    "ExtraProgramPages",
+    "Nonparticipation",
+    "Logs",
+    "NumLogs",
+    "CreatedAssetID",
+    "CreatedApplicationID",
+    "LastLog",
+    "StateProofPK",
+    "ApprovalProgramPages",
+    "NumApprovalProgramPages",
+    "ClearStateProgramPages",
+    "NumClearStateProgramPages",
+]
+
+GLOBAL_FIELDS = [
+    "MinTxnFee",
+    "MinBalance",
+    "MaxTxnLife",
+    "ZeroAddress",
+    "GroupSize",
+    "LogicSigVersion",
+    "Round",
+    "LatestTimestamp",
+    "CurrentApplicationID",
+    "CreatorAddress",
+    "CurrentApplicationAddress",
+    "GroupID",
+    "OpcodeBudget",
+    "CallerApplicationID",
+    "CallerApplicationAddress",
+    "AssetCreateMinBalance",
+    "AssetOptInMinBalance",
+    "GenesisHash",
+]
+
+ASSET_HOLDING_FIELDS = ["AssetBalance", "AssetFrozen"]
+
+ASSET_PARAMS_FIELDS = [
+    "AssetTotal",
+    "AssetDecimals",
+    "AssetDefaultFrozen",
+    "AssetUnitName",
+    "AssetName",
+    "AssetURL",
+    "AssetMetadataHash",
+    "AssetManager",
+    "AssetReserve",
+    "AssetFreeze",
+    "AssetClawback",
+    "AssetCreator",
+]
+
+APP_PARAMS_FIELDS = [
+    "AppApprovalProgram",
+    "AppClearStateProgram",
+    "AppGlobalNumUint",
+    "AppGlobalNumByteSlice",
+    "AppLocalNumUint",
+    "AppLocalNumByteSlice",
+    "AppExtraProgramPages",
+    "AppCreator",
+    "AppAddress",
+]
+
+ACCT_PARAMS_FIELDS = [
+    "AcctBalance",
+    "AcctMinBalance",
+    "AcctAuthAddr",
+    "AcctTotalNumUint",
+    "AcctTotalNumByteSlice",
+    "AcctTotalExtraAppPages",
+    "AcctTotalAppsCreated",
+    "AcctTotalAppsOptedIn",
+    "AcctTotalAssetsCreated",
+    "AcctTotalAssets",
+    "AcctTotalBoxes",
+    "AcctTotalBoxBytes",
+]
+
+ECDSA_CURVES = ["Secp256k1", "Secp256r1"]
+BASE64_ENCODINGS = ["URLEncoding", "StdEncoding"]
+JSON_REF_TYPES = ["JSONString", "JSONUint64", "JSONObject"]
+VRF_STANDARDS = ["VrfAlgorand"]
+BLOCK_FIELDS = ["BlkSeed", "BlkTimestamp"]
+
+# * Immediate argument kinds
+U8 = "uint8"
+I8 = "int8"
+VARUINT = "varuint"
+BYTES = "bytes"
+LABEL = "label"
+LABELS = "labels"
+INTS = "ints"
+BYTESS = "bytess"
+
+OPCODES = {
+    "err": (0x00, []),
+    "sha256": (0x01, []),
+    "keccak256": (0x02, []),
+    "sha512_256": (0x03, []),
+    "ed25519verify": (0x04, []),
+    "ecdsa_verify": (0x05, [ECDSA_CURVES]),
+    "ecdsa_pk_decompress": (0x06, [ECDSA_CURVES]),
+    "ecdsa_pk_recover": (0x07, [ECDSA_CURVES]),
+    "+": (0x08, []),
+    "-": (0x09, []),
+    "/": (0x0A, []),
+    "*": (0x0B, []),
+    "<": (0x0C, []),
+    ">": (0x0D, []),
+    "<=": (0x0E, []),
+    ">=": (0x0F, []),
+    "&&": (0x10, []),
+    "||": (0x11, []),
+    "==": (0x12, []),
+    "!=": (0x13, []),
+    "!": (0x14, []),
+    "len": (0x15, []),
+    "itob": (0x16, []),
+    "btoi": (0x17, []),
+    "%": (0x18, []),
+    "|": (0x19, []),
+    "&": (0x1A, []),
+    "^": (0x1B, []),
+    "~": (0x1C, []),
+    "mulw": (0x1D, []),
+    "addw": (0x1E, []),
+    "divmodw": (0x1F, []),
+    "intcblock": (0x20, [INTS]),
+    "intc": (0x21, [U8]),
+    "intc_0": (0x22, []),
+    "intc_1": (0x23, []),
+    "intc_2": (0x24, []),
+    "intc_3": (0x25, []),
+    "bytecblock": (0x26, [BYTESS]),
+    "bytec": (0x27, [U8]),
+    "bytec_0": (0x28, []),
+    "bytec_1": (0x29, []),
+    "bytec_2": (0x2A, []),
+    "bytec_3": (0x2B, []),
+    "arg": (0x2C, [U8]),
+    "arg_0": (0x2D, []),
+    "arg_1": (0x2E, []),
+    "arg_2": (0x2F, []),
+    "arg_3": (0x30, []),
+    "txn": (0x31, [TXN_FIELDS]),
+    "global": (0x32, [GLOBAL_FIELDS]),
+    "gtxn": (0x33, [U8, TXN_FIELDS]),
+    "load": (0x34, [U8]),
+    "store": (0x35, [U8]),
+    "txna": (0x36, [TXN_FIELDS, U8]),
+    "gtxna": (0x37, [U8, TXN_FIELDS, U8]),
+    "gtxns": (0x38, [TXN_FIELDS]),
+    "gtxnsa": (0x39, [TXN_FIELDS, U8]),
+    "gload": (0x3A, [U8, U8]),
+    "gloads": (0x3B, [U8]),
+    "gaid": (0x3C, [U8]),
+    "gaids": (0x3D, []),
+    "loads": (0x3E, []),
+    "stores": (0x3F, []),
+    "bnz": (0x40, [LABEL]),
+    "bz": (0x41, [LABEL]),
+    "b": (0x42, [LABEL]),
+    "return": (0x43, []),
+    "assert": (0x44, []),
+    "bury": (0x45, [U8]),
+    "popn": (0x46, [U8]),
+    "dupn": (0x47, [U8]),
+    "pop": (0x48, []),
+    "dup": (0x49, []),
+    "dup2": (0x4A, []),
+    "dig": (0x4B, [U8]),
+    "swap": (0x4C, []),
+    "select": (0x4D, []),
+    "cover": (0x4E, [U8]),
+    "uncover": (0x4F, [U8]),
+    "concat": (0x50, []),
+    "substring": (0x51, [U8, U8]),
+    "substring3": (0x52, []),
+    "getbit": (0x53, []),
+    "setbit": (0x54, []),
+    "getbyte": (0x55, []),
+    "setbyte": (0x56, []),
+    "extract": (0x57, [U8, U8]),
+    "extract3": (0x58, []),
+    "extract_uint16": (0x59, []),
+    "extract_uint32": (0x5A, []),
+    "extract_uint64": (0x5B, []),
+    "replace2": (0x5C, [U8]),
+    "replace3": (0x5D, []),
+    "base64_decode": (0x5E, [BASE64_ENCODINGS]),
+    "json_ref": (0x5F, [JSON_REF_TYPES]),
+    "balance": (0x60, []),
+    "app_opted_in": (0x61, []),
+    "app_local_get": (0x62, []),
+    "app_local_get_ex": (0x63, []),
+    "app_global_get": (0x64, []),
+    "app_global_get_ex": (0x65, []),
+    "app_local_put": (0x66, []),
+    "app_global_put": (0x67, []),
+    "app_local_del": (0x68, []),
+    "app_global_del": (0x69, []),
+    "asset_holding_get": (0x70, [ASSET_HOLDING_FIELDS]),
+    "asset_params_get": (0x71, [ASSET_PARAMS_FIELDS]),
+    "app_params_get": (0x72, [APP_PARAMS_FIELDS]),
+    "acct_params_get": (0x73, [ACCT_PARAMS_FIELDS]),
+    "min_balance": (0x78, []),
+    "pushbytes": (0x80, [BYTES]),
+    "pushint": (0x81, [VARUINT]),
+    "pushbytess": (0x82, [BYTESS]),
+    "pushints": (0x83, [INTS]),
+    "ed25519verify_bare": (0x84, []),
+    "callsub": (0x88, [LABEL]),
+    "retsub": (0x89, []),
+    "proto": (0x8A, [U8, U8]),
+    "frame_dig": (0x8B, [I8]),
+    "frame_bury": (0x8C, [I8]),
+    "switch": (0x8D, [LABELS]),
+    "match": (0x8E, [LABELS]),
+    "shl": (0x90, []),
+    "shr": (0x91, []),
+    "sqrt": (0x92, []),
+    "bitlen": (0x93, []),
+    "exp": (0x94, []),
+    "expw": (0x95, []),
+    "bsqrt": (0x96, []),
+    "divw": (0x97, []),
+    "sha3_256": (0x98, []),
+    "b+": (0xA0, []),
+    "b-": (0xA1, []),
+    "b/": (0xA2, []),
+    "b*": (0xA3, []),
+    "b<": (0xA4, []),
+    "b>": (0xA5, []),
+    "b<=": (0xA6, []),
+    "b>=": (0xA7, []),
+    "b==": (0xA8, []),
+    "b!=": (0xA9, []),
+    "b%": (0xAA, []),
+    "b|": (0xAB, []),
+    "b&": (0xAC, []),
+    "b^": (0xAD, []),
+    "b~": (0xAE, []),
+    "bzero": (0xAF, []),
+    "log": (0xB0, []),
+    "itxn_begin": (0xB1, []),
+    "itxn_field": (0xB2, [TXN_FIELDS]),
+    "itxn_submit": (0xB3, []),
+    "itxn": (0xB4, [TXN_FIELDS]),
+    "itxna": (0xB5, [TXN_FIELDS, U8]),
+    "itxn_next": (0xB6, []),
+    "gitxn": (0xB7, [U8, TXN_FIELDS]),
+    "gitxna": (0xB8, [U8, TXN_FIELDS, U8]),
+    "box_create": (0xB9, []),
+    "box_extract": (0xBA, []),
+    "box_replace": (0xBB, []),
+    "box_del": (0xBC, []),
+    "box_len": (0xBD, []),
+    "box_get": (0xBE, []),
+    "box_put": (0xBF, []),
+    "txnas": (0xC0, [TXN_FIELDS]),
+    "gtxnas": (0xC1, [U8, TXN_FIELDS]),
+    "gtxnsas": (0xC2, [TXN_FIELDS]),
+    "args": (0xC3, []),
+    "gloadss": (0xC4, []),
+    "itxnas": (0xC5, [TXN_FIELDS]),
+    "gitxnas": (0xC6, [U8, TXN_FIELDS]),
+    "vrf_verify": (0xD0, [VRF_STANDARDS]),
+    "block": (0xD1, [BLOCK_FIELDS]),
+}
+
+# * AVM version each opcode was introduced in; the others are in every version
+_OPCODES_INTRODUCED = {
+    2: [
+        "addw",
+        "txna",
+        "gtxna",
+        "bz",
+        "b",
+        "return",
+        "dup2",
+        "concat",
+        "substring",
+        "substring3",
+        "balance",
+        "app_opted_in",
+        "app_local_get",
+        "app_local_get_ex",
+        "app_global_get",
+        "app_global_get_ex",
+        "app_local_put",
+        "app_global_put",
+        "app_local_del",
+        "app_global_del",
+        "asset_holding_get",
+        "asset_params_get",
+    ],
+    3: [
+        "gtxns",
+        "gtxnsa",
+        "assert",
+        "dig",
+        "swap",
+        "select",
+        "getbit",
+        "setbit",
+        "getbyte",
+        "setbyte",
+        "min_balance",
+        "pushbytes",
+        "pushint",
+    ],
+    4: [
+        "divmodw",
+        "gload",
+        "gloads",
+        "gaid",
+        "gaids",
+        "callsub",
+        "retsub",
+        "shl",
+        "shr",
+        "sqrt",
+        "bitlen",
+        "exp",
+        "expw",
+        "b+",
+        "b-",
+        "b/",
+        "b*",
+        "b<",
+        "b>",
+        "b<=",
+        "b>=",
+        "b==",
+        "b!=",
+        "b%",
+        "b|",
+        "b&",
+        "b^",
+        "b~",
+        "bzero",
+    ],
+    5: [
+        "ecdsa_verify",
+        "ecdsa_pk_decompress",
+        "ecdsa_pk_recover",
+        "loads",
+        "stores",
+        "cover",
+        "uncover",
+        "extract",
+        "extract3",
+        "extract_uint16",
+        "extract_uint32",
+        "extract_uint64",
+        "app_params_get",
+        "log",
+        "itxn_begin",
+        "itxn_field",
+        "itxn_submit",
+        "itxn",
+        "itxna",
+        "txnas",
+        "gtxnas",
+        "gtxnsas",
+        "args",
+    ],
+    6: [
+        "acct_params_get",
+        "bsqrt",
+        "divw",
+        "gloadss",
+        "itxn_next",
+        "gitxn",
+        "gitxna",
+        "itxnas",
+        "gitxnas",
+    ],
+    7: [
+        "replace2",
+        "replace3",
+        "base64_decode",
+        "json_ref",
+        "ed25519verify_bare",
+        "sha3_256",
+        "vrf_verify",
+        "block",
+    ],
+    8: [
+        "bury",
+        "popn",
+        "dupn",
+        "pushbytess",
+        "pushints",
+        "proto",
+        "frame_dig",
+        "frame_bury",
+        "switch",
+        "match",
+        "box_create",
+        "box_extract",
+        "box_replace",
+        "box_del",
+        "box_len",
+        "box_get",
+        "box_put",
+    ],
+}
+
+# * AVM version each named immediate was introduced in; the others are as old
+# * as their opcode
+_FIELDS_INTRODUCED = {
+    2: [
+        "LogicSigVersion",
+        "Round",
+        "LatestTimestamp",
+        "CurrentApplicationID",
+        *TXN_FIELDS[TXN_FIELDS.index("ApplicationID") : TXN_FIELDS.index("Assets")],
+    ],
+    3: [
+        "CreatorAddress",
+        *TXN_FIELDS[TXN_FIELDS.index("Assets") : TXN_FIELDS.index("ExtraProgramPages")],
+    ],
+    4: ["ExtraProgramPages"],
+    5: [
+        "CurrentApplicationAddress",
+        "GroupID",
+        "AssetCreator",
+        *TXN_FIELDS[TXN_FIELDS.index("Nonparticipation") : TXN_FIELDS.index("LastLog")],
+    ],
+    6: [
+        "OpcodeBudget",
+        "CallerApplicationID",
+        "CallerApplicationAddress",
+        "LastLog",
+        "StateProofPK",
+    ],
+    7: [
+        "FirstValidTime",
+        "Secp256r1",
+        *TXN_FIELDS[TXN_FIELDS.index("ApprovalProgramPages") :],
+    ],
+    8: ACCT_PARAMS_FIELDS[ACCT_PARAMS_FIELDS.index("AcctTotalNumUint") :],
+    10: ["AssetCreateMinBalance", "AssetOptInMinBalance", "GenesisHash"],
+}
+
+OPCODE_VERSIONS = {
+    op: version for version, ops in _OPCODES_INTRODUCED.items() for op in ops
+}
+FIELD_VERSIONS = {
+    field: version for version, fields in _FIELDS_INTRODUCED.items() for field in fields
+}
+
+# * algod accepts the array form of these ops under the scalar name
+ARRAY_ALIASES = {
+    ("txn", 2): "txna",
+    ("gtxn", 3): "gtxna",
+    ("gtxns", 2): "gtxnsa",
+    ("itxn", 2): "itxna",
+    ("gitxn", 3): "gitxna",
+}
+
+PSEUDO_OPS = {"int", "byte", "addr", "method"}
+
+# * Names the int pseudo-op accepts for a TypeEnum or an OnCompletion
+NAMED_INTS = {
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+
+# * From this version algod sorts the constant blocks and pushes single-use constants
+OPTIMIZE_CONSTANTS_VERSION = 4
+
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|//.*|\S+')
+
+
+class AssembleError(Exception):
+    def __init__(self, line_number, message):
+        super().__init__("line %d: %s" % (line_number, message))
+        self.line_number = line_number
+
+
+def encode_varuint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _tokens(line):
+    tokens = []
+    for token in _TOKEN.findall(line):
+        if token.startswith("//"):
+            break
+        tokens.append(token)
+    return tokens
+
+
+def _parse_int(token):
+    value = int(token, 0)
+    if not 0 <= value < 2**64:
+        raise ValueError("%s is not a uint64" % token)
+    return value
+
+
+def _parse_string(token):
+    out = bytearray()
+    body = token[1:-1]
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != "\\":
+            out.extend(char.encode())
+            i += 1
+            continue
+        escape = body[i + 1]
+        if escape == "x":
+            out.append(int(body[i + 2 : i + 4], 16))
+            i += 4
+            continue
+        out.extend({"n": b"\n", "r": b"\r", "t": b"\t", '"': b'"', "\\": b"\\"}[escape])
+        i += 2
+    return bytes(out)
+
+
+def _parse_bytes(tokens):
+    """
+    - returns the bytes denoted by the leading tokens and how many tokens they used
+    """
+    token = tokens[0]
+    if token.startswith("0x"):
+        return bytes.fromhex(token[2:]), 1
+    if token.startswith('"'):
+        return _parse_string(token), 1
+    for prefix, decode in (("base64", base64.b64decode), ("b64", base64.b64decode)):
+        if token in (prefix,):
+            return decode(tokens[1]), 2
+        if token.startswith(prefix + "(") and token.endswith(")"):
+            return decode(token[len(prefix) + 1 : -1]), 1
+    for prefix in ("base32", "b32"):
+        if token == prefix:
+            return base64.b32decode(_pad32(tokens[1])), 2
+        if token.startswith(prefix + "(") and token.endswith(")"):
+            return base64.b32decode(_pad32(token[len(prefix) + 1 : -1])), 1
+    raise ValueError("unable to parse byte constant %s" % token)
+
+
+def _pad32(text):
+    return text + "=" * (-len(text) % 8)
+
+
+def _parse_address(token):
+    raw = base64.b32decode(_pad32(token))
+    public_key, checksum = raw[:32], raw[32:]
+    if (
+        len(raw) != 36
+        or hashlib.new("sha512_256", public_key).digest()[-4:] != checksum
+    ):
+        raise ValueError("%s is not a valid address" % token)
+    return public_key
+
+
+def _pseudo_constant(op, args):
+    """
+    - returns the value an int/byte/addr/method pseudo-op stands for
+    """
+    if op == "int":
+        if len(args) != 1:
+            raise ValueError("int expects one immediate")
+        return NAMED_INTS[args[0]] if args[0] in NAMED_INTS else _parse_int(args[0])
+    if op == "byte":
+        value, used = _parse_bytes(args)
+        if used != len(args):
+            raise ValueError("unexpected immediates %s" % " ".join(args[used:]))
+        return value
+    if len(args) != 1:
+        raise ValueError("%s expects one immediate" % op)
+    if op == "addr":
+        return _parse_address(args[0])
+    if not args[0].startswith('"'):
+        raise ValueError("method expects a quoted signature")
+    return hashlib.new("sha512_256", _parse_string(args[0])).digest()[:4]
+
+
+class Instruction:
+    def __init__(self, line_number, op, args):
+        self.line_number = line_number
+        self.op = op
+        self.args = args
+
+    def immediates(self):
+        return OPCODES[self.op][1]
+
+
+def parse(teal):
+    """
+    - returns (version, instructions, labels) where labels maps a label to the
+      index of the instruction it precedes
+    """
+    version = 1
+    instructions = []
+    labels = {}
+
+    for line_number, line in enumerate(teal.splitlines(), 1):
+        tokens = _tokens(line)
+        if not tokens:
+            continue
+
+        if tokens[0] == "#pragma":
+            if tokens[1:2] == ["version"]:
+                version = int(tokens[2])
+            continue
+
+        if tokens[0].endswith(":") and len(tokens) == 1:
+            label = tokens[0][:-1]
+            if label in labels:
+                raise AssembleError(line_number, "duplicate label %s" % label)
+            labels[label] = len(instructions)
+            continue
+
+        op, args = tokens[0], tokens[1:]
+        if op in PSEUDO_OPS:
+            try:
+                value = _pseudo_constant(op, args)
+            except (ValueError, IndexError, KeyError) as error:
+                raise AssembleError(line_number, str(error))
+            instructions.append(Instruction(line_number, op, [value]))
+            continue
+        op = ARRAY_ALIASES.get((op, len(args)), op)
+        if op not in OPCODES:
+            raise AssembleError(line_number, "unknown opcode %s" % op)
+        if OPCODE_VERSIONS.get(op, 1) > version:
+            raise AssembleError(
+                line_number,
+                "%s opcode was introduced in v%d" % (op, OPCODE_VERSIONS[op]),
+            )
+
+        instructions.append(Instruction(line_number, op, args))
+
+    return version, *_lower_constants(version, instructions, labels)
+
+
+def _constant_token(value):
+    return str(value) if isinstance(value, int) else "0x" + value.hex()
+
+
+def _lower_constants(version, instructions, labels):
+    """
+    - returns (instructions, labels) with the pseudo-ops replaced by references to
+      constant blocks prepended to the program, or by push ops, as algod lays them out
+    """
+    blocks = []
+    lowered = list(instructions)
+    for pseudo_ops, block_op, ref_op, push_op in (
+        ({"int"}, "intcblock", "intc", "pushint"),
+        ({"byte", "addr", "method"}, "bytecblock", "bytec", "pushbytes"),
+    ):
+        refs = [
+            i for i, instruction in enumerate(lowered) if instruction.op in pseudo_ops
+        ]
+        if not refs:
+            continue
+
+        explicit = [
+            instruction for instruction in lowered if instruction.op == block_op
+        ]
+        if explicit:
+            # * The constants have to be in the program's own block
+            block = [
+                _parse_int(arg) if block_op == "intcblock" else _parse_bytes([arg])[0]
+                for arg in explicit[0].args
+            ]
+        else:
+            # * Constants in order of first use, then by descending use count
+            counts = {}
+            for i in refs:
+                value = lowered[i].args[0]
+                counts[value] = counts.get(value, 0) + 1
+            block = list(counts)
+            if version >= OPTIMIZE_CONSTANTS_VERSION:
+                block = sorted(block, key=lambda value: -counts[value])
+                block = [value for value in block if counts[value] > 1]
+            if block:
+                blocks.append(
+                    Instruction(
+                        lowered[refs[0]].line_number,
+                        block_op,
+                        [_constant_token(value) for value in block],
+                    )
+                )
+
+        for i in refs:
+            instruction = lowered[i]
+            value = instruction.args[0]
+            if value in block:
+                index = block.index(value)
+                op, args = (
+                    ("%s_%d" % (ref_op, index), [])
+                    if index < 4
+                    else (ref_op, [str(index)])
+                )
+            elif explicit:
+                raise AssembleError(
+                    instruction.line_number,
+                    "%s %s used without it in %s"
+                    % (instruction.op, _constant_token(value), block_op),
+                )
+            else:
+                op, args = push_op, [_constant_token(value)]
+            lowered[i] = Instruction(instruction.line_number, op, args)
+
+    labels = {label: index + len(blocks) for label, index in labels.items()}
+    return blocks + lowered, labels
+
+
+def _encode_enum(names, token):
+    if token in names:
+        return names.index(token)
+    value = int(token, 0)
+    if not 0 <= value < len(names):
+        raise ValueError("%s is out of range" % token)
+    return value
+
+
+def _encode(instruction, pc, addresses, version):
+    """
+    - returns the bytes of the instruction; pc is its own offset and addresses maps
+      labels to offsets (None during the sizing pass)
+    """
+    opcode, kinds = OPCODES[instruction.op]
+    args = list(instruction.args)
+    out = bytearray([opcode])
+    branches = []
+
+    for kind in kinds:
+        if kind in (U8, I8):
+            value = int(args.pop(0), 0)
+            low, high = (-128, 127) if kind == I8 else (0, 255)
+            if not low <= value <= high:
+                raise ValueError("immediate %d out of range" % value)
+            out.append(value & 0xFF)
+        elif isinstance(kind, list):
+            value = _encode_enum(kind, args.pop(0))
+            if FIELD_VERSIONS.get(kind[value], 1) > version:
+                raise ValueError(
+                    "%s %s field was introduced in v%d"
+                    % (instruction.op, kind[value], FIELD_VERSIONS[kind[value]])
+                )
+            out.append(value)
+        elif kind == VARUINT:
+            out.extend(encode_varuint(_parse_int(args.pop(0))))
+        elif kind == BYTES:
+            value, used = _parse_bytes(args)
+            del args[:used]
+            out.extend(encode_varuint(len(value)) + value)
+        elif kind == INTS:
+            values = [_parse_int(arg) for arg in args]
+            args = []
+            out.extend(encode_varuint(len(values)))
+            for value in values:
+                out.extend(encode_varuint(value))
+        elif kind == BYTESS:
+            values = []
+            while args:
+                value, used = _parse_bytes(args)
+                del args[:used]
+                values.append(value)
+            out.extend(encode_varuint(len(values)))
+            for value in values:
+                out.extend(encode_varuint(len(value)) + value)
+        elif kind == LABEL:
+            branches.append(len(out))
+            out.extend(b"\x00\x00")
+            targets = [args.pop(0)]
+        elif kind == LABELS:
+            targets, args = args, []
+            if len(targets) > 255:
+                raise ValueError("too many labels")
+            out.append(len(targets))
+            for _ in targets:
+                branches.append(len(out))
+                out.extend(b"\x00\x00")
+
+    if args:
+        raise ValueError("unexpected immediates %s" % " ".join(args))
+
+    if branches and addresses is not None:
+        # * Branch offsets are relative to the end of the whole instruction
+        end = pc + len(out)
+        for position, target in zip(branches, targets):
+            if target not in addresses:
+                raise ValueError("reference to undefined label %s" % target)
+            offset = addresses[target] - end
+            if not -0x8000 <= offset <= 0x7FFF:
+                raise ValueError("branch to %s is too far" % target)
+            out[position : position + 2] = (offset & 0xFFFF).to_bytes(2, "big")
+
+    return bytes(out)
+
+
+def _layout(version, instructions, labels):
+    """
+    - returns ([pc of each instruction, then the program's end], {label: pc})
+    """
+    # * Every immediate has a fixed width, so one sizing pass resolves all labels
+    offsets = []
+    pc = len(encode_varuint(version))
+    for instruction in instructions:
+        offsets.append(pc)
+        try:
+            pc += len(_encode(instruction, pc, None, version))
+        except (ValueError, IndexError) as error:
+            raise AssembleError(instruction.line_number, str(error))
+    offsets.append(pc)
+    return offsets, {label: offsets[index] for label, index in labels.items()}
+
+
+def label_addresses(teal):
+    """
+    - returns {label: pc} of the labels of the TEAL source
+    """
+    version, instructions, labels = parse(teal)
+    return _layout(version, instructions, labels)[1]
+
+
+def assemble(teal):
+    """
+    - returns the bytecode of the TEAL source
+    """
+    version, instructions, labels = parse(teal)
+    offsets, addresses = _layout(version, instructions, labels)
+
+    program = bytearray(encode_varuint(version))
+    for instruction, offset in zip(instructions, offsets):
+        try:
+            program.extend(_encode(instruction, offset, addresses, version))
+        except (ValueError, IndexError) as error:
+            raise AssembleError(instruction.line_number, str(error))
+
+    return bytes(program)
+
+
+def assemble_base64(teal):
+    """
+    - returns the bytecode base64 encoded, as in algod's compile response "result"
+    """
+    return base64.b64encode(assemble(teal)).decode()
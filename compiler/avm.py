@@ -0,0 +1,2180 @@
+"""
+Application-mode AVM evaluator.
+
+Runs approval/clear bytecode against an in-memory ledger so contracts can be
+dry-run and benchmarked without algod. It covers the opcodes up to v8 that
+application programs use, inner transactions (including app calls, evaluated
+recursively) and the ledger effects of pay/axfer/acfg/afrz/appl transactions.
+Programs only reach the accounts, assets and apps their transaction makes
+available, and a group issues at most 16 inner transactions per app call.
+Every account a transaction changes has to keep its minimum balance, and state
+writes are held to the app's schema and algod's key and value sizes. Fees are
+not charged.
+"""
+
+import base64
+import copy
+import hashlib
+
+from compiler.assembler import (
+    ASSET_HOLDING_FIELDS,
+    ASSET_PARAMS_FIELDS,
+    BYTES,
+    BYTESS,
+    I8,
+    INTS,
+    LABEL,
+    LABELS,
+    OPCODES,
+    U8,
+    VARUINT,
+)
+from compiler.cost import OPCODE_COSTS
+
+MAX_UINT64 = 2**64 - 1
+MAX_BYTES = 4096
+MAX_STACK = 1000
+MAX_INNER_DEPTH = 8
+# * Inner transactions are pooled across the group: 16 per app call, 256 at most
+MAX_INNER_TXNS = 16
+MAX_GROUP_INNER_TXNS = 256
+APP_CALL_BUDGET = 700
+MAX_LOGS = 32
+MAX_LOG_SIZE = 1024
+
+MIN_TXN_FEE = 1000
+MIN_BALANCE = 100000
+# * Per entry of a state schema, on top of MIN_BALANCE per app
+SCHEMA_UINT_MIN_BALANCE = 28500
+SCHEMA_BYTES_MIN_BALANCE = 50000
+MAX_KEY_SIZE = 64
+MAX_KEY_VALUE_SIZE = 128
+ZERO_ADDRESS = bytes(32)
+
+TXN_TYPES = {b"pay": 1, b"keyreg": 2, b"acfg": 3, b"axfer": 4, b"afrz": 5, b"appl": 6}
+
+NOOP, OPT_IN, CLOSE_OUT, CLEAR_STATE, UPDATE_APPLICATION, DELETE_APPLICATION = range(6)
+
+ADDRESS_FIELDS = {
+    "Sender",
+    "Receiver",
+    "CloseRemainderTo",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "RekeyTo",
+    "ConfigAssetManager",
+    "ConfigAssetReserve",
+    "ConfigAssetFreeze",
+    "ConfigAssetClawback",
+    "FreezeAssetAccount",
+}
+
+BYTES_FIELDS = ADDRESS_FIELDS | {
+    "Note",
+    "Lease",
+    "VotePK",
+    "SelectionPK",
+    "Type",
+    "TxID",
+    "ApprovalProgram",
+    "ClearStateProgram",
+    "ConfigAssetUnitName",
+    "ConfigAssetName",
+    "ConfigAssetURL",
+    "ConfigAssetMetadataHash",
+    "StateProofPK",
+    "LastLog",
+    "GroupID",
+}
+
+ARRAY_FIELDS = {"ApplicationArgs", "Accounts", "Assets", "Applications", "Logs"}
+
+# * Inner transaction fields naming an account, asset or app, which the program
+# * setting them has to have available
+ACCOUNT_REFERENCE_FIELDS = {
+    "Sender",
+    "Receiver",
+    "CloseRemainderTo",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "FreezeAssetAccount",
+    "Accounts",
+}
+ASSET_REFERENCE_FIELDS = {"XferAsset", "ConfigAsset", "FreezeAsset", "Assets"}
+APP_REFERENCE_FIELDS = {"ApplicationID", "Applications"}
+
+# * acfg fields copied onto the asset's params (txn field -> asset_params field)
+ASSET_CONFIG_FIELDS = {
+    "ConfigAssetTotal": "AssetTotal",
+    "ConfigAssetDecimals": "AssetDecimals",
+    "ConfigAssetDefaultFrozen": "AssetDefaultFrozen",
+    "ConfigAssetUnitName": "AssetUnitName",
+    "ConfigAssetName": "AssetName",
+    "ConfigAssetURL": "AssetURL",
+    "ConfigAssetMetadataHash": "AssetMetadataHash",
+    "ConfigAssetManager": "AssetManager",
+    "ConfigAssetReserve": "AssetReserve",
+    "ConfigAssetFreeze": "AssetFreeze",
+    "ConfigAssetClawback": "AssetClawback",
+}
+
+# * opcode -> (name, immediate kinds)
+DECODE = {opcode: (name, kinds) for name, (opcode, kinds) in OPCODES.items()}
+
+
+class AvmError(Exception):
+    def __init__(self, message, pc=None):
+        super().__init__(message if pc is None else "pc=%d: %s" % (pc, message))
+        self.pc = pc
+
+
+def application_address(app_id):
+    return hashlib.new("sha512_256", b"appID" + app_id.to_bytes(8, "big")).digest()
+
+
+def default_field(name):
+    if name in ARRAY_FIELDS:
+        return []
+    if name in ADDRESS_FIELDS:
+        return ZERO_ADDRESS
+    if name in BYTES_FIELDS:
+        return b""
+    return 0
+
+
+# * Bytecode decoding
+
+
+def _read_varuint(program, pc):
+    value = shift = 0
+    while True:
+        if pc >= len(program):
+            raise AvmError("truncated varuint", pc)
+        byte = program[pc]
+        value |= (byte & 0x7F) << shift
+        pc += 1
+        if not byte & 0x80:
+            return value, pc
+        shift += 7
+
+
+def _read_bytes(program, pc):
+    length, pc = _read_varuint(program, pc)
+    if pc + length > len(program):
+        raise AvmError("truncated bytes", pc)
+    return program[pc : pc + length], pc + length
+
+
+def _read_offset(program, pc):
+    if pc + 2 > len(program):
+        raise AvmError("truncated branch", pc)
+    return int.from_bytes(program[pc : pc + 2], "big", signed=True), pc + 2
+
+
+class Op:
+    __slots__ = ("pc", "name", "immediates", "next_pc")
+
+    def __init__(self, pc, name, immediates, next_pc):
+        self.pc = pc
+        self.name = name
+        self.immediates = immediates
+        self.next_pc = next_pc
+
+    def __str__(self):
+        return " ".join([self.name] + [_format_immediate(i) for i in self.immediates])
+
+
+def _format_immediate(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, list):
+        return " ".join(_format_immediate(item) for item in value)
+    return str(value)
+
+
+def disassemble(program):
+    """
+    - returns (version, {pc: Op}) with branch immediates resolved to target pcs
+    """
+    version, pc = _read_varuint(program, 0)
+    ops = {}
+
+    while pc < len(program):
+        start = pc
+        opcode = program[pc]
+        if opcode not in DECODE:
+            raise AvmError("invalid opcode 0x%02x" % opcode, pc)
+        name, kinds = DECODE[opcode]
+        pc += 1
+        immediates = []
+        offsets = []
+
+        for kind in kinds:
+            if pc >= len(program):
+                raise AvmError("truncated %s" % name, start)
+            if kind == U8:
+                immediates.append(program[pc])
+                pc += 1
+            elif kind == I8:
+                immediates.append(
+                    int.from_bytes(program[pc : pc + 1], "big", signed=True)
+                )
+                pc += 1
+            elif isinstance(kind, list):
+                if program[pc] >= len(kind):
+                    raise AvmError("invalid %s field %d" % (name, program[pc]), start)
+                immediates.append(kind[program[pc]])
+                pc += 1
+            elif kind == VARUINT:
+                value, pc = _read_varuint(program, pc)
+                immediates.append(value)
+            elif kind == BYTES:
+                value, pc = _read_bytes(program, pc)
+                immediates.append(value)
+            elif kind == INTS:
+                count, pc = _read_varuint(program, pc)
+                values = []
+                for _ in range(count):
+                    value, pc = _read_varuint(program, pc)
+                    values.append(value)
+                immediates.append(values)
+            elif kind == BYTESS:
+                count, pc = _read_varuint(program, pc)
+                values = []
+                for _ in range(count):
+                    value, pc = _read_bytes(program, pc)
+                    values.append(value)
+                immediates.append(values)
+            elif kind == LABEL:
+                offset, pc = _read_offset(program, pc)
+                offsets.append(offset)
+            elif kind == LABELS:
+                count = program[pc]
+                pc += 1
+                for _ in range(count):
+                    offset, pc = _read_offset(program, pc)
+                    offsets.append(offset)
+
+        # * Branch offsets are relative to the end of the whole instruction
+        if LABEL in kinds:
+            immediates.append(pc + offsets[0])
+        elif LABELS in kinds:
+            immediates.append([pc + offset for offset in offsets])
+
+        ops[start] = Op(start, name, immediates, pc)
+
+    return version, ops
+
+
+def disassembly(program):
+    """
+    - returns the program's source lines and {pc: line number} for its ops
+    """
+    version, ops = _disassembled(program)
+    lines = ["#pragma version %d" % version]
+    pc_lines = {}
+    for pc in sorted(ops):
+        lines.append(str(ops[pc]))
+        pc_lines[pc] = len(lines)
+    return lines, pc_lines
+
+
+# * Ledger
+
+
+class Ledger:
+    """
+    In-memory accounts, applications and assets; addresses are raw 32 bytes and
+    state keys/values are bytes or ints.
+    """
+
+    def __init__(self, round=1, timestamp=0, next_id=1001):
+        self.round = round
+        self.timestamp = timestamp
+        self.next_id = next_id
+        # * address -> {"balance", "assets": {id: [amount, frozen]}, "local": {app id: state}}
+        self.accounts = {}
+        # * app id -> {"creator", "approval", "clear", "global", "boxes", "schema"}
+        self.apps = {}
+        # * asset id -> {asset_params field: value}
+        self.assets = {}
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def account(self, address):
+        if address not in self.accounts:
+            self.accounts[address] = {"balance": 0, "assets": {}, "local": {}}
+        return self.accounts[address]
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def create_app(
+        self, creator, approval, clear, app_id=None, global_state=None, schema=None
+    ):
+        app_id = app_id or self.new_id()
+        self.next_id = max(self.next_id, app_id + 1)
+        self.apps[app_id] = {
+            "creator": creator,
+            "approval": approval,
+            "clear": clear,
+            "global": dict(global_state or {}),
+            "boxes": {},
+            "schema": dict(schema or {}),
+        }
+        self.account(application_address(app_id))
+        return app_id
+
+    def create_asset(self, creator, params, asset_id=None):
+        asset_id = asset_id or self.new_id()
+        self.next_id = max(self.next_id, asset_id + 1)
+        asset = {field: default_field(field) for field in ASSET_PARAMS_FIELDS}
+        asset.update({"AssetManager": ZERO_ADDRESS, "AssetReserve": ZERO_ADDRESS})
+        asset.update(params)
+        asset["AssetCreator"] = creator
+        for field in ("AssetManager", "AssetReserve", "AssetFreeze", "AssetClawback"):
+            asset[field] = asset[field] or ZERO_ADDRESS
+        self.assets[asset_id] = asset
+        self.account(creator)["assets"][asset_id] = [
+            asset["AssetTotal"],
+            bool(asset["AssetDefaultFrozen"]),
+        ]
+        return asset_id
+
+    def min_balance(self, address):
+        account = self.account(address)
+        total = MIN_BALANCE + MIN_BALANCE * len(account["assets"])
+        for app_id in account["local"]:
+            schema = self.apps[app_id]["schema"] if app_id in self.apps else {}
+            total += MIN_BALANCE
+            total += SCHEMA_UINT_MIN_BALANCE * schema.get("local_num_uint", 0)
+            total += SCHEMA_BYTES_MIN_BALANCE * schema.get("local_num_byte_slice", 0)
+        for app in self.apps.values():
+            if app["creator"] == address:
+                total += MIN_BALANCE * (1 + app["schema"].get("extra_program_pages", 0))
+                total += SCHEMA_UINT_MIN_BALANCE * app["schema"].get(
+                    "global_num_uint", 0
+                )
+                total += SCHEMA_BYTES_MIN_BALANCE * app["schema"].get(
+                    "global_num_byte_slice", 0
+                )
+        return total
+
+    def check_min_balances(self, before):
+        """
+        - fails when an account changed since the ledger before holds less than
+          its minimum balance; an account emptied of everything needs none
+        """
+        for address, account in self.accounts.items():
+            minimum = self.min_balance(address)
+            if account == before.accounts.get(address) and minimum == (
+                before.min_balance(address) if address in before.accounts else None
+            ):
+                continue
+            if account["balance"] == 0 and minimum == MIN_BALANCE:
+                continue
+            if account["balance"] < minimum:
+                raise AvmError(
+                    "account %s balance %d below min %d"
+                    % (_show(address), account["balance"], minimum)
+                )
+
+
+# * Transaction execution
+
+
+def txn_type(txn):
+    if txn.get("TypeEnum"):
+        return txn["TypeEnum"]
+    return TXN_TYPES.get(txn.get("Type", b""), 0)
+
+
+def new_txn(**fields):
+    """
+    - returns a transaction keyed by TEAL field names, with Type/TypeEnum in sync
+    """
+    txn = dict(fields)
+    if "Type" in txn and "TypeEnum" not in txn:
+        txn["TypeEnum"] = TXN_TYPES[txn["Type"]]
+    elif "TypeEnum" in txn and "Type" not in txn:
+        txn["Type"] = {value: key for key, value in TXN_TYPES.items()}[txn["TypeEnum"]]
+    return txn
+
+
+class Budget:
+    def __init__(self, limit, inner_txns=MAX_GROUP_INNER_TXNS):
+        self.limit = limit
+        self.consumed = 0
+        # * Inner transactions the group may still issue, at any depth
+        self.inner_txns = inner_txns
+
+    @property
+    def remaining(self):
+        return self.limit - self.consumed
+
+    def spend(self, cost, pc):
+        self.consumed += cost
+        if self.consumed > self.limit:
+            raise AvmError("dynamic cost budget exceeded", pc)
+
+    def spend_inner(self):
+        if self.inner_txns == 0:
+            raise AvmError("too many inner transactions")
+        self.inner_txns -= 1
+
+
+class AppCallResult:
+    def __init__(self):
+        self.app_id = 0
+        self.program = b""
+        self.passed = False
+        self.error = None
+        self.cost = 0
+        # * Inner transactions issued by the program and by its inner app calls
+        self.inner_txns = 0
+        self.logs = []
+        # * (pc, stack before the op) per executed op, when traced
+        self.trace = []
+        # * key -> new value, None when deleted
+        self.global_delta = {}
+        # * address -> {key -> new value, None when deleted}
+        self.local_deltas = {}
+
+
+def state_delta(before, after):
+    delta = {key: None for key in before if key not in after}
+    delta.update(
+        {key: value for key, value in after.items() if before.get(key) != value}
+    )
+    return delta
+
+
+def execute(ledger, group, index, budget, caller=0, depth=0, scratch=None, trace=False):
+    """
+    - applies group[index] to the ledger and returns the AppCallResult of its
+      program, or None when it is not an app call
+    """
+    txn = group[index]
+    kind = txn_type(txn)
+    sender = txn.get("Sender", ZERO_ADDRESS)
+
+    if kind == 1:
+        _transfer_algo(
+            ledger, sender, txn.get("Receiver", ZERO_ADDRESS), txn.get("Amount", 0)
+        )
+        close_to = txn.get("CloseRemainderTo", ZERO_ADDRESS)
+        if close_to != ZERO_ADDRESS:
+            _transfer_algo(ledger, sender, close_to, ledger.account(sender)["balance"])
+    elif kind == 4:
+        _transfer_asset(ledger, txn)
+    elif kind == 3:
+        _configure_asset(ledger, txn)
+    elif kind == 5:
+        holding = _holding(
+            ledger,
+            txn.get("FreezeAssetAccount", ZERO_ADDRESS),
+            txn.get("FreezeAsset", 0),
+        )
+        holding[1] = bool(txn.get("FreezeAssetFrozen", 0))
+    elif kind == 6:
+        return _call_app(ledger, group, index, budget, caller, depth, scratch, trace)
+    elif kind != 2:
+        raise AvmError("unknown transaction type %r" % txn.get("Type"))
+    return None
+
+
+def _transfer_algo(ledger, sender, receiver, amount):
+    source = ledger.account(sender)
+    if source["balance"] < amount:
+        raise AvmError("overspend: %d < %d" % (source["balance"], amount))
+    source["balance"] -= amount
+    ledger.account(receiver)["balance"] += amount
+
+
+def _holding(ledger, address, asset_id):
+    holding = ledger.account(address)["assets"].get(asset_id)
+    if holding is None:
+        raise AvmError("account is not opted in to asset %d" % asset_id)
+    return holding
+
+
+def _transfer_asset(ledger, txn):
+    asset_id = txn.get("XferAsset", 0)
+    if asset_id not in ledger.assets:
+        raise AvmError("asset %d does not exist" % asset_id)
+    sender = txn.get("Sender", ZERO_ADDRESS)
+    source_address = txn.get("AssetSender", ZERO_ADDRESS)
+    if source_address == ZERO_ADDRESS:
+        source_address = sender
+    receiver = txn.get("AssetReceiver", ZERO_ADDRESS)
+    amount = txn.get("AssetAmount", 0)
+
+    receiving = ledger.account(receiver)["assets"]
+    if receiver == source_address and amount == 0 and asset_id not in receiving:
+        receiving[asset_id] = [0, bool(ledger.assets[asset_id]["AssetDefaultFrozen"])]
+        return
+
+    source = _holding(ledger, source_address, asset_id)
+    target = _holding(ledger, receiver, asset_id)
+    if source[0] < amount:
+        raise AvmError("underflow on asset %d: %d < %d" % (asset_id, source[0], amount))
+    source[0] -= amount
+    target[0] += amount
+
+    close_to = txn.get("AssetCloseTo", ZERO_ADDRESS)
+    if close_to != ZERO_ADDRESS:
+        _holding(ledger, close_to, asset_id)[0] += source[0]
+        del ledger.account(source_address)["assets"][asset_id]
+
+
+def _configure_asset(ledger, txn):
+    asset_id = txn.get("ConfigAsset", 0)
+    params = {
+        field: txn[config]
+        for config, field in ASSET_CONFIG_FIELDS.items()
+        if config in txn
+    }
+    if asset_id == 0:
+        txn["CreatedAssetID"] = ledger.create_asset(txn["Sender"], params)
+    elif asset_id not in ledger.assets:
+        raise AvmError("asset %d does not exist" % asset_id)
+    elif not params:
+        del ledger.assets[asset_id]
+    else:
+        ledger.assets[asset_id].update(params)
+
+
+def _call_app(ledger, group, index, budget, caller, depth, scratch, trace):
+    txn = group[index]
+    sender = txn.get("Sender", ZERO_ADDRESS)
+    app_id = txn.get("ApplicationID", 0)
+    on_completion = txn.get("OnCompletion", NOOP)
+
+    if app_id == 0:
+        app_id = ledger.create_app(
+            sender,
+            txn.get("ApprovalProgram", b""),
+            txn.get("ClearStateProgram", b""),
+            schema={
+                "global_num_uint": txn.get("GlobalNumUint", 0),
+                "global_num_byte_slice": txn.get("GlobalNumByteSlice", 0),
+                "local_num_uint": txn.get("LocalNumUint", 0),
+                "local_num_byte_slice": txn.get("LocalNumByteSlice", 0),
+                "extra_program_pages": txn.get("ExtraProgramPages", 0),
+            },
+        )
+        txn["CreatedApplicationID"] = app_id
+    elif app_id not in ledger.apps:
+        raise AvmError("application %d does not exist" % app_id)
+
+    app = ledger.apps[app_id]
+    local = ledger.account(sender)["local"]
+    if on_completion == OPT_IN:
+        local.setdefault(app_id, {})
+    elif on_completion in (CLOSE_OUT, CLEAR_STATE) and app_id not in local:
+        raise AvmError("account is not opted in to application %d" % app_id)
+
+    program = app["clear"] if on_completion == CLEAR_STATE else app["approval"]
+    global_before = dict(app["global"])
+    local_before = {
+        address: dict(account["local"][app_id])
+        for address, account in ledger.accounts.items()
+        if app_id in account["local"]
+    }
+
+    machine = Machine(ledger, group, index, app_id, budget, caller, depth, scratch)
+    result = machine.run(program, trace)
+    result.app_id = app_id
+    result.program = program
+    txn["Logs"] = result.logs
+
+    result.global_delta = state_delta(global_before, app["global"])
+    for address, account in ledger.accounts.items():
+        delta = state_delta(
+            local_before.get(address, {}), account["local"].get(app_id, {})
+        )
+        if delta:
+            result.local_deltas[address] = delta
+
+    if on_completion == CLEAR_STATE:
+        local.pop(app_id, None)
+    elif result.passed:
+        if on_completion == CLOSE_OUT:
+            local.pop(app_id, None)
+        elif on_completion == UPDATE_APPLICATION:
+            app["approval"] = txn.get("ApprovalProgram", b"")
+            app["clear"] = txn.get("ClearStateProgram", b"")
+        elif on_completion == DELETE_APPLICATION:
+            del ledger.apps[app_id]
+    return result
+
+
+# * Evaluation
+
+
+OPS = {}
+
+
+def op(*names):
+    def register(function):
+        for name in names:
+            OPS[name] = function
+        return function
+
+    return register
+
+
+_programs = {}
+
+
+def _disassembled(program):
+    if program not in _programs:
+        _programs[program] = disassemble(program)
+    return _programs[program]
+
+
+class Machine:
+    def __init__(
+        self, ledger, group, index, app_id, budget, caller=0, depth=0, scratch=None
+    ):
+        self.ledger = ledger
+        self.group = group
+        self.index = index
+        self.txn = group[index]
+        self.app_id = app_id
+        self.budget = budget
+        self.caller = caller
+        self.depth = depth
+        # * Scratch spaces of the whole group, for gload
+        self.group_scratch = scratch if scratch is not None else {}
+        self.scratch = self.group_scratch.setdefault(index, [0] * 256)
+        self.stack = []
+        self.frames = []
+        self.intc = []
+        self.bytec = []
+        self.logs = []
+        self.inner = None
+        self.last_inner = []
+        self.inner_txns = 0
+        # * Assets and apps created by this program's inner transactions
+        self.created = set()
+        self.version = 0
+
+    # * Stack helpers
+
+    def push(self, value):
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, int) and not 0 <= value <= MAX_UINT64:
+            raise AvmError("uint64 overflow" if value > 0 else "uint64 underflow")
+        if isinstance(value, bytes) and len(value) > MAX_BYTES:
+            raise AvmError("byte slice exceeds %d bytes" % MAX_BYTES)
+        if len(self.stack) >= MAX_STACK:
+            raise AvmError("stack overflow")
+        self.stack.append(value)
+
+    def pop(self, kind=None):
+        if not self.stack:
+            raise AvmError("stack underflow")
+        value = self.stack.pop()
+        if kind is not None and not isinstance(value, kind):
+            raise AvmError(
+                "expected %s, got %s"
+                % ("uint64" if kind is int else "bytes", _show(value))
+            )
+        return value
+
+    def pop_int(self):
+        return self.pop(int)
+
+    def pop_bytes(self):
+        return self.pop(bytes)
+
+    def popn(self, count):
+        if len(self.stack) < count:
+            raise AvmError("stack underflow")
+        values = self.stack[len(self.stack) - count :]
+        del self.stack[len(self.stack) - count :]
+        return values
+
+    # * References
+
+    def created_before(self):
+        """
+        - returns the assets and apps created earlier in the group or by this
+          program's inner transactions
+        """
+        created = set(self.created)
+        for txn in self.group[: self.index]:
+            created.update(_created(txn))
+        return created
+
+    def available_accounts(self):
+        accounts = [self.txn.get("Sender", ZERO_ADDRESS)] + self.txn.get("Accounts", [])
+        applications = [self.app_id] + list(self.created_before())
+        # * v7 made the accounts of the referenced apps available
+        if self.version >= 7:
+            applications += self.txn.get("Applications", [])
+        return accounts + [application_address(app_id) for app_id in applications]
+
+    def account_ref(self, value):
+        if isinstance(value, bytes):
+            if len(value) != 32:
+                raise AvmError("invalid account %s" % _show(value))
+            if value not in self.available_accounts():
+                raise AvmError("unavailable account %s" % _show(value))
+            return value
+        accounts = [self.txn.get("Sender", ZERO_ADDRESS)] + self.txn.get("Accounts", [])
+        if value >= len(accounts):
+            raise AvmError("invalid Accounts index %d" % value)
+        return accounts[value]
+
+    def app_ref(self, value):
+        applications = self.txn.get("Applications", [])
+        if value == 0:
+            return self.app_id
+        if value <= len(applications):
+            return applications[value - 1]
+        return self.available_app(value)
+
+    def available_app(self, app_id):
+        applications = [self.app_id] + self.txn.get("Applications", [])
+        if app_id not in applications and app_id not in self.created_before():
+            raise AvmError("unavailable app %d" % app_id)
+        return app_id
+
+    def asset_ref(self, value):
+        assets = self.txn.get("Assets", [])
+        if value < len(assets):
+            return assets[value]
+        return self.available_asset(value)
+
+    def available_asset(self, asset_id):
+        if asset_id not in self.txn.get("Assets", []) + list(self.created_before()):
+            raise AvmError("unavailable asset %d" % asset_id)
+        return asset_id
+
+    # * Transaction fields
+
+    def txn_field(self, txn, field, index=None, group_index=None):
+        if field == "TypeEnum":
+            value = txn_type(txn)
+        elif field == "Type":
+            value = (
+                txn.get("Type") or {v: k for k, v in TXN_TYPES.items()}[txn_type(txn)]
+            )
+        elif field == "GroupIndex":
+            value = group_index
+        elif field == "TxID":
+            value = hashlib.new(
+                "sha512_256", repr(sorted(txn.items())).encode()
+            ).digest()
+        elif field == "NumAppArgs":
+            value = len(txn.get("ApplicationArgs", []))
+        elif field == "NumAccounts":
+            value = len(txn.get("Accounts", []))
+        elif field == "NumAssets":
+            value = len(txn.get("Assets", []))
+        elif field == "NumApplications":
+            value = len(txn.get("Applications", []))
+        elif field == "NumLogs":
+            value = len(txn.get("Logs", []))
+        elif field == "LastLog":
+            logs = txn.get("Logs", [])
+            value = logs[-1] if logs else b""
+        elif field == "Accounts":
+            value = [txn.get("Sender", ZERO_ADDRESS)] + txn.get("Accounts", [])
+        elif field == "Applications":
+            value = [txn.get("ApplicationID", 0)] + txn.get("Applications", [])
+        elif field == "FirstValidTime":
+            raise AvmError("FirstValidTime is not available")
+        else:
+            value = txn.get(field, default_field(field))
+
+        if field in ARRAY_FIELDS:
+            if index is None:
+                raise AvmError("%s is an array field" % field)
+            if index >= len(value):
+                raise AvmError("invalid %s index %d" % (field, index))
+            return value[index]
+        if index is not None:
+            raise AvmError("%s is not an array field" % field)
+        return value
+
+    def global_field(self, field):
+        app = self.ledger.apps.get(self.app_id, {})
+        values = {
+            "MinTxnFee": MIN_TXN_FEE,
+            "MinBalance": MIN_BALANCE,
+            "MaxTxnLife": 1000,
+            "ZeroAddress": ZERO_ADDRESS,
+            "GroupSize": len(self.group),
+            "LogicSigVersion": 8,
+            "Round": self.ledger.round,
+            "LatestTimestamp": self.ledger.timestamp,
+            "CurrentApplicationID": self.app_id,
+            "CreatorAddress": app.get("creator", ZERO_ADDRESS),
+            "CurrentApplicationAddress": application_address(self.app_id),
+            "GroupID": bytes(32),
+            "OpcodeBudget": self.budget.remaining,
+            "CallerApplicationID": self.caller,
+            "CallerApplicationAddress": (
+                application_address(self.caller) if self.caller else ZERO_ADDRESS
+            ),
+            "AssetCreateMinBalance": MIN_BALANCE,
+            "AssetOptInMinBalance": MIN_BALANCE,
+            "GenesisHash": bytes(32),
+        }
+        return values[field]
+
+    # * Execution
+
+    def run(self, program, trace=False):
+        result = AppCallResult()
+        try:
+            self.version, ops = _disassembled(program)
+            pc = _read_varuint(program, 0)[1]
+            consumed = self.budget.consumed
+            try:
+                while True:
+                    if pc == len(program):
+                        result.passed = self._passed(pc)
+                        break
+                    if pc not in ops:
+                        raise AvmError("branch into the middle of an instruction", pc)
+                    current = ops[pc]
+                    if trace:
+                        result.trace.append((pc, list(self.stack)))
+                    self.budget.spend(OPCODE_COSTS.get(current.name, 1), pc)
+                    try:
+                        handler = OPS[current.name]
+                    except KeyError:
+                        raise AvmError("%s is not supported" % current.name, pc)
+                    try:
+                        pc = handler(self, current)
+                    except AvmError as error:
+                        if error.pc is None:
+                            raise AvmError(str(error), pc)
+                        raise
+                    if pc is _DONE:
+                        result.passed = self._passed(current.pc)
+                        break
+                    if pc is None:
+                        pc = current.next_pc
+            finally:
+                result.cost = self.budget.consumed - consumed
+                result.inner_txns = self.inner_txns
+        except AvmError as error:
+            result.error = str(error)
+        result.logs = self.logs
+        return result
+
+    def _passed(self, pc):
+        if self.frames:
+            raise AvmError("program ended inside a subroutine", pc)
+        if len(self.stack) != 1:
+            raise AvmError("stack has %d values at the end" % len(self.stack), pc)
+        value = self.stack[0]
+        if not isinstance(value, int):
+            raise AvmError("stack finished with bytes not int", pc)
+        return value != 0
+
+    # * Inner transactions
+
+    def begin_inner(self):
+        self.budget.spend_inner()
+        self.inner_txns += 1
+        self.inner.append(
+            {
+                "Sender": application_address(self.app_id),
+                "Fee": MIN_TXN_FEE,
+            }
+        )
+
+    def submit_inner(self):
+        if not self.inner:
+            raise AvmError("itxn_submit without itxn_begin")
+        if self.depth >= MAX_INNER_DEPTH:
+            raise AvmError("inner transaction depth exceeded")
+        group = [new_txn(**txn) for txn in self.inner]
+        self.inner = None
+        scratch = {}
+        for index, txn in enumerate(group):
+            if txn_type(txn) == 6:
+                self.budget.limit += APP_CALL_BUDGET
+            result = execute(
+                self.ledger,
+                group,
+                index,
+                self.budget,
+                caller=self.app_id,
+                depth=self.depth + 1,
+                scratch=scratch,
+            )
+            if result is not None:
+                self.inner_txns += result.inner_txns
+                if result.error:
+                    raise AvmError("inner app call failed: %s" % result.error)
+                if not result.passed:
+                    raise AvmError("inner app call rejected")
+        for txn in group:
+            self.created.update(_created(txn))
+        self.last_inner = group
+
+
+_DONE = object()
+
+
+def _show(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    return str(value)
+
+
+def _uint(value):
+    return int.from_bytes(value, "big")
+
+
+def _check_range(value, start, end, length):
+    if start > end or end > length:
+        raise AvmError("range %d:%d out of bounds for %d bytes" % (start, end, length))
+
+
+# * Flow control
+
+
+@op("err")
+def _err(machine, current):
+    raise AvmError("err opcode executed")
+
+
+@op("return")
+def _return(machine, current):
+    value = machine.pop_int()
+    machine.stack = [value]
+    machine.frames = []
+    return _DONE
+
+
+@op("assert")
+def _assert(machine, current):
+    if machine.pop_int() == 0:
+        raise AvmError("assert failed")
+
+
+@op("b")
+def _b(machine, current):
+    return current.immediates[0]
+
+
+@op("bz")
+def _bz(machine, current):
+    if machine.pop_int() == 0:
+        return current.immediates[0]
+
+
+@op("bnz")
+def _bnz(machine, current):
+    if machine.pop_int() != 0:
+        return current.immediates[0]
+
+
+@op("switch")
+def _switch(machine, current):
+    index = machine.pop_int()
+    targets = current.immediates[0]
+    if index < len(targets):
+        return targets[index]
+
+
+@op("match")
+def _match(machine, current):
+    targets = current.immediates[0]
+    value = machine.pop()
+    candidates = machine.popn(len(targets))
+    for candidate, target in zip(candidates, targets):
+        if type(candidate) is type(value) and candidate == value:
+            return target
+
+
+@op("callsub")
+def _callsub(machine, current):
+    if len(machine.frames) >= 1024:
+        raise AvmError("call stack overflow")
+    machine.frames.append([current.next_pc, None, 0, 0])
+    return current.immediates[0]
+
+
+@op("proto")
+def _proto(machine, current):
+    if not machine.frames or machine.frames[-1][1] is not None:
+        raise AvmError("proto must be the first op of a subroutine")
+    arguments, returns = current.immediates
+    if len(machine.stack) < arguments:
+        raise AvmError("proto needs %d arguments" % arguments)
+    machine.frames[-1][1:] = [len(machine.stack), arguments, returns]
+
+
+@op("retsub")
+def _retsub(machine, current):
+    if not machine.frames:
+        raise AvmError("retsub outside of a subroutine")
+    return_pc, frame, arguments, returns = machine.frames.pop()
+    if frame is not None:
+        if len(machine.stack) < frame + returns:
+            raise AvmError("retsub with too few return values")
+        results = machine.stack[len(machine.stack) - returns :] if returns else []
+        del machine.stack[frame - arguments :]
+        machine.stack.extend(results)
+    return return_pc
+
+
+def _frame(machine):
+    if not machine.frames or machine.frames[-1][1] is None:
+        raise AvmError("frame access outside of a proto subroutine")
+    return machine.frames[-1]
+
+
+@op("frame_dig")
+def _frame_dig(machine, current):
+    _, frame, arguments, _ = _frame(machine)
+    position = frame + current.immediates[0]
+    if not frame - arguments <= position < len(machine.stack):
+        raise AvmError("frame_dig %d out of the frame" % current.immediates[0])
+    machine.push(machine.stack[position])
+
+
+@op("frame_bury")
+def _frame_bury(machine, current):
+    _, frame, arguments, _ = _frame(machine)
+    value = machine.pop()
+    position = frame + current.immediates[0]
+    if not frame - arguments <= position < len(machine.stack):
+        raise AvmError("frame_bury %d out of the frame" % current.immediates[0])
+    machine.stack[position] = value
+
+
+# * Constants
+
+
+@op("intcblock")
+def _intcblock(machine, current):
+    machine.intc = current.immediates[0]
+
+
+@op("bytecblock")
+def _bytecblock(machine, current):
+    machine.bytec = current.immediates[0]
+
+
+def _constant(block, index, name):
+    if index >= len(block):
+        raise AvmError("%s %d out of range" % (name, index))
+    return block[index]
+
+
+@op("intc")
+def _intc(machine, current):
+    machine.push(_constant(machine.intc, current.immediates[0], "intc"))
+
+
+@op("bytec")
+def _bytec(machine, current):
+    machine.push(_constant(machine.bytec, current.immediates[0], "bytec"))
+
+
+@op("intc_0", "intc_1", "intc_2", "intc_3")
+def _intc_n(machine, current):
+    machine.push(_constant(machine.intc, int(current.name[-1]), current.name))
+
+
+@op("bytec_0", "bytec_1", "bytec_2", "bytec_3")
+def _bytec_n(machine, current):
+    machine.push(_constant(machine.bytec, int(current.name[-1]), current.name))
+
+
+@op("pushint", "pushbytes")
+def _push(machine, current):
+    machine.push(current.immediates[0])
+
+
+@op("pushints", "pushbytess")
+def _pushn(machine, current):
+    for value in current.immediates[0]:
+        machine.push(value)
+
+
+# * Arithmetic and logic
+
+
+def _binary(function, kind=int):
+    def handler(machine, current):
+        right = machine.pop(kind)
+        left = machine.pop(kind)
+        machine.push(function(left, right))
+
+    return handler
+
+
+def _divide(left, right):
+    if right == 0:
+        raise AvmError("division by zero")
+    return left // right
+
+
+def _modulo(left, right):
+    if right == 0:
+        raise AvmError("modulo by zero")
+    return left % right
+
+
+def _shift_amount(value):
+    if value > 63:
+        raise AvmError("shift by %d" % value)
+    return value
+
+
+def _exp(left, right):
+    if left == 0 and right == 0:
+        raise AvmError("0^0 is undefined")
+    return left**right
+
+
+def _equal(machine, current):
+    right = machine.pop()
+    left = machine.pop()
+    if type(left) is not type(right):
+        raise AvmError("cannot compare %s to %s" % (_show(left), _show(right)))
+    machine.push(int(left == right) if current.name == "==" else int(left != right))
+
+
+BINARY_OPS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": _divide,
+    "%": _modulo,
+    "<": lambda a, b: int(a < b),
+    ">": lambda a, b: int(a > b),
+    "<=": lambda a, b: int(a <= b),
+    ">=": lambda a, b: int(a >= b),
+    "&&": lambda a, b: int(bool(a and b)),
+    "||": lambda a, b: int(bool(a or b)),
+    "|": lambda a, b: a | b,
+    "&": lambda a, b: a & b,
+    "^": lambda a, b: a ^ b,
+    "shl": lambda a, b: (a << _shift_amount(b)) & MAX_UINT64,
+    "shr": lambda a, b: a >> _shift_amount(b),
+    "exp": _exp,
+}
+
+for _name, _function in BINARY_OPS.items():
+    OPS[_name] = _binary(_function)
+
+OPS["=="] = OPS["!="] = _equal
+
+
+@op("!")
+def _not(machine, current):
+    machine.push(int(machine.pop_int() == 0))
+
+
+@op("~")
+def _invert(machine, current):
+    machine.push(machine.pop_int() ^ MAX_UINT64)
+
+
+@op("sqrt")
+def _sqrt(machine, current):
+    value = machine.pop_int()
+    root = int(value**0.5)
+    while root * root > value:
+        root -= 1
+    while (root + 1) * (root + 1) <= value:
+        root += 1
+    machine.push(root)
+
+
+@op("bitlen")
+def _bitlen(machine, current):
+    value = machine.pop()
+    machine.push(
+        value.bit_length() if isinstance(value, int) else _uint(value).bit_length()
+    )
+
+
+@op("mulw")
+def _mulw(machine, current):
+    right = machine.pop_int()
+    product = machine.pop_int() * right
+    machine.push(product >> 64)
+    machine.push(product & MAX_UINT64)
+
+
+@op("addw")
+def _addw(machine, current):
+    right = machine.pop_int()
+    total = machine.pop_int() + right
+    machine.push(total >> 64)
+    machine.push(total & MAX_UINT64)
+
+
+@op("expw")
+def _expw(machine, current):
+    right = machine.pop_int()
+    value = _exp(machine.pop_int(), right)
+    if value > 2**128 - 1:
+        raise AvmError("expw overflow")
+    machine.push(value >> 64)
+    machine.push(value & MAX_UINT64)
+
+
+@op("divmodw")
+def _divmodw(machine, current):
+    divisor_low = machine.pop_int()
+    divisor_high = machine.pop_int()
+    low = machine.pop_int()
+    high = machine.pop_int()
+    divisor = (divisor_high << 64) | divisor_low
+    if divisor == 0:
+        raise AvmError("division by zero")
+    quotient, remainder = divmod((high << 64) | low, divisor)
+    machine.push(quotient >> 64)
+    machine.push(quotient & MAX_UINT64)
+    machine.push(remainder >> 64)
+    machine.push(remainder & MAX_UINT64)
+
+
+@op("divw")
+def _divw(machine, current):
+    divisor = machine.pop_int()
+    low = machine.pop_int()
+    high = machine.pop_int()
+    if divisor == 0:
+        raise AvmError("division by zero")
+    quotient = ((high << 64) | low) // divisor
+    if quotient > MAX_UINT64:
+        raise AvmError("divw overflow")
+    machine.push(quotient)
+
+
+# * Byte math
+
+
+def _byte_math(function, compare=False):
+    def handler(machine, current):
+        right = machine.pop_bytes()
+        left = machine.pop_bytes()
+        if len(left) > 64 or len(right) > 64:
+            raise AvmError("byte math input exceeds 64 bytes")
+        value = function(_uint(left), _uint(right))
+        if compare:
+            machine.push(int(value))
+        elif value < 0:
+            raise AvmError("byte math underflow")
+        else:
+            machine.push(
+                value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big")
+                if value
+                else b""
+            )
+
+    return handler
+
+
+OPS["b+"] = _byte_math(lambda a, b: a + b)
+OPS["b-"] = _byte_math(lambda a, b: a - b)
+OPS["b*"] = _byte_math(lambda a, b: a * b)
+OPS["b/"] = _byte_math(_divide)
+OPS["b%"] = _byte_math(_modulo)
+OPS["b<"] = _byte_math(lambda a, b: a < b, compare=True)
+OPS["b>"] = _byte_math(lambda a, b: a > b, compare=True)
+OPS["b<="] = _byte_math(lambda a, b: a <= b, compare=True)
+OPS["b>="] = _byte_math(lambda a, b: a >= b, compare=True)
+OPS["b=="] = _byte_math(lambda a, b: a == b, compare=True)
+OPS["b!="] = _byte_math(lambda a, b: a != b, compare=True)
+
+
+def _bitwise_bytes(function):
+    def handler(machine, current):
+        right = machine.pop_bytes()
+        left = machine.pop_bytes()
+        size = max(len(left), len(right))
+        left, right = left.rjust(size, b"\0"), right.rjust(size, b"\0")
+        machine.push(bytes(function(a, b) for a, b in zip(left, right)))
+
+    return handler
+
+
+OPS["b|"] = _bitwise_bytes(lambda a, b: a | b)
+OPS["b&"] = _bitwise_bytes(lambda a, b: a & b)
+OPS["b^"] = _bitwise_bytes(lambda a, b: a ^ b)
+
+
+@op("b~")
+def _binvert(machine, current):
+    machine.push(bytes(byte ^ 0xFF for byte in machine.pop_bytes()))
+
+
+@op("bzero")
+def _bzero(machine, current):
+    size = machine.pop_int()
+    if size > MAX_BYTES:
+        raise AvmError("bzero %d exceeds %d bytes" % (size, MAX_BYTES))
+    machine.push(bytes(size))
+
+
+@op("bsqrt")
+def _bsqrt(machine, current):
+    value = _uint(machine.pop_bytes())
+    root = int(value**0.5)
+    while root * root > value:
+        root -= 1
+    while (root + 1) * (root + 1) <= value:
+        root += 1
+    machine.push(root.to_bytes((root.bit_length() + 7) // 8, "big"))
+
+
+# * Hashing
+
+
+@op("sha256")
+def _sha256(machine, current):
+    machine.push(hashlib.sha256(machine.pop_bytes()).digest())
+
+
+@op("sha512_256")
+def _sha512_256(machine, current):
+    machine.push(hashlib.new("sha512_256", machine.pop_bytes()).digest())
+
+
+@op("sha3_256")
+def _sha3_256(machine, current):
+    machine.push(hashlib.sha3_256(machine.pop_bytes()).digest())
+
+
+# * Byte manipulation
+
+
+@op("len")
+def _len(machine, current):
+    machine.push(len(machine.pop_bytes()))
+
+
+@op("itob")
+def _itob(machine, current):
+    machine.push(machine.pop_int().to_bytes(8, "big"))
+
+
+@op("btoi")
+def _btoi(machine, current):
+    value = machine.pop_bytes()
+    if len(value) > 8:
+        raise AvmError("btoi input exceeds 8 bytes")
+    machine.push(_uint(value))
+
+
+@op("concat")
+def _concat(machine, current):
+    right = machine.pop_bytes()
+    machine.push(machine.pop_bytes() + right)
+
+
+@op("substring")
+def _substring(machine, current):
+    start, end = current.immediates
+    value = machine.pop_bytes()
+    _check_range(start, end, end, len(value))
+    machine.push(value[start:end])
+
+
+@op("substring3")
+def _substring3(machine, current):
+    end = machine.pop_int()
+    start = machine.pop_int()
+    value = machine.pop_bytes()
+    _check_range(start, end, end, len(value))
+    machine.push(value[start:end])
+
+
+@op("extract")
+def _extract(machine, current):
+    start, length = current.immediates
+    value = machine.pop_bytes()
+    end = len(value) if length == 0 else start + length
+    _check_range(start, start, end, len(value))
+    machine.push(value[start:end])
+
+
+@op("extract3")
+def _extract3(machine, current):
+    length = machine.pop_int()
+    start = machine.pop_int()
+    value = machine.pop_bytes()
+    _check_range(start, start, start + length, len(value))
+    machine.push(value[start : start + length])
+
+
+def _extract_uint(size):
+    def handler(machine, current):
+        start = machine.pop_int()
+        value = machine.pop_bytes()
+        _check_range(start, start, start + size, len(value))
+        machine.push(_uint(value[start : start + size]))
+
+    return handler
+
+
+OPS["extract_uint16"] = _extract_uint(2)
+OPS["extract_uint32"] = _extract_uint(4)
+OPS["extract_uint64"] = _extract_uint(8)
+
+
+def _replace(machine, value, start, replacement):
+    _check_range(start, start, start + len(replacement), len(value))
+    machine.push(value[:start] + replacement + value[start + len(replacement) :])
+
+
+@op("replace2")
+def _replace2(machine, current):
+    replacement = machine.pop_bytes()
+    _replace(machine, machine.pop_bytes(), current.immediates[0], replacement)
+
+
+@op("replace3")
+def _replace3(machine, current):
+    replacement = machine.pop_bytes()
+    start = machine.pop_int()
+    _replace(machine, machine.pop_bytes(), start, replacement)
+
+
+@op("getbyte")
+def _getbyte(machine, current):
+    index = machine.pop_int()
+    value = machine.pop_bytes()
+    _check_range(index, index, index + 1, len(value))
+    machine.push(value[index])
+
+
+@op("setbyte")
+def _setbyte(machine, current):
+    byte = machine.pop_int()
+    index = machine.pop_int()
+    value = machine.pop_bytes()
+    _check_range(index, index, index + 1, len(value))
+    if byte > 255:
+        raise AvmError("setbyte value %d > 255" % byte)
+    machine.push(value[:index] + bytes([byte]) + value[index + 1 :])
+
+
+@op("getbit")
+def _getbit(machine, current):
+    index = machine.pop_int()
+    value = machine.pop()
+    if isinstance(value, int):
+        if index > 63:
+            raise AvmError("getbit index %d beyond 63" % index)
+        machine.push((value >> index) & 1)
+    else:
+        _check_range(index // 8, index // 8, index // 8 + 1, len(value))
+        machine.push((value[index // 8] >> (7 - index % 8)) & 1)
+
+
+@op("setbit")
+def _setbit(machine, current):
+    bit = machine.pop_int()
+    index = machine.pop_int()
+    value = machine.pop()
+    if bit > 1:
+        raise AvmError("setbit value %d > 1" % bit)
+    if isinstance(value, int):
+        if index > 63:
+            raise AvmError("setbit index %d beyond 63" % index)
+        machine.push(value | (1 << index) if bit else value & ~(1 << index))
+    else:
+        _check_range(index // 8, index // 8, index // 8 + 1, len(value))
+        byte = value[index // 8]
+        mask = 1 << (7 - index % 8)
+        byte = byte | mask if bit else byte & ~mask
+        machine.push(value[: index // 8] + bytes([byte]) + value[index // 8 + 1 :])
+
+
+@op("base64_decode")
+def _base64_decode(machine, current):
+    value = machine.pop_bytes()
+    try:
+        if current.immediates[0] == "URLEncoding":
+            machine.push(base64.urlsafe_b64decode(value + b"=" * (-len(value) % 4)))
+        else:
+            machine.push(
+                base64.b64decode(value + b"=" * (-len(value) % 4), validate=True)
+            )
+    except ValueError as error:
+        raise AvmError("base64_decode: %s" % error)
+
+
+# * Stack manipulation
+
+
+@op("pop")
+def _pop(machine, current):
+    machine.pop()
+
+
+@op("popn")
+def _popn(machine, current):
+    machine.popn(current.immediates[0])
+
+
+@op("dup")
+def _dup(machine, current):
+    value = machine.pop()
+    machine.push(value)
+    machine.push(value)
+
+
+@op("dup2")
+def _dup2(machine, current):
+    for value in machine.popn(2) * 2:
+        machine.push(value)
+
+
+@op("dupn")
+def _dupn(machine, current):
+    value = machine.pop()
+    for _ in range(current.immediates[0] + 1):
+        machine.push(value)
+
+
+def _depth(machine, depth):
+    if depth >= len(machine.stack):
+        raise AvmError("stack too shallow for depth %d" % depth)
+    return len(machine.stack) - 1 - depth
+
+
+@op("dig")
+def _dig(machine, current):
+    machine.push(machine.stack[_depth(machine, current.immediates[0])])
+
+
+@op("bury")
+def _bury(machine, current):
+    depth = current.immediates[0]
+    if depth == 0:
+        raise AvmError("bury 0 is not allowed")
+    value = machine.pop()
+    machine.stack[_depth(machine, depth - 1)] = value
+
+
+@op("swap")
+def _swap(machine, current):
+    right = machine.pop()
+    left = machine.pop()
+    machine.push(right)
+    machine.push(left)
+
+
+@op("select")
+def _select(machine, current):
+    condition = machine.pop_int()
+    right = machine.pop()
+    left = machine.pop()
+    machine.push(right if condition else left)
+
+
+@op("cover")
+def _cover(machine, current):
+    position = _depth(machine, current.immediates[0])
+    machine.stack.insert(position, machine.stack.pop())
+
+
+@op("uncover")
+def _uncover(machine, current):
+    position = _depth(machine, current.immediates[0])
+    machine.stack.append(machine.stack.pop(position))
+
+
+# * Scratch space
+
+
+def _slot(index):
+    if index > 255:
+        raise AvmError("invalid scratch slot %d" % index)
+    return index
+
+
+@op("load")
+def _load(machine, current):
+    machine.push(machine.scratch[current.immediates[0]])
+
+
+@op("store")
+def _store(machine, current):
+    machine.scratch[current.immediates[0]] = machine.pop()
+
+
+@op("loads")
+def _loads(machine, current):
+    machine.push(machine.scratch[_slot(machine.pop_int())])
+
+
+@op("stores")
+def _stores(machine, current):
+    value = machine.pop()
+    machine.scratch[_slot(machine.pop_int())] = value
+
+
+def _group_scratch(machine, index, slot):
+    if index >= machine.index:
+        raise AvmError("gload can only read earlier transactions of the group")
+    if txn_type(machine.group[index]) != 6 or index not in machine.group_scratch:
+        raise AvmError("transaction %d is not an app call" % index)
+    return machine.group_scratch[index][_slot(slot)]
+
+
+@op("gload")
+def _gload(machine, current):
+    machine.push(_group_scratch(machine, *current.immediates))
+
+
+@op("gloads")
+def _gloads(machine, current):
+    index = machine.pop_int()
+    machine.push(_group_scratch(machine, index, current.immediates[0]))
+
+
+@op("gloadss")
+def _gloadss(machine, current):
+    slot = machine.pop_int()
+    machine.push(_group_scratch(machine, machine.pop_int(), slot))
+
+
+@op("gaid")
+def _gaid(machine, current):
+    machine.push(_created_id(machine, current.immediates[0]))
+
+
+@op("gaids")
+def _gaids(machine, current):
+    machine.push(_created_id(machine, machine.pop_int()))
+
+
+def _created(txn):
+    """
+    - returns the ids of the asset and the app txn created, if any
+    """
+    return {txn.get("CreatedAssetID", 0), txn.get("CreatedApplicationID", 0)} - {0}
+
+
+def _created_id(machine, index):
+    if index >= machine.index:
+        raise AvmError("gaid can only read earlier transactions of the group")
+    txn = machine.group[index]
+    created = txn.get("CreatedAssetID") or txn.get("CreatedApplicationID")
+    if not created:
+        raise AvmError("transaction %d did not create an asset or app" % index)
+    return created
+
+
+# * Transaction fields
+
+
+def _group_txn(machine, index):
+    if index >= len(machine.group):
+        raise AvmError("gtxn %d beyond group of %d" % (index, len(machine.group)))
+    return machine.group[index]
+
+
+@op("txn")
+def _txn(machine, current):
+    field = current.immediates[0]
+    machine.push(machine.txn_field(machine.txn, field, None, machine.index))
+
+
+@op("txna")
+def _txna(machine, current):
+    field, index = current.immediates
+    machine.push(machine.txn_field(machine.txn, field, index, machine.index))
+
+
+@op("txnas")
+def _txnas(machine, current):
+    index = machine.pop_int()
+    field = current.immediates[0]
+    machine.push(machine.txn_field(machine.txn, field, index, machine.index))
+
+
+@op("gtxn")
+def _gtxn(machine, current):
+    group_index, field = current.immediates
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, field, None, group_index))
+
+
+@op("gtxna")
+def _gtxna(machine, current):
+    group_index, field, index = current.immediates
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, field, index, group_index))
+
+
+@op("gtxnas")
+def _gtxnas(machine, current):
+    index = machine.pop_int()
+    group_index, field = current.immediates
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, field, index, group_index))
+
+
+@op("gtxns")
+def _gtxns(machine, current):
+    group_index = machine.pop_int()
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, current.immediates[0], None, group_index))
+
+
+@op("gtxnsa")
+def _gtxnsa(machine, current):
+    group_index = machine.pop_int()
+    field, index = current.immediates
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, field, index, group_index))
+
+
+@op("gtxnsas")
+def _gtxnsas(machine, current):
+    index = machine.pop_int()
+    group_index = machine.pop_int()
+    txn = _group_txn(machine, group_index)
+    machine.push(machine.txn_field(txn, current.immediates[0], index, group_index))
+
+
+@op("global")
+def _global(machine, current):
+    machine.push(machine.global_field(current.immediates[0]))
+
+
+@op("log")
+def _log(machine, current):
+    value = machine.pop_bytes()
+    if len(machine.logs) >= MAX_LOGS:
+        raise AvmError("too many log calls")
+    if sum(map(len, machine.logs)) + len(value) > MAX_LOG_SIZE:
+        raise AvmError("program logs exceed %d bytes" % MAX_LOG_SIZE)
+    machine.logs.append(value)
+
+
+# * State access
+
+
+def _local_state(machine, address, app_id):
+    local = machine.ledger.account(address)["local"]
+    if app_id not in local:
+        raise AvmError("account is not opted in to application %d" % app_id)
+    return local[app_id]
+
+
+def _check_put(state, key, value, schema, scope):
+    """
+    - fails a write of value under key that algod rejects: a key or key and
+      value too long, or more values of its type than the scope's schema holds
+    """
+    if len(key) > MAX_KEY_SIZE:
+        raise AvmError("key too long: %d bytes" % len(key))
+    if isinstance(value, bytes) and len(key) + len(value) > MAX_KEY_VALUE_SIZE:
+        raise AvmError("key and value too long: %d bytes" % (len(key) + len(value)))
+
+    values = [state[other] for other in state if other != key] + [value]
+    uints = sum(1 for other in values if isinstance(other, int))
+    for kind, count, field in (
+        ("integer", uints, "num_uint"),
+        ("bytes", len(values) - uints, "num_byte_slice"),
+    ):
+        allowed = schema.get("%s_%s" % (scope, field), 0)
+        if count > allowed:
+            raise AvmError(
+                "store %s count %d exceeds schema %s count %d"
+                % (kind, count, kind, allowed)
+            )
+
+
+def _push_ex(machine, state, key):
+    if key in state:
+        machine.push(state[key])
+        machine.push(1)
+    else:
+        machine.push(0)
+        machine.push(0)
+
+
+@op("balance")
+def _balance(machine, current):
+    address = machine.account_ref(machine.pop())
+    machine.push(machine.ledger.account(address)["balance"])
+
+
+@op("min_balance")
+def _min_balance(machine, current):
+    machine.push(machine.ledger.min_balance(machine.account_ref(machine.pop())))
+
+
+@op("app_opted_in")
+def _app_opted_in(machine, current):
+    app_id = machine.app_ref(machine.pop_int())
+    address = machine.account_ref(machine.pop())
+    machine.push(int(app_id in machine.ledger.account(address)["local"]))
+
+
+@op("app_local_get")
+def _app_local_get(machine, current):
+    key = machine.pop_bytes()
+    address = machine.account_ref(machine.pop())
+    machine.push(_local_state(machine, address, machine.app_id).get(key, 0))
+
+
+@op("app_local_get_ex")
+def _app_local_get_ex(machine, current):
+    key = machine.pop_bytes()
+    app_id = machine.app_ref(machine.pop_int())
+    address = machine.account_ref(machine.pop())
+    _push_ex(machine, machine.ledger.account(address)["local"].get(app_id, {}), key)
+
+
+@op("app_local_put")
+def _app_local_put(machine, current):
+    value = machine.pop()
+    key = machine.pop_bytes()
+    address = machine.account_ref(machine.pop())
+    state = _local_state(machine, address, machine.app_id)
+    _check_put(
+        state, key, value, machine.ledger.apps[machine.app_id]["schema"], "local"
+    )
+    state[key] = value
+
+
+@op("app_local_del")
+def _app_local_del(machine, current):
+    key = machine.pop_bytes()
+    address = machine.account_ref(machine.pop())
+    _local_state(machine, address, machine.app_id).pop(key, None)
+
+
+@op("app_global_get")
+def _app_global_get(machine, current):
+    key = machine.pop_bytes()
+    machine.push(machine.ledger.apps[machine.app_id]["global"].get(key, 0))
+
+
+@op("app_global_get_ex")
+def _app_global_get_ex(machine, current):
+    key = machine.pop_bytes()
+    app = machine.ledger.apps.get(machine.app_ref(machine.pop_int()))
+    _push_ex(machine, app["global"] if app else {}, key)
+
+
+@op("app_global_put")
+def _app_global_put(machine, current):
+    value = machine.pop()
+    key = machine.pop_bytes()
+    app = machine.ledger.apps[machine.app_id]
+    _check_put(app["global"], key, value, app["schema"], "global")
+    app["global"][key] = value
+
+
+@op("app_global_del")
+def _app_global_del(machine, current):
+    key = machine.pop_bytes()
+    machine.ledger.apps[machine.app_id]["global"].pop(key, None)
+
+
+@op("asset_holding_get")
+def _asset_holding_get(machine, current):
+    asset_id = machine.asset_ref(machine.pop_int())
+    address = machine.account_ref(machine.pop())
+    holding = machine.ledger.account(address)["assets"].get(asset_id)
+    if holding is None:
+        machine.push(0)
+        machine.push(0)
+        return
+    field = ASSET_HOLDING_FIELDS.index(current.immediates[0])
+    machine.push(int(holding[field]))
+    machine.push(1)
+
+
+@op("asset_params_get")
+def _asset_params_get(machine, current):
+    asset = machine.ledger.assets.get(machine.asset_ref(machine.pop_int()))
+    if asset is None:
+        machine.push(0)
+        machine.push(0)
+        return
+    value = asset[current.immediates[0]]
+    machine.push(int(value) if isinstance(value, bool) else value)
+    machine.push(1)
+
+
+@op("app_params_get")
+def _app_params_get(machine, current):
+    app_id = machine.app_ref(machine.pop_int())
+    app = machine.ledger.apps.get(app_id)
+    if app is None:
+        machine.push(0)
+        machine.push(0)
+        return
+    field = current.immediates[0]
+    schema = app["schema"]
+    values = {
+        "AppApprovalProgram": app["approval"],
+        "AppClearStateProgram": app["clear"],
+        "AppGlobalNumUint": schema.get("global_num_uint", 0),
+        "AppGlobalNumByteSlice": schema.get("global_num_byte_slice", 0),
+        "AppLocalNumUint": schema.get("local_num_uint", 0),
+        "AppLocalNumByteSlice": schema.get("local_num_byte_slice", 0),
+        "AppExtraProgramPages": schema.get("extra_program_pages", 0),
+        "AppCreator": app["creator"],
+        "AppAddress": application_address(app_id),
+    }
+    machine.push(values[field])
+    machine.push(1)
+
+
+@op("acct_params_get")
+def _acct_params_get(machine, current):
+    address = machine.account_ref(machine.pop())
+    account = machine.ledger.account(address)
+    field = current.immediates[0]
+    values = {
+        "AcctBalance": account["balance"],
+        "AcctMinBalance": machine.ledger.min_balance(address),
+        "AcctAuthAddr": ZERO_ADDRESS,
+        "AcctTotalAssets": len(account["assets"]),
+        "AcctTotalAppsOptedIn": len(account["local"]),
+    }
+    if field not in values:
+        raise AvmError("acct_params_get %s is not supported" % field)
+    machine.push(values[field])
+    machine.push(int(account["balance"] > 0))
+
+
+# * Boxes
+
+
+def _boxes(machine):
+    return machine.ledger.apps[machine.app_id]["boxes"]
+
+
+def _box(machine, name):
+    boxes = _boxes(machine)
+    if name not in boxes:
+        raise AvmError("box %s does not exist" % _show(name))
+    return boxes[name]
+
+
+@op("box_create")
+def _box_create(machine, current):
+    size = machine.pop_int()
+    name = machine.pop_bytes()
+    boxes = _boxes(machine)
+    if name in boxes:
+        if len(boxes[name]) != size:
+            raise AvmError("box %s exists with another size" % _show(name))
+        machine.push(0)
+        return
+    boxes[name] = bytes(size)
+    machine.push(1)
+
+
+@op("box_extract")
+def _box_extract(machine, current):
+    length = machine.pop_int()
+    start = machine.pop_int()
+    value = _box(machine, machine.pop_bytes())
+    _check_range(start, start, start + length, len(value))
+    machine.push(value[start : start + length])
+
+
+@op("box_replace")
+def _box_replace(machine, current):
+    replacement = machine.pop_bytes()
+    start = machine.pop_int()
+    name = machine.pop_bytes()
+    value = _box(machine, name)
+    _check_range(start, start, start + len(replacement), len(value))
+    _boxes(machine)[name] = (
+        value[:start] + replacement + value[start + len(replacement) :]
+    )
+
+
+@op("box_del")
+def _box_del(machine, current):
+    machine.push(int(_boxes(machine).pop(machine.pop_bytes(), None) is not None))
+
+
+@op("box_len")
+def _box_len(machine, current):
+    value = _boxes(machine).get(machine.pop_bytes())
+    machine.push(0 if value is None else len(value))
+    machine.push(int(value is not None))
+
+
+@op("box_get")
+def _box_get(machine, current):
+    value = _boxes(machine).get(machine.pop_bytes())
+    machine.push(b"" if value is None else value)
+    machine.push(int(value is not None))
+
+
+@op("box_put")
+def _box_put(machine, current):
+    value = machine.pop_bytes()
+    name = machine.pop_bytes()
+    boxes = _boxes(machine)
+    if name in boxes and len(boxes[name]) != len(value):
+        raise AvmError("box_put changes the size of box %s" % _show(name))
+    boxes[name] = value
+
+
+# * Inner transactions
+
+
+@op("itxn_begin")
+def _itxn_begin(machine, current):
+    if machine.inner is not None:
+        raise AvmError("itxn_begin without itxn_submit")
+    machine.inner = []
+    machine.begin_inner()
+
+
+@op("itxn_next")
+def _itxn_next(machine, current):
+    if not machine.inner:
+        raise AvmError("itxn_next without itxn_begin")
+    machine.begin_inner()
+
+
+@op("itxn_field")
+def _itxn_field(machine, current):
+    if not machine.inner:
+        raise AvmError("itxn_field without itxn_begin")
+    field = current.immediates[0]
+    value = machine.pop()
+    txn = machine.inner[-1]
+
+    if field in ACCOUNT_REFERENCE_FIELDS:
+        value = machine.account_ref(value)
+    # * ConfigAsset and ApplicationID 0 create an asset or an app
+    elif field in ASSET_REFERENCE_FIELDS and (value or field != "ConfigAsset"):
+        machine.available_asset(value)
+    elif field in APP_REFERENCE_FIELDS and (value or field != "ApplicationID"):
+        machine.available_app(value)
+
+    if field in ARRAY_FIELDS:
+        txn.setdefault(field, []).append(value)
+    elif field == "Type":
+        if value not in TXN_TYPES:
+            raise AvmError("unknown type %s" % _show(value))
+        txn["Type"] = value
+        txn["TypeEnum"] = TXN_TYPES[value]
+    elif field == "TypeEnum":
+        txn.update(new_txn(TypeEnum=value))
+    else:
+        if field in ADDRESS_FIELDS and (
+            not isinstance(value, bytes) or len(value) != 32
+        ):
+            raise AvmError("%s must be a 32 byte address" % field)
+        if (field in BYTES_FIELDS) != isinstance(value, bytes):
+            raise AvmError("%s has the wrong type: %s" % (field, _show(value)))
+        txn[field] = value
+
+
+@op("itxn_submit")
+def _itxn_submit(machine, current):
+    machine.submit_inner()
+
+
+def _last_inner(machine, index=None):
+    group = machine.last_inner
+    if not group:
+        raise AvmError("no inner transaction was submitted")
+    index = len(group) - 1 if index is None else index
+    if index >= len(group):
+        raise AvmError("gitxn %d beyond inner group of %d" % (index, len(group)))
+    return group[index], index
+
+
+@op("itxn")
+def _itxn(machine, current):
+    txn, index = _last_inner(machine)
+    machine.push(machine.txn_field(txn, current.immediates[0], None, index))
+
+
+@op("itxna")
+def _itxna(machine, current):
+    txn, index = _last_inner(machine)
+    field, array_index = current.immediates
+    machine.push(machine.txn_field(txn, field, array_index, index))
+
+
+@op("itxnas")
+def _itxnas(machine, current):
+    array_index = machine.pop_int()
+    txn, index = _last_inner(machine)
+    machine.push(machine.txn_field(txn, current.immediates[0], array_index, index))
+
+
+@op("gitxn")
+def _gitxn(machine, current):
+    group_index, field = current.immediates
+    txn, index = _last_inner(machine, group_index)
+    machine.push(machine.txn_field(txn, field, None, index))
+
+
+@op("gitxna")
+def _gitxna(machine, current):
+    group_index, field, array_index = current.immediates
+    txn, index = _last_inner(machine, group_index)
+    machine.push(machine.txn_field(txn, field, array_index, index))
+
+
+@op("gitxnas")
+def _gitxnas(machine, current):
+    array_index = machine.pop_int()
+    group_index, field = current.immediates
+    txn, index = _last_inner(machine, group_index)
+    machine.push(machine.txn_field(txn, field, array_index, index))
+
+
+# * Groups
+
+
+def evaluate_group(ledger, group, trace=False):
+    """
+    - applies the transactions in order and returns one AppCallResult (or None)
+      per transaction; a rejected app call leaves the ledger as it was before it
+    """
+    app_calls = sum(1 for txn in group if txn_type(txn) == 6)
+    budget = Budget(
+        APP_CALL_BUDGET * app_calls,
+        min(MAX_INNER_TXNS * app_calls, MAX_GROUP_INNER_TXNS),
+    )
+    scratch = {}
+    results = []
+
+    for index in range(len(group)):
+        snapshot = ledger.copy()
+        try:
+            result = execute(ledger, group, index, budget, scratch=scratch, trace=trace)
+            if result is None or result.passed:
+                ledger.check_min_balances(snapshot)
+        except AvmError as error:
+            result = AppCallResult()
+            result.error = str(error)
+        if result is not None and not result.passed:
+            ledger.__dict__.update(snapshot.__dict__)
+        results.append(result)
+
+    return results
@@ -0,0 +1,680 @@
+"""
+Marketplace flows replayed on the local AVM evaluator.
+
+Every scenario starts from a fresh ledger holding a stand-in admin app (its
+globals are the ones the modules read: owner, platform fee, USDC asset and the
+registered modules), an NFT minted through creator_app and the nft_app that
+holds it. Each step reports the opcode cost of its app calls, the inner
+transactions they issued and the fee the group has to pool, one minimum fee per
+outer and inner transaction.
+
+A baseline is the programs of an earlier revision, recorded in
+compiler/baselines with the selectors and admin keys they were called with, and
+replayed through the same scenarios to report a change's before and after.
+"""
+
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import namedtuple
+
+from compiler.avm import (
+    MIN_BALANCE,
+    MIN_TXN_FEE,
+    Ledger,
+    application_address,
+    evaluate_group,
+    new_txn,
+)
+from compiler.registry import registry
+from compiler.targets import TARGETS
+from contracts import abi, constants
+from contracts.abi import constant_bytes
+from contracts.checkers import create_asset_app_checker
+from contracts.utility import MINT_BATCH
+
+Step = namedtuple("Step", ["label", "passed", "cost", "inner_txns", "fee", "error"])
+
+PLATFORM_FEE = 5
+ROYALTY = 5
+BALANCE = 10**10
+# * Global schema (uints, byte slices) a module is created with: the globals its
+# * program writes
+MODULE_SCHEMAS = {"creator_app": (3, 2), "auction": (1, 1), "list": (1, 1)}
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+# * baseline -> (revision, what it predates, {scenario: labels of the steps
+# * compared})
+BASELINES = {
+    "bid": (
+        "5820bf1",
+        "nft_app's bid method",
+        {"auction": ["on_bid first bid", "on_bid outbid"]},
+    ),
+    "settle": (
+        "3994c9c",
+        "nft_app's settle method",
+        {"sale": ["purchase_nft"], "auction": ["close_auction winner"]},
+    ),
+}
+# * The programs a baseline records and the admin globals the scenarios set
+BASELINE_PROGRAMS = ["creator_app", "nft_app", "auction", "list"]
+BASELINE_KEYS = [
+    "OWNER",
+    "PLATFORM_FEE",
+    "USDC_ASSET_ID",
+    "AUCTION_MODULE",
+    "LIST_MODULE",
+]
+
+
+def uint(value):
+    return value.to_bytes(8, "big")
+
+
+def byte_array(value):
+    return len(value).to_bytes(2, "big") + value
+
+
+def _key(name):
+    return constant_bytes(getattr(constants, name))
+
+
+class Marketplace:
+    """
+    - a ledger with the admin stand-in, one NFT and its nft_app, ready for the
+      modules to be deployed against
+    """
+
+    def __init__(self, timestamp=1000, baseline=None):
+        # * A recorded baseline stands in for the tree's programs and ARC-4 calls
+        self.baseline = baseline
+        self.ledger = Ledger(timestamp=timestamp)
+        self.steps = []
+        self.seller, self.bob, self.carol = (bytes([n]) * 32 for n in (1, 2, 3))
+        for account in (self.seller, self.bob, self.carol):
+            self.ledger.account(account)["balance"] = BALANCE
+
+        self.admin_id = self.ledger.create_app(self.seller, b"", b"")
+        self.admin_address = application_address(self.admin_id)
+        # * Platform fees are paid to it, so it holds its minimum balance
+        self.ledger.account(self.admin_address)["balance"] = MIN_BALANCE
+        self.usdc = self.ledger.create_asset(
+            self.seller, {"AssetTotal": 10**12, "AssetDecimals": 6}
+        )
+        self.admin_globals = self.ledger.apps[self.admin_id]["global"]
+        self.admin_globals.update(
+            {
+                self.key("OWNER"): self.seller,
+                self.key("PLATFORM_FEE"): PLATFORM_FEE,
+                self.key("USDC_ASSET_ID"): self.usdc,
+            }
+        )
+        self.creator_app = self.deploy("creator_app", accounts=[self.seller])
+        self.nft, self.nft_app = self.mint()
+        # * Only the scenario's own steps are reported
+        self.steps = []
+
+    def key(self, name):
+        if self.baseline is not None:
+            return bytes.fromhex(self.baseline["keys"][name])
+        return _key(name)
+
+    def selector(self, method):
+        if self.baseline is not None:
+            return bytes.fromhex(self.baseline["selectors"][method])
+        return abi.selector(method)
+
+    def reference_args(self, method):
+        if self.baseline is not None:
+            return [
+                bytes.fromhex(arg)
+                for arg in self.baseline["reference_args"].get(method, [])
+            ]
+        return abi.reference_args(method)
+
+    def create_asset_app_amount(self):
+        if self.baseline is not None:
+            return self.baseline["create_asset_app_amount"]
+        return create_asset_app_checker.txns[0]["amount"]
+
+    def programs(self, name):
+        if self.baseline is not None:
+            return tuple(map(base64.b64decode, self.baseline["programs"][name]))
+        target = TARGETS[name]
+        return (
+            registry.get(target.approval).bytecode,
+            registry.get(target.clear).bytecode,
+        )
+
+    def deploy(self, name, module=None, accounts=()):
+        """
+        - creates the target's app, registered with the admin under module
+        """
+        approval, clear = self.programs(name)
+        uints, byte_slices = MODULE_SCHEMAS[name]
+        txn = new_txn(
+            Type=b"appl",
+            Sender=self.seller,
+            ApplicationID=0,
+            ApprovalProgram=approval,
+            ClearStateProgram=clear,
+            GlobalNumUint=uints,
+            GlobalNumByteSlice=byte_slices,
+            Applications=[self.admin_id],
+            Accounts=list(accounts),
+        )
+        evaluate_group(self.ledger, [txn])
+        app_id = txn["CreatedApplicationID"]
+        if module is not None:
+            self.admin_globals[self.key(module)] = app_id
+        return app_id
+
+    def mint(self):
+        """
+        - returns (NFT, nft_app) of a new NFT deployed through creator_app
+        """
+        nft = self.ledger.create_asset(
+            self.seller, {"AssetTotal": 1, "AssetManager": self.admin_address}
+        )
+        create = self.call(
+            self.seller,
+            self.creator_app,
+            "CREATE_ASSET_APP",
+            uint(ROYALTY),
+            assets=[nft, self.usdc],
+            applications=[self.admin_id],
+        )
+        self.step(
+            "create_asset_app",
+            self.pay(
+                self.seller,
+                application_address(self.creator_app),
+                self.create_asset_app_amount(),
+            ),
+            create,
+        )
+        returned = abi.returned(create["Logs"])
+        # * Before create_asset_app returned it, the nft_app was the newest app
+        nft_app = (
+            max(self.ledger.apps)
+            if returned is None
+            else int.from_bytes(returned, "big")
+        )
+        self.step(
+            "opt_in_assets",
+            self.pay(self.seller, application_address(nft_app), 200_000),
+            self.call(
+                self.seller,
+                nft_app,
+                "OPT_IN_ASSETS",
+                assets=[nft, self.usdc],
+                applications=[self.admin_id],
+            ),
+        )
+        return nft, nft_app
+
+    def pay(self, sender, receiver, amount):
+        return new_txn(Type=b"pay", Sender=sender, Receiver=receiver, Amount=amount)
+
+    def axfer(self, sender, receiver, asset, amount):
+        return new_txn(
+            Type=b"axfer",
+            Sender=sender,
+            AssetReceiver=receiver,
+            XferAsset=asset,
+            AssetAmount=amount,
+        )
+
+    def call(self, sender, app_id, method, *args, **references):
+        """
+        - args are the method's values; its reference arguments index the
+          references given, which start the arrays in order
+        - every module reads the admin app, so the call references it after the
+          applications given
+        """
+        applications = list(references.get("applications", []))
+        if self.admin_id not in applications:
+            applications.append(self.admin_id)
+        return new_txn(
+            Type=b"appl",
+            Sender=sender,
+            ApplicationID=app_id,
+            ApplicationArgs=[
+                self.selector(method),
+                *args,
+                *self.reference_args(method),
+            ],
+            Accounts=references.get("accounts", []),
+            Assets=references.get("assets", []),
+            Applications=applications,
+        )
+
+    def step(self, label, *group):
+        results = [
+            result
+            for result in evaluate_group(self.ledger, list(group))
+            if result is not None
+        ]
+        inner_txns = sum(result.inner_txns for result in results)
+        step = Step(
+            label,
+            all(result.passed for result in results),
+            sum(result.cost for result in results),
+            inner_txns,
+            (len(group) + inner_txns) * MIN_TXN_FEE,
+            next((result.error for result in results if result.error), None),
+        )
+        self.steps.append(step)
+        return step
+
+
+def auction_scenario(baseline=None):
+    """
+    - an ALGO auction: created, outbid twice and closed with a winner
+    """
+    market = Marketplace(baseline=baseline)
+    auction = market.deploy("auction", "AUCTION_MODULE")
+    nft_app_address = application_address(market.nft_app)
+
+    market.step(
+        "create_auction",
+        market.axfer(market.seller, nft_app_address, market.nft, 1),
+        market.call(
+            market.seller,
+            auction,
+            "CREATE_AUCTION",
+            uint(2000),
+            uint(5000),
+            uint(10),
+            uint(0),
+            uint(100),
+            assets=[market.nft],
+            applications=[market.nft_app],
+        ),
+    )
+    market.ledger.timestamp = 2500
+    previous = market.bob
+    for label, bidder, amount in (
+        ("on_bid first bid", market.bob, 1000),
+        ("on_bid outbid", market.carol, 2000),
+        ("on_bid outbid", market.bob, 3000),
+    ):
+        market.step(
+            label,
+            market.pay(bidder, nft_app_address, amount),
+            market.call(
+                bidder,
+                auction,
+                "ON_BID",
+                accounts=[previous],
+                applications=[market.nft_app],
+            ),
+        )
+        previous = bidder
+
+    market.ledger.timestamp = 6000
+    market.ledger.account(market.bob)["assets"][market.nft] = [0, False]
+    # * Closed by a third party, the proceeds still go to the seller
+    market.step(
+        "close_auction winner",
+        market.call(
+            market.carol,
+            auction,
+            "CLOSE_AUCTION",
+            accounts=[market.seller, market.bob, market.admin_address, market.seller],
+            assets=[market.nft],
+            applications=[market.nft_app],
+        ),
+    )
+    return market.steps
+
+
+def sale_scenario(baseline=None):
+    """
+    - an ALGO listing bought outright
+    """
+    market = Marketplace(baseline=baseline)
+    listing = market.deploy("list", "LIST_MODULE")
+    nft_app_address = application_address(market.nft_app)
+
+    market.step(
+        "start_sell",
+        market.axfer(market.seller, nft_app_address, market.nft, 1),
+        market.call(
+            market.seller,
+            listing,
+            "START_SELL",
+            uint(1_000_000),
+            uint(0),
+            assets=[market.nft],
+            applications=[market.nft_app],
+        ),
+    )
+    market.ledger.account(market.bob)["assets"][market.nft] = [0, False]
+    market.step(
+        "purchase_nft",
+        market.pay(market.bob, nft_app_address, 1_000_000),
+        market.call(
+            market.bob,
+            listing,
+            "PURCHASE_NFT",
+            accounts=[market.seller, market.seller, market.admin_address],
+            assets=[market.nft],
+            applications=[market.nft_app],
+        ),
+    )
+    return market.steps
+
+
+CART_SIZE = 5
+# * A full group: two bulk_sell calls of 7 NFT apps (with the admin app, the 8
+# * references a call can hold) after their 14 transfers
+DROP_SIZE = 14
+BULK_SELL_SIZE = 7
+
+
+def _nfts(market, count):
+    """
+    - returns [(NFT, nft_app)] of the market's NFT and count - 1 new ones
+    """
+    return [(market.nft, market.nft_app)] + [market.mint() for _ in range(count - 1)]
+
+
+def _cart_market():
+    """
+    - returns (market, list module, [(NFT, nft_app)]) with CART_SIZE NFTs listed
+      for ALGO by the seller
+    """
+    market = Marketplace()
+    listing = market.deploy("list", "LIST_MODULE")
+    # * The cart's payment passes through the list module's account
+    market.step(
+        "fund list", market.pay(market.seller, application_address(listing), 100_000)
+    )
+    items = _nfts(market, CART_SIZE)
+    for nft, nft_app in items:
+        market.ledger.account(market.bob)["assets"][nft] = [0, False]
+        market.step(
+            "start_sell",
+            market.axfer(market.seller, application_address(nft_app), nft, 1),
+            market.call(
+                market.seller,
+                listing,
+                "START_SELL",
+                uint(1_000_000),
+                uint(0),
+                assets=[nft],
+                applications=[nft_app],
+            ),
+        )
+    market.steps = []
+    return market, listing, items
+
+
+def purchases_scenario():
+    """
+    - CART_SIZE ALGO listings bought one purchase_nft group at a time
+    """
+    market, listing, items = _cart_market()
+    for nft, nft_app in items:
+        market.step(
+            "purchase_nft",
+            market.pay(market.bob, application_address(nft_app), 1_000_000),
+            market.call(
+                market.bob,
+                listing,
+                "PURCHASE_NFT",
+                accounts=[market.seller, market.seller, market.admin_address],
+                assets=[nft],
+                applications=[nft_app],
+            ),
+        )
+    return market.steps
+
+
+def cart_scenario():
+    """
+    - the same CART_SIZE listings bought by one checkout group and one payment
+    """
+    market, listing, items = _cart_market()
+    market.step(
+        "checkout %d listings" % len(items),
+        market.pay(market.bob, application_address(listing), 1_000_000 * len(items)),
+        *[
+            market.call(
+                market.bob,
+                listing,
+                "CHECKOUT",
+                uint(1_000_000),
+                accounts=[market.seller, market.seller, market.admin_address],
+                assets=[nft],
+                applications=[nft_app],
+            )
+            for nft, nft_app in items
+        ],
+    )
+    return market.steps
+
+
+def _drop_market():
+    """
+    - returns (market, list module, [(NFT, nft_app)]) with DROP_SIZE NFTs held
+      by the seller
+    """
+    market = Marketplace()
+    listing = market.deploy("list", "LIST_MODULE")
+    items = _nfts(market, DROP_SIZE)
+    market.steps = []
+    return market, listing, items
+
+
+def listings_scenario():
+    """
+    - DROP_SIZE NFTs listed for ALGO one start_sell group at a time
+    """
+    market, listing, items = _drop_market()
+    for nft, nft_app in items:
+        market.step(
+            "start_sell",
+            market.axfer(market.seller, application_address(nft_app), nft, 1),
+            market.call(
+                market.seller,
+                listing,
+                "START_SELL",
+                uint(1_000_000),
+                uint(0),
+                assets=[nft],
+                applications=[nft_app],
+            ),
+        )
+    return market.steps
+
+
+def bulk_scenario():
+    """
+    - the same DROP_SIZE NFTs listed by one group of their transfers followed by
+      bulk_sell calls
+    """
+    market, listing, items = _drop_market()
+    transfers = [
+        market.axfer(market.seller, application_address(nft_app), nft, 1)
+        for nft, nft_app in items
+    ]
+    calls = []
+    for first in range(0, len(items), BULK_SELL_SIZE):
+        batch = items[first : first + BULK_SELL_SIZE]
+        calls.append(
+            market.call(
+                market.seller,
+                listing,
+                "BULK_SELL",
+                uint(0),
+                uint(first),
+                len(batch).to_bytes(2, "big") + uint(1_000_000) * len(batch),
+                applications=[nft_app for _, nft_app in batch],
+            )
+        )
+    market.step("bulk_sell %d NFTs" % len(items), *transfers, *calls)
+    return market.steps
+
+
+def _mint_nfts(market, count, budget_calls=0):
+    return market.step(
+        "mint_nfts %d" % count,
+        market.pay(
+            market.seller, application_address(market.creator_app), 100_000 * count
+        ),
+        market.call(
+            market.seller,
+            market.creator_app,
+            "MINT_NFTS",
+            byte_array(b"Drop"),
+            byte_array(b"DROP"),
+            uint(count),
+            byte_array(bytes(32 * count)),
+        ),
+        *[
+            market.call(
+                market.seller,
+                market.creator_app,
+                "UTILITY",
+                *[uint(0)] * 4,
+                accounts=[market.seller],
+            )
+            for _ in range(budget_calls)
+        ],
+    )
+
+
+def mint_scenario():
+    """
+    - MINT_BATCH NFTs minted through creator_app one call at a time
+    """
+    market = Marketplace()
+    for _ in range(MINT_BATCH):
+        _mint_nfts(market, 1)
+    return market.steps
+
+
+def batch_mint_scenario():
+    """
+    - the same MINT_BATCH NFTs minted by a single call, with a utility call
+      pooling its opcode budget
+    """
+    market = Marketplace()
+    _mint_nfts(market, MINT_BATCH, budget_calls=1)
+    return market.steps
+
+
+SCENARIOS = {
+    "auction": auction_scenario,
+    "sale": sale_scenario,
+    "purchases": purchases_scenario,
+    "cart": cart_scenario,
+    "listings": listings_scenario,
+    "bulk": bulk_scenario,
+    "mint": mint_scenario,
+    "batch_mint": batch_mint_scenario,
+}
+
+
+def bench(names=None):
+    """
+    - returns {scenario: [Step]} of the named scenarios (default: all)
+    """
+    return {name: SCENARIOS[name]() for name in names or SCENARIOS}
+
+
+# * Run in an export of the baseline's revision: prints what the bench needs of
+# * its programs and ARC-4 calls
+_RECORD = """
+import base64, json
+from compiler.registry import registry
+from compiler.targets import TARGETS
+from contracts import abi, checkers, constants
+
+reference_args = getattr(abi, "reference_args", lambda method: [])
+print(json.dumps({
+    "programs": {
+        name: [
+            base64.b64encode(registry.get(program).bytecode).decode()
+            for program in (TARGETS[name].approval, TARGETS[name].clear)
+        ]
+        for name in %r
+    },
+    "selectors": {method: abi.selector(method).hex() for method in abi._METHODS},
+    "reference_args": {
+        method: [arg.hex() for arg in reference_args(method)]
+        for method in abi._METHODS
+        if reference_args(method)
+    },
+    "keys": {
+        name: abi.constant_bytes(getattr(constants, name)).hex() for name in %r
+    },
+    "create_asset_app_amount": checkers.create_asset_app_checker.txns[0]["amount"],
+}))
+"""
+
+
+def record_baseline(name, root):
+    """
+    - builds the programs of the baseline's revision of the git repository at
+      root and stores them in BASELINES_DIR; returns the file written
+    """
+    revision, predates, _ = BASELINES[name]
+    archive = subprocess.run(
+        ["git", "archive", revision], cwd=root, capture_output=True, check=True
+    ).stdout
+    with tempfile.TemporaryDirectory() as export:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(export)
+        recorded = subprocess.run(
+            [sys.executable, "-c", _RECORD % (BASELINE_PROGRAMS, BASELINE_KEYS)],
+            cwd=export,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    baseline = {"revision": revision, "predates": predates, **json.loads(recorded)}
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    path = os.path.join(BASELINES_DIR, "%s.json" % name)
+    with open(path, "w") as target:
+        target.write(json.dumps(baseline, indent=2) + "\n")
+    return path
+
+
+def load_baseline(name):
+    with open(os.path.join(BASELINES_DIR, "%s.json" % name)) as source:
+        return json.load(source)
+
+
+def compare(name):
+    """
+    - returns ({program: (approval bytes before, after)},
+      {scenario: [(Step before, Step after)]}) of the named baseline
+    """
+    baseline = load_baseline(name)
+    sizes = {
+        program: (
+            len(base64.b64decode(baseline["programs"][program][0])),
+            len(registry.get(TARGETS[program].approval).bytecode),
+        )
+        for program in BASELINE_PROGRAMS
+    }
+    steps = {
+        scenario: [
+            (before, after)
+            for before, after in zip(
+                SCENARIOS[scenario](baseline), SCENARIOS[scenario]()
+            )
+            if after.label in labels
+        ]
+        for scenario, labels in BASELINES[name][2].items()
+    }
+    return sizes, steps
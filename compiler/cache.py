@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from importlib import metadata
+
+from compiler.graph import ROOT, DependencyGraph
+
+# * Bump when the layout of a cache entry changes
+CACHE_FORMAT = 2
+
+CACHE_DIR = os.path.join(ROOT, ".build_cache")
+
+# * Build tooling whose output ends up inside the programs or their manifests
+TOOLCHAIN = [
+    os.path.join(ROOT, "compiler", "assembler.py"),
+    os.path.join(ROOT, "compiler", "manifest.py"),
+]
+
+graph = DependencyGraph()
+
+
+def target_key(name, symbols=None):
+    """
+    - returns the content hash of everything the target's programs are generated from:
+      the definitions reachable from its generators (following embedding edges), the
+      assembler that produces embedded bytecode, the pyteal and TEAL versions and
+      the dispatch profile
+    """
+    if symbols is None:
+        symbols = graph.target_symbols(name)
+
+    digest = hashlib.sha256()
+    digest.update(b"format:%d\n" % CACHE_FORMAT)
+    digest.update(b"pyteal:%s\n" % metadata.version("pyteal").encode())
+    # * Overrides contracts.teal.DEFAULT_TEAL_VERSION, which the symbols cover
+    digest.update(b"teal:%s\n" % os.environ.get("TEAL_VERSION", "").encode())
+    # * Reorders the dispatch of contracts.router.route
+    profile = os.environ.get("DISPATCH_PROFILE")
+    if profile:
+        with open(profile, "rb") as source:
+            digest.update(b"profile:%s\n" % hashlib.sha256(source.read()).digest())
+
+    for node in sorted(symbols):
+        digest.update(("%s:%s\n" % (node, symbols[node])).encode())
+
+    for path in TOOLCHAIN:
+        with open(path, "rb") as source:
+            digest.update(os.path.relpath(path, ROOT).encode() + b"\n")
+            digest.update(hashlib.sha256(source.read()).digest())
+
+    return digest.hexdigest()
+
+
+def output_hashes(paths):
+    """
+    - returns {file name: content hash} of the files, None for a missing one
+    """
+    hashes = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as source:
+                hashes[os.path.basename(path)] = hashlib.sha256(
+                    source.read()
+                ).hexdigest()
+        except OSError:
+            hashes[os.path.basename(path)] = None
+    return hashes
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # * Write then rename so an interrupted build never leaves a torn file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as output:
+        json.dump(data, output)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return default
+
+
+class BuildCache:
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        return _read_json(self._entry(key), None)
+
+    def put(self, key, programs):
+        _write_json(self._entry(key), programs)
+
+
+class BuildState:
+    """
+    Records, per output directory, the key and dependency closure each target was
+    last written with and the hashes of the files it wrote, so unchanged targets
+    whose outputs are still the ones it wrote can be skipped outright.
+    """
+
+    def __init__(self, output_dir, directory=CACHE_DIR):
+        self.path = os.path.join(directory, "state.json")
+        self.output_dir = os.path.abspath(output_dir)
+
+    def _load(self):
+        return _read_json(self.path, {})
+
+    def get(self, name):
+        return self._load().get(self.output_dir, {}).get(name)
+
+    def record(self, name, key, symbols, outputs):
+        state = self._load()
+        state.setdefault(self.output_dir, {})[name] = {
+            "key": key,
+            "symbols": symbols,
+            "outputs": outputs,
+        }
+        _write_json(self.path, state)
@@ -0,0 +1,94 @@
+import http.client
+import json
+import queue
+from urllib.parse import urlsplit
+
+
+class AlgodError(Exception):
+    def __init__(self, status, message):
+        super().__init__("algod returned %d: %s" % (status, message))
+        self.status = status
+
+
+# * Raised when a pooled connection was closed by the server while idle
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class AlgodClient:
+    """
+    algod client for the compile and dryrun endpoints over a pool of keep-alive
+    connections; safe to share between threads.
+    """
+
+    def __init__(self, address, token="", pool_size=4, timeout=30):
+        url = urlsplit(address)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue(pool_size)
+
+    def _connection(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self.connection_class(self.netloc, timeout=self.timeout), False
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        headers = {"Content-Type": content_type}
+        if self.token:
+            headers["X-Algo-API-Token"] = self.token
+
+        connection, reused = self._connection()
+        try:
+            try:
+                connection.request(method, self.prefix + path, body, headers)
+                response = connection.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection.request(method, self.prefix + path, body, headers)
+                response = connection.getresponse()
+            data = response.read()
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+
+        payload = json.loads(data) if data else {}
+        if response.status != 200:
+            raise AlgodError(response.status, payload.get("message", data))
+        return payload
+
+    def compile(self, teal):
+        return self.request(
+            "POST", "/v2/teal/compile", teal.encode(), "application/x-binary"
+        )
+
+    def dryrun(self, request):
+        return self.request("POST", "/v2/teal/dryrun", json.dumps(request).encode())
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,264 @@
+"""
+Static opcode cost of the generated programs.
+
+A subroutine costs the sum of its opcodes plus the cost of every subroutine it
+calls, with both arms of each branch counted, so the figures are an upper bound
+on what one call of the method can spend. They are meant for comparing builds
+(AVM versions, optimizer settings), not for predicting a transaction's budget.
+"""
+
+import heapq
+import os
+import re
+
+from compiler.assembler import parse
+from compiler.registry import ProgramRegistry
+from compiler.targets import TARGETS
+
+# * Opcodes not listed cost 1
+OPCODE_COSTS = {
+    "sha256": 35,
+    "keccak256": 130,
+    "sha512_256": 45,
+    "sha3_256": 130,
+    "ed25519verify": 1900,
+    "ed25519verify_bare": 1900,
+    "ecdsa_verify": 1700,
+    "ecdsa_pk_decompress": 650,
+    "ecdsa_pk_recover": 2000,
+    "vrf_verify": 5700,
+    "sqrt": 4,
+    "expw": 10,
+    "bsqrt": 40,
+    "b+": 10,
+    "b-": 10,
+    "b*": 20,
+    "b/": 20,
+    "b%": 20,
+    "b|": 6,
+    "b&": 6,
+    "b^": 6,
+    "b~": 4,
+}
+
+MAIN = "main"
+
+# * Control flow of the main program
+JUMPS = {"b"}
+BRANCHES = {"bz", "bnz", "switch", "match"}
+EXITS = {"return", "err", "retsub"}
+
+
+def _method_name(label):
+    # * PyTeal labels subroutines <name>_<index>, the index shifts between builds
+    return re.sub(r"_\d+$", "", label)
+
+
+def subroutine_costs(teal):
+    """
+    - returns ({subroutine label: static cost}, labels called from the main program)
+    """
+    _, instructions, labels = parse(teal)
+    entries = {
+        instruction.args[0]
+        for instruction in instructions
+        if instruction.op == "callsub"
+    }
+    starts = sorted((labels[label], label) for label in entries)
+    bodies = {MAIN: (0, starts[0][0] if starts else len(instructions))}
+    for index, (start, label) in enumerate(starts):
+        end = starts[index + 1][0] if index + 1 < len(starts) else len(instructions)
+        bodies[label] = (start, end)
+
+    costs = {}
+
+    def cost(label):
+        if label not in costs:
+            start, end = bodies[label]
+            total = 0
+            for instruction in instructions[start:end]:
+                total += OPCODE_COSTS.get(instruction.op, 1)
+                if instruction.op == "callsub":
+                    total += cost(instruction.args[0])
+            costs[label] = total
+        return costs[label]
+
+    for label in bodies:
+        cost(label)
+
+    start, end = bodies[MAIN]
+    called = [
+        instruction.args[0]
+        for instruction in instructions[start:end]
+        if instruction.op == "callsub"
+    ]
+    return costs, called
+
+
+def method_costs(teal):
+    """
+    - returns {method: static cost} for the subroutines the main program dispatches to
+    """
+    costs, called = subroutine_costs(teal)
+    return {_method_name(label): costs[label] for label in called}
+
+
+def _distances(teal):
+    """
+    - returns (instructions, labels, {instruction index: cost of the cheapest path
+      from the program entry to it})
+    """
+    _, instructions, labels = parse(teal)
+    costs, _ = subroutine_costs(teal)
+
+    def step(index):
+        instruction = instructions[index]
+        cost = OPCODE_COSTS.get(instruction.op, 1)
+        if instruction.op == "callsub":
+            cost += costs[instruction.args[0]]
+        if instruction.op in JUMPS:
+            return cost, [labels[instruction.args[0]]]
+        if instruction.op in BRANCHES:
+            return cost, [labels[label] for label in instruction.args] + [index + 1]
+        if instruction.op in EXITS:
+            return cost, []
+        return cost, [index + 1]
+
+    # * Dijkstra over the main program, subroutine calls are single weighted steps
+    distance = {0: 0}
+    queue = [(0, 0)]
+    while queue:
+        current, index = heapq.heappop(queue)
+        if current > distance[index] or index >= len(instructions):
+            continue
+        cost, successors = step(index)
+        for successor in successors:
+            if current + cost < distance.get(successor, current + cost + 1):
+                distance[successor] = current + cost
+                heapq.heappush(queue, (current + cost, successor))
+
+    return instructions, labels, distance
+
+
+def _is_method_call(instructions, index):
+    # * A method is a call the main program returns the result of
+    return (
+        instructions[index].op == "callsub"
+        and index + 1 < len(instructions)
+        and instructions[index + 1].op == "return"
+    )
+
+
+def dispatch_costs(teal):
+    """
+    - returns {method: cost of the cheapest path from the program entry to the
+      call of the method}, so the on-completion checks, the method selection and
+      the group-shape checks, but not the method itself
+    """
+    instructions, _, distance = _distances(teal)
+
+    dispatch = {}
+    for index, instruction in enumerate(instructions):
+        if _is_method_call(instructions, index) and index in distance:
+            method = _method_name(instruction.args[0])
+            dispatch[method] = min(
+                distance[index], dispatch.get(method, distance[index])
+            )
+    return dispatch
+
+
+def _byte_constant(instruction, bytec):
+    if instruction.op.startswith("bytec_"):
+        return bytec[int(instruction.op[-1])]
+    if instruction.op == "bytec":
+        return bytec[int(instruction.args[0])]
+    if instruction.op == "pushbytes":
+        return instruction.args[0]
+    return None
+
+
+def _selector_branches(instructions):
+    """
+    - returns [(selector hex, label)] of the branches the router selects methods
+      with: one match, or a chain of compare-and-branch
+    """
+    bytec = []
+    for instruction in instructions:
+        if instruction.op == "bytecblock":
+            bytec = instruction.args
+
+    branches = []
+    for index, instruction in enumerate(instructions):
+        if index < 3:
+            continue
+        if instruction.op == "match" and instructions[index - 2].op == "pushbytess":
+            branches += zip(instructions[index - 2].args, instruction.args)
+        elif (
+            instruction.op == "bnz"
+            and instructions[index - 1].op == "=="
+            and instructions[index - 3].op == "txna"
+            and instructions[index - 3].args == ["ApplicationArgs", "0"]
+        ):
+            selector = _byte_constant(instructions[index - 2], bytec)
+            if selector is not None:
+                branches.append((selector, instruction.args[0]))
+    return branches
+
+
+def selector_costs(teal):
+    """
+    - returns {selector hex: dispatch cost} of every ARC-4 method the program
+      routes, measured as dispatch_costs does
+    """
+    instructions, labels, distance = _distances(teal)
+
+    dispatch = {}
+    for selector, label in _selector_branches(instructions):
+        # * The branch ends in the return of its handler, a call or a constant
+        index = labels[label]
+        while instructions[index].op != "return":
+            index += 1
+        if instructions[index - 1].op == "callsub":
+            index -= 1
+        dispatch[selector] = distance[index]
+    return dispatch
+
+
+def average_dispatch_cost(costs, profile):
+    """
+    - costs: {selector hex: dispatch cost}, profile: {selector hex: call count}
+    - returns the dispatch cost averaged over the profiled calls the program
+      routes, None when it routes none of them
+    """
+    calls = {
+        selector: count for selector, count in profile.items() if selector in costs
+    }
+    total = sum(calls.values())
+    if not total:
+        return None
+    return sum(costs[selector] * count for selector, count in calls.items()) / total
+
+
+def cost_report(names, versions, measure=method_costs):
+    """
+    - returns {target: {method: {version: static cost}}}, building the approval
+      programs once per AVM version; measure maps a program to {method: cost}
+    """
+    report = {name: {} for name in names}
+    previous = os.environ.get("TEAL_VERSION")
+
+    try:
+        for version in versions:
+            os.environ["TEAL_VERSION"] = str(version)
+            registry = ProgramRegistry()
+            for name in names:
+                teal = registry.get(TARGETS[name].approval).teal
+                for method, cost in measure(teal).items():
+                    report[name].setdefault(method, {})[version] = cost
+    finally:
+        if previous is None:
+            os.environ.pop("TEAL_VERSION", None)
+        else:
+            os.environ["TEAL_VERSION"] = previous
+
+    return report
@@ -0,0 +1,257 @@
+"""
+Symbol-level dependency graph of the contract sources.
+
+Every top-level definition of a contracts module (subroutine, checker, constant)
+is a node, hashed from its AST so comments and formatting never invalidate
+anything. A target depends on the definitions reachable from its approval/clear
+generators, plus those of the contract whose bytecode it embeds.
+"""
+
+import ast
+import hashlib
+import os
+
+from compiler.targets import TARGETS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def module_path(module_name):
+    return os.path.join(ROOT, *module_name.split(".")) + ".py"
+
+
+def is_local_module(module_name):
+    return module_name.split(".")[0] == "contracts" and os.path.exists(
+        module_path(module_name)
+    )
+
+
+def _referenced_names(node):
+    """
+    - returns the names the node reads; an attribute of a name, or a getattr of
+      one with a literal attribute, is kept as "name.attribute" instead, so a
+      module used through its name resolves to the one definition read
+    """
+    names = set()
+    qualified = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name):
+            names.add("%s.%s" % (child.value.id, child.attr))
+            qualified.add(child.value)
+        elif (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Name)
+            and child.func.id == "getattr"
+            and len(child.args) >= 2
+            and isinstance(child.args[0], ast.Name)
+            and isinstance(child.args[1], ast.Constant)
+            and isinstance(child.args[1].value, str)
+        ):
+            names.add("%s.%s" % (child.args[0].id, child.args[1].value))
+            qualified.add(child.args[0])
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and child not in qualified:
+            names.add(child.id)
+    return names
+
+
+def _digest(node):
+    return hashlib.sha256(ast.dump(node).encode()).hexdigest()
+
+
+class Module:
+    def __init__(self, name):
+        self.name = name
+        self.path = module_path(name)
+        # * symbol -> (digest, names referenced by its definition)
+        self.symbols = {}
+        # * local name -> (module, symbol)
+        self.imports = {}
+        # * local name -> module, for a contracts module imported as a whole
+        self.module_imports = {}
+        self.star_imports = []
+
+        with open(self.path) as source:
+            tree = ast.parse(source.read(), self.path)
+
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname and is_local_module(alias.name):
+                        self.module_imports[alias.asname] = alias.name
+            elif isinstance(node, ast.ImportFrom):
+                if not node.module:
+                    continue
+                for alias in node.names:
+                    # * from contracts import constants
+                    submodule = "%s.%s" % (node.module, alias.name)
+                    if is_local_module(submodule):
+                        self.module_imports[alias.asname or alias.name] = submodule
+                    elif not is_local_module(node.module):
+                        continue
+                    elif alias.name == "*":
+                        self.star_imports.append(node.module)
+                    else:
+                        self.imports[alias.asname or alias.name] = (
+                            node.module,
+                            alias.name,
+                        )
+            elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                self.symbols[node.name] = (_digest(node), _referenced_names(node))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        self.symbols[target.id] = (
+                            _digest(node),
+                            _referenced_names(node.value),
+                        )
+
+        # * A module __getattr__ serving names out of a literal table: every entry
+        # * is its own definition, so editing one does not invalidate the others
+        if "__getattr__" in self.symbols:
+            for node in tree.body:
+                if isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict):
+                    self._add_table(node.value)
+                    self._detach_table(node.targets)
+
+    def _add_table(self, table):
+        for key, value in zip(table.keys, table.values):
+            if isinstance(key, ast.Constant) and isinstance(key.value, str):
+                # * Entries are built by __getattr__, so they depend on its code too
+                self.symbols[key.value] = (
+                    _digest(ast.Tuple([key, value], ast.Load())),
+                    _referenced_names(value) | {"__getattr__"},
+                )
+
+    def _detach_table(self, targets):
+        digest, references = self.symbols["__getattr__"]
+        names = {target.id for target in targets if isinstance(target, ast.Name)}
+        self.symbols["__getattr__"] = (digest, references - names)
+
+
+class DependencyGraph:
+    def __init__(self):
+        self._modules = {}
+
+    def module(self, name):
+        if name not in self._modules:
+            self._modules[name] = Module(name)
+        return self._modules[name]
+
+    def invalidate(self, module_names):
+        """
+        - drops the parsed modules so they are re-read on next use
+        """
+        for name in module_names:
+            self._modules.pop(name, None)
+
+    def dependencies(self, module_name):
+        """
+        - returns the contracts modules module_name imports from
+        """
+        module = self.module(module_name)
+        return (
+            {name for name, _ in module.imports.values()}
+            | set(module.module_imports.values())
+            | set(module.star_imports)
+        )
+
+    def resolve(self, module_name, symbol, seen=None):
+        """
+        - returns the (module, symbol) that defines a name used in module_name, or
+          None when it does not come from the contracts package (e.g. pyteal)
+        """
+        seen = seen or set()
+        if module_name in seen:
+            return None
+        seen.add(module_name)
+
+        module = self.module(module_name)
+        if symbol in module.symbols:
+            return module_name, symbol
+        if symbol in module.imports:
+            return self.resolve(*module.imports[symbol], seen=seen)
+        for star_module in module.star_imports:
+            found = self.resolve(star_module, symbol, seen)
+            if found is not None:
+                return found
+        return None
+
+    def references(self, module_name, name):
+        """
+        - returns the (module, symbol) definitions a name read in module_name
+          stands for: an attribute of an imported contracts module resolves in
+          that module, and a module read as a whole (e.g. getattr with a computed
+          name) stands for all of its definitions
+        """
+        base, _, attribute = name.partition(".")
+        imported = self.module(module_name).module_imports.get(base)
+        if imported is None:
+            found = self.resolve(module_name, base)
+            return [] if found is None else [found]
+        if attribute:
+            found = self.resolve(imported, attribute)
+            return [] if found is None else [found]
+        return [(imported, symbol) for symbol in self.module(imported).symbols]
+
+    def closure(self, roots):
+        """
+        - returns {"module.symbol": digest} for every definition reachable from roots
+        """
+        digests = {}
+        pending = list(roots)
+
+        while pending:
+            module_name, symbol = pending.pop()
+            node = "%s.%s" % (module_name, symbol)
+            if node in digests:
+                continue
+
+            digest, references = self.module(module_name).symbols[symbol]
+            digests[node] = digest
+            for name in references:
+                pending.extend(self.references(module_name, name))
+
+        return digests
+
+    def target_roots(self, name):
+        """
+        - returns the generator definitions of the target (and of the schema it is
+          deployed with and the ABI methods it exports), following embedding edges
+        """
+        target = TARGETS[name]
+        roots = [(target.module, target.approval), (target.module, target.clear)]
+        for reference in (target.schema, target.interface):
+            if reference is not None:
+                roots.append(tuple(reference.rsplit(".", 1)))
+        if target.embeds is not None:
+            roots.extend(self.target_roots(target.embeds))
+        return roots
+
+    def target_symbols(self, name):
+        return self.closure(self.target_roots(name))
+
+    def targets_using(self, module_name):
+        """
+        - returns the targets with at least one definition from module_name
+        """
+        prefix = module_name + "."
+        return [
+            name
+            for name in TARGETS
+            if any(node.startswith(prefix) for node in self.target_symbols(name))
+        ]
+
+
+def changed_symbols(previous, current):
+    """
+    - returns the sorted symbols added, removed or modified between two closures
+    """
+    return sorted(
+        node
+        for node in set(previous) | set(current)
+        if previous.get(node) != current.get(node)
+    )
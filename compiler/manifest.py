@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import importlib
+from collections import Counter
+
+from compiler.assembler import parse
+from compiler.targets import TARGETS
+
+# * Bytes allowed per page for approval + clear programs combined
+PAGE_SIZE = 2048
+MAX_EXTRA_PAGES = 3
+
+
+def program_address(program_hash):
+    """
+    - returns the Algorand address of a program from its hex hash
+    """
+    public_key = bytes.fromhex(program_hash)
+    checksum = hashlib.new("sha512_256", public_key).digest()[-4:]
+    return base64.b32encode(public_key + checksum).decode().rstrip("=")
+
+
+def opcode_histogram(teal):
+    _, instructions, _ = parse(teal)
+    counts = Counter(instruction.op for instruction in instructions)
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def _resolve(reference):
+    module_name, symbol = reference.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), symbol)
+
+
+def deployment_schema(name):
+    schema = TARGETS[name].schema
+    if schema is None:
+        return None
+    return dict(_resolve(schema))
+
+
+def build_interface(name):
+    """
+    - returns the ARC-4 contract description of a target, or None if it routes no
+      ABI methods
+    """
+    interface = TARGETS[name].interface
+    if interface is None:
+        return None
+    # * Imported here: pyteal is only loaded once a target is built
+    abi = importlib.import_module("contracts.abi")
+    return abi.contract(name, _resolve(interface))
+
+
+def state_keys(teal):
+    """
+    - returns {code: name} of the state keys the program pushes
+    """
+    # * Imported here: pyteal is only loaded once a target is built
+    constants = importlib.import_module("contracts.constants")
+    names = {code.encode(): name for code, name in constants.state_keys().items()}
+    _, instructions, _ = parse(teal)
+
+    used = {}
+    for instruction in instructions:
+        if instruction.op not in ("bytecblock", "pushbytes", "pushbytess"):
+            continue
+        for arg in instruction.args:
+            value = bytes.fromhex(arg[2:]) if arg.startswith("0x") else b""
+            # * A code passed as a byte[] argument carries its uint16 length
+            if int.from_bytes(value[:2], "big") == len(value) - 2:
+                value = value[2:]
+            if value in names:
+                used[value.decode()] = names[value]
+    return dict(sorted(used.items()))
+
+
+def page_usage(total_size, extra_program_pages):
+    pages_needed = max(1, -(-total_size // PAGE_SIZE))
+    usage = {
+        "page_size": PAGE_SIZE,
+        "total_size": total_size,
+        "pages": [
+            min(PAGE_SIZE, total_size - offset)
+            for offset in range(0, max(total_size, 1), PAGE_SIZE)
+        ],
+        "pages_needed": pages_needed,
+        "extra_program_pages_needed": pages_needed - 1,
+        "extra_program_pages": extra_program_pages,
+    }
+    if pages_needed - 1 > MAX_EXTRA_PAGES:
+        usage["status"] = "too large"
+    elif extra_program_pages is None:
+        usage["status"] = "deployed externally"
+    elif extra_program_pages < pages_needed - 1:
+        usage["status"] = "under-allocated"
+    elif extra_program_pages > pages_needed - 1:
+        usage["status"] = "over-allocated"
+    else:
+        usage["status"] = "ok"
+    return usage
+
+
+def build_manifest(name, registry):
+    """
+    - returns the manifest of a target whose programs are in the registry
+    """
+    target = TARGETS[name]
+    approval = registry.get(target.approval)
+    clear = registry.get(target.clear)
+    version, _, _ = parse(approval.teal)
+    schema = deployment_schema(name)
+
+    programs = {}
+    for program in (approval, clear):
+        programs[program.name] = {
+            "size": len(program.bytecode),
+            "hash": program.hash,
+            "address": program_address(program.hash),
+            "opcodes": opcode_histogram(program.teal),
+        }
+
+    return {
+        "target": name,
+        "teal_version": version,
+        "programs": programs,
+        "pages": page_usage(
+            len(approval.bytecode) + len(clear.bytecode),
+            schema["extra_program_pages"] if schema else None,
+        ),
+        "schema": schema,
+        "state_keys": state_keys(approval.teal),
+    }
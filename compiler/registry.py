@@ -0,0 +1,83 @@
+import base64
+import hashlib
+import importlib
+from collections import namedtuple
+
+from compiler.assembler import assemble
+from compiler.targets import TARGETS
+
+
+def program_hash(bytecode):
+    return hashlib.new("sha512_256", b"Program" + bytecode).hexdigest()
+
+
+class Program(namedtuple("Program", ["name", "teal", "bytecode", "hash"])):
+    @property
+    def base64(self):
+        return base64.b64encode(self.bytecode).decode()
+
+
+def _generators():
+    generators = {}
+    for name, target in TARGETS.items():
+        generators[target.approval] = (name, target.approval)
+        generators[target.clear] = (name, target.clear)
+    return generators
+
+
+class ProgramRegistry:
+    """
+    Lowers each program generator to TEAL at most once per process and keeps its
+    TEAL, bytecode and hash for every contract that depends on it.
+    """
+
+    def __init__(self):
+        self._programs = {}
+        self._generators = _generators()
+
+    def __contains__(self, name):
+        return name in self._programs
+
+    def add(self, name, teal):
+        """
+        - registers TEAL built elsewhere (build cache, another process)
+        """
+        if name not in self._programs:
+            bytecode = assemble(teal)
+            self._programs[name] = Program(name, teal, bytecode, program_hash(bytecode))
+        return self._programs[name]
+
+    def get(self, name):
+        if name not in self._programs:
+            self.add(name, self._generate(name))
+        return self._programs[name]
+
+    def target(self, name):
+        """
+        - returns the target's programs as a {program name: TEAL} mapping
+        """
+        target = TARGETS[name]
+        return {
+            target.approval: self.get(target.approval).teal,
+            target.clear: self.get(target.clear).teal,
+        }
+
+    def clear(self):
+        self._programs.clear()
+
+    def _generate(self, name):
+        target_name, generator_name = self._generators[name]
+        target = TARGETS[target_name]
+        generator = getattr(importlib.import_module(target.module), generator_name)
+
+        if name != target.approval or target.embeds is None:
+            return generator()
+
+        # * The embedded contract is deployed by this one, so it needs its bytecode
+        embedded = TARGETS[target.embeds]
+        return generator(
+            self.get(embedded.approval).base64, self.get(embedded.clear).base64
+        )
+
+
+registry = ProgramRegistry()
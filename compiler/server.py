@@ -0,0 +1,433 @@
+"""
+Local stand-in for the algod endpoints the build and the benchmarks use.
+
+    POST /v2/teal/compile   TEAL source -> {"hash": address, "result": base64}
+                            (standard TEAL, int/byte/addr/method pseudo-ops included)
+    POST /v2/teal/dryrun    DryrunRequest (JSON or msgpack) -> DryrunResponse
+
+Programs are assembled by compiler.assembler and evaluated by compiler.avm, so
+nothing leaves the machine. Connections are kept alive between requests.
+
+    python -m compiler.server --port 4001
+"""
+
+import argparse
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from compiler.assembler import AssembleError, assemble
+from compiler.avm import (
+    APP_CALL_BUDGET,
+    AvmError,
+    Ledger,
+    disassembly,
+    evaluate_group,
+    new_txn,
+    txn_type,
+)
+from compiler.manifest import program_address
+from compiler.registry import program_hash
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 4001
+
+# * msgpack transaction key -> TEAL field name
+TXN_KEYS = {
+    "snd": "Sender",
+    "fee": "Fee",
+    "fv": "FirstValid",
+    "lv": "LastValid",
+    "note": "Note",
+    "lx": "Lease",
+    "rcv": "Receiver",
+    "amt": "Amount",
+    "close": "CloseRemainderTo",
+    "type": "Type",
+    "xaid": "XferAsset",
+    "aamt": "AssetAmount",
+    "asnd": "AssetSender",
+    "arcv": "AssetReceiver",
+    "aclose": "AssetCloseTo",
+    "apid": "ApplicationID",
+    "apan": "OnCompletion",
+    "apaa": "ApplicationArgs",
+    "apat": "Accounts",
+    "apfa": "Applications",
+    "apas": "Assets",
+    "apap": "ApprovalProgram",
+    "apsu": "ClearStateProgram",
+    "apep": "ExtraProgramPages",
+    "rekey": "RekeyTo",
+    "caid": "ConfigAsset",
+    "faid": "FreezeAsset",
+    "fadd": "FreezeAssetAccount",
+    "afrz": "FreezeAssetFrozen",
+}
+
+SCHEMA_KEYS = {
+    "apgs": ("GlobalNumUint", "GlobalNumByteSlice"),
+    "apls": ("LocalNumUint", "LocalNumByteSlice"),
+}
+
+# * msgpack asset params key -> acfg field
+ASSET_PARAM_KEYS = {
+    "t": "ConfigAssetTotal",
+    "dc": "ConfigAssetDecimals",
+    "df": "ConfigAssetDefaultFrozen",
+    "un": "ConfigAssetUnitName",
+    "an": "ConfigAssetName",
+    "au": "ConfigAssetURL",
+    "am": "ConfigAssetMetadataHash",
+    "m": "ConfigAssetManager",
+    "r": "ConfigAssetReserve",
+    "f": "ConfigAssetFreeze",
+    "c": "ConfigAssetClawback",
+}
+
+# * REST asset params key -> asset_params field
+REST_ASSET_PARAMS = {
+    "total": "AssetTotal",
+    "decimals": "AssetDecimals",
+    "default-frozen": "AssetDefaultFrozen",
+    "unit-name": "AssetUnitName",
+    "name": "AssetName",
+    "url": "AssetURL",
+    "metadata-hash": "AssetMetadataHash",
+    "manager": "AssetManager",
+    "reserve": "AssetReserve",
+    "freeze": "AssetFreeze",
+    "clawback": "AssetClawback",
+}
+
+ADDRESS_KEYS = {"snd", "rcv", "close", "asnd", "arcv", "aclose", "rekey", "fadd"}
+ADDRESS_KEYS |= {"m", "r", "f", "c"}
+
+
+class RequestError(Exception):
+    pass
+
+
+# * Request decoding
+
+
+def decode_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return base64.b64decode(value)
+    raise RequestError("expected bytes, got %r" % (value,))
+
+
+def decode_address(value):
+    if isinstance(value, bytes) and len(value) == 32:
+        return value
+    if isinstance(value, str) and len(value) == 58:
+        return base64.b32decode(value + "======")[:32]
+    address = decode_bytes(value)
+    if len(address) != 32:
+        raise RequestError("invalid address %r" % (value,))
+    return address
+
+
+def encode_address(address):
+    return program_address(address.hex())
+
+
+def _decode_key(key, value):
+    if key in ADDRESS_KEYS:
+        return decode_address(value)
+    if isinstance(value, (bytes, str)):
+        return decode_bytes(value) if key != "type" else _type(value)
+    return value
+
+
+def _type(value):
+    return value.encode() if isinstance(value, str) else value
+
+
+def decode_txn(signed):
+    encoded = signed.get("txn", signed)
+    txn = {}
+    for key, value in encoded.items():
+        if key in ("apaa", "apat"):
+            decode = decode_address if key == "apat" else decode_bytes
+            txn[TXN_KEYS[key]] = [decode(item) for item in value]
+        elif key in ("apfa", "apas"):
+            txn[TXN_KEYS[key]] = list(value)
+        elif key in SCHEMA_KEYS:
+            uints, byte_slices = SCHEMA_KEYS[key]
+            txn[uints] = value.get("nui", 0)
+            txn[byte_slices] = value.get("nbs", 0)
+        elif key == "apar":
+            for param, field in ASSET_PARAM_KEYS.items():
+                if param in value:
+                    txn[field] = _decode_key(param, value[param])
+        elif key in TXN_KEYS:
+            txn[TXN_KEYS[key]] = _decode_key(key, value)
+    return new_txn(**txn)
+
+
+def _decode_state(key_values):
+    state = {}
+    for item in key_values or []:
+        value = item["value"]
+        if value.get("type") == 1:
+            state[decode_bytes(item["key"])] = decode_bytes(value.get("bytes", ""))
+        else:
+            state[decode_bytes(item["key"])] = value.get("uint", 0)
+    return state
+
+
+def build_ledger(request):
+    ledger = Ledger(
+        round=request.get("round") or 1,
+        timestamp=request.get("latest-timestamp") or 0,
+    )
+
+    for app in request.get("apps") or []:
+        params = app.get("params", {})
+        global_schema = params.get("global-state-schema") or {}
+        local_schema = params.get("local-state-schema") or {}
+        ledger.create_app(
+            decode_address(params["creator"]) if "creator" in params else bytes(32),
+            decode_bytes(params.get("approval-program", b"")),
+            decode_bytes(params.get("clear-state-program", b"")),
+            app_id=app["id"],
+            global_state=_decode_state(params.get("global-state")),
+            schema={
+                "global_num_uint": global_schema.get("num-uint", 0),
+                "global_num_byte_slice": global_schema.get("num-byte-slice", 0),
+                "local_num_uint": local_schema.get("num-uint", 0),
+                "local_num_byte_slice": local_schema.get("num-byte-slice", 0),
+                "extra_program_pages": params.get("extra-program-pages", 0),
+            },
+        )
+
+    for account in request.get("accounts") or []:
+        address = decode_address(account["address"])
+        for created in account.get("created-assets") or []:
+            params = {
+                field: created["params"][key]
+                for key, field in REST_ASSET_PARAMS.items()
+                if key in created["params"]
+            }
+            for field in (
+                "AssetManager",
+                "AssetReserve",
+                "AssetFreeze",
+                "AssetClawback",
+            ):
+                if field in params:
+                    params[field] = decode_address(params[field])
+            for field in ("AssetUnitName", "AssetName", "AssetURL"):
+                if isinstance(params.get(field), str):
+                    params[field] = params[field].encode()
+            if "AssetMetadataHash" in params:
+                params["AssetMetadataHash"] = decode_bytes(params["AssetMetadataHash"])
+            ledger.create_asset(address, params, asset_id=created["index"])
+
+    for account in request.get("accounts") or []:
+        state = ledger.account(decode_address(account["address"]))
+        state["balance"] = account.get("amount", 0)
+        for holding in account.get("assets") or []:
+            state["assets"][holding["asset-id"]] = [
+                holding.get("amount", 0),
+                holding.get("is-frozen", False),
+            ]
+        for local in account.get("apps-local-state") or []:
+            state["local"][local["id"]] = _decode_state(local.get("key-value"))
+
+    return ledger
+
+
+def _apply_sources(request, txns, ledger):
+    for source in request.get("sources") or []:
+        try:
+            program = assemble(source["source"])
+        except AssembleError as error:
+            raise RequestError(str(error))
+        field = source.get("field-name")
+        app_id = source.get("app-index", 0)
+        if field not in ("approv", "clearp"):
+            raise RequestError("unsupported source field %r" % field)
+        key = "approval" if field == "approv" else "clear"
+        if app_id in ledger.apps:
+            ledger.apps[app_id][key] = program
+        else:
+            txn = txns[source.get("txn-index", 0)]
+            txn["ApprovalProgram" if field == "approv" else "ClearStateProgram"] = (
+                program
+            )
+
+
+# * Response encoding
+
+
+def _teal_value(value):
+    if isinstance(value, bytes):
+        return {"type": 1, "bytes": base64.b64encode(value).decode(), "uint": 0}
+    return {"type": 2, "bytes": "", "uint": value}
+
+
+def _eval_delta(delta):
+    encoded = []
+    for key, value in delta.items():
+        entry = {"key": base64.b64encode(key).decode()}
+        if value is None:
+            entry["value"] = {"action": 3}
+        elif isinstance(value, bytes):
+            entry["value"] = {"action": 1, "bytes": base64.b64encode(value).decode()}
+        else:
+            entry["value"] = {"action": 2, "uint": value}
+        encoded.append(entry)
+    return encoded
+
+
+def dryrun_response(request):
+    txns = [decode_txn(signed) for signed in request.get("txns") or []]
+    ledger = build_ledger(request)
+    _apply_sources(request, txns, ledger)
+
+    results = evaluate_group(ledger, txns, trace=True)
+    budget_added = APP_CALL_BUDGET * sum(1 for txn in txns if txn_type(txn) == 6)
+    response = {"error": "", "protocol-version": "future", "txns": []}
+
+    for result in results:
+        entry = {"disassembly": [], "logs": []}
+        if result is not None and result.program:
+            lines, pc_lines = disassembly(result.program)
+            message = "PASS" if result.passed else "REJECT"
+            entry.update(
+                {
+                    "disassembly": lines,
+                    "app-call-messages": ["ApprovalProgram", message]
+                    + ([result.error] if result.error else []),
+                    "app-call-trace": [
+                        {
+                            "pc": pc,
+                            "line": pc_lines.get(pc, 0),
+                            "stack": [_teal_value(value) for value in stack],
+                        }
+                        for pc, stack in result.trace
+                    ],
+                    "global-delta": _eval_delta(result.global_delta),
+                    "local-deltas": [
+                        {
+                            "address": encode_address(address),
+                            "delta": _eval_delta(delta),
+                        }
+                        for address, delta in result.local_deltas.items()
+                    ],
+                    "logs": [base64.b64encode(log).decode() for log in result.logs],
+                    "cost": result.cost,
+                    "budget-added": budget_added,
+                    "budget-consumed": result.cost,
+                }
+            )
+        elif result is not None:
+            entry["app-call-messages"] = ["REJECT", result.error]
+        response["txns"].append(entry)
+
+    return response
+
+
+def compile_response(teal):
+    """
+    - returns algod's compile response for the TEAL source; the constants of the
+      int/byte/addr/method pseudo-ops are laid out as algod does
+    """
+    bytecode = assemble(teal)
+    return {
+        "hash": program_address(program_hash(bytecode)),
+        "result": base64.b64encode(bytecode).decode(),
+    }
+
+
+# * HTTP
+
+
+class AlgodHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # * Headers and body go out as separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+    server_version = "niftgen-algod/1"
+    token = ""
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/health":
+            self._send(200, {})
+        else:
+            self._send(404, {"message": "unknown route %s" % self.path})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        route = self.path.split("?")[0]
+
+        if self.token and self.headers.get("X-Algo-API-Token") != self.token:
+            self._send(401, {"message": "invalid API token"})
+            return
+
+        try:
+            if route == "/v2/teal/compile":
+                self._send(200, compile_response(body.decode()))
+            elif route == "/v2/teal/dryrun":
+                self._send(200, dryrun_response(self._decode(body)))
+            else:
+                self._send(404, {"message": "unknown route %s" % route})
+        except (AssembleError, AvmError, RequestError, KeyError, ValueError) as error:
+            self._send(400, {"message": str(error)})
+
+    def _decode(self, body):
+        if "msgpack" in (self.headers.get("Content-Type") or ""):
+            import msgpack
+
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        return json.loads(body or b"{}")
+
+    def _send(self, status, data):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, token="", background=False):
+    """
+    - starts the server; with background=True it runs on a daemon thread and
+      the server is returned (port=0 picks a free port, see server_address)
+    """
+    handler = type("Handler", (AlgodHandler,), {"token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return "http://%s:%d" % (host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local algod compile/dryrun server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", default="", help="required X-Algo-API-Token")
+    args = parser.parse_args()
+
+    print("Serving algod compile/dryrun on http://%s:%d" % (args.host, args.port))
+    serve(args.host, args.port, args.token)
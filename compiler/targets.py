@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+# * schema: "module.NAME" of the dict holding the state schema the contract is
+# * deployed with, when it is deployed by another contract
+# * interface: "module.NAME" of the list of contracts.abi methods it routes
+Target = namedtuple(
+    "Target",
+    ["module", "approval", "clear", "embeds", "schema", "interface"],
+    defaults=[None, None],
+)
+
+# * Build order matters only for targets that embed another contract's bytecode
+TARGETS = {
+    "auction": Target(
+        "contracts.modules.auction",
+        "auction_approval",
+        "auction_clear",
+        None,
+        interface="contracts.modules.auction.AUCTION_METHODS",
+    ),
+    "list": Target(
+        "contracts.modules.list",
+        "list_approval",
+        "list_clear",
+        None,
+        interface="contracts.modules.list.LIST_METHODS",
+    ),
+    "nft_app": Target(
+        "contracts.modules.nft_app",
+        "nft_app_approval",
+        "nft_app_clear",
+        None,
+        "contracts.modules.creator_app.NFT_APP_SCHEMA",
+        interface="contracts.modules.nft_app.NFT_APP_METHODS",
+    ),
+    "admin": Target(
+        "contracts.admin",
+        "admin_approval",
+        "admin_clear",
+        None,
+        interface="contracts.admin.ADMIN_METHODS",
+    ),
+    "creator_app": Target(
+        "contracts.modules.creator_app",
+        "creator_app_approval",
+        "creator_app_clear",
+        "nft_app",
+        interface="contracts.modules.creator_app.CREATOR_APP_METHODS",
+    ),
+    "rewards_module": Target(
+        "contracts.modules.rewards_module",
+        "rewards_module_approval",
+        "rewards_module_clear",
+        None,
+        interface="contracts.modules.rewards_module.REWARDS_MODULE_METHODS",
+    ),
+    "subscription_app": Target(
+        "contracts.modules.subscription_app",
+        "subscription_app_approval",
+        "subscription_app_clear",
+        None,
+        "contracts.modules.subscription_module.SUBSCRIPTION_APP_SCHEMA",
+        interface="contracts.modules.subscription_app.SUBSCRIPTION_APP_METHODS",
+    ),
+    "subscription_module": Target(
+        "contracts.modules.subscription_module",
+        "subscription_module_approval",
+        "subscription_module_clear",
+        "subscription_app",
+        interface="contracts.modules.subscription_module.SUBSCRIPTION_MODULE_METHODS",
+    ),
+    "creator_pool": Target(
+        "contracts.creator_pool.creator_pool",
+        "creator_pool_approval",
+        "creator_pool_clear",
+        None,
+        interface="contracts.creator_pool.creator_pool.CREATOR_POOL_METHODS",
+    ),
+    # * Only deployed as an update, while an app's state keys are migrated
+    "migration": Target(
+        "contracts.migration",
+        "migration_approval",
+        "migration_clear",
+        None,
+        interface="contracts.migration.MIGRATION_METHODS",
+    ),
+}
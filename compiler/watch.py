@@ -0,0 +1,97 @@
+"""
+Polling watcher for the contract sources.
+
+The build process stays alive between edits, so pyteal and every untouched
+contracts module remain imported; only the edited modules and the modules
+importing them are reloaded before the incremental build runs again.
+"""
+
+import importlib
+import os
+import sys
+import time
+
+from compiler.graph import ROOT, is_local_module
+
+CONTRACTS_DIR = os.path.join(ROOT, "contracts")
+
+
+def source_mtimes(directory=CONTRACTS_DIR):
+    mtimes = {}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            if file_name.endswith(".py"):
+                path = os.path.join(root, file_name)
+                mtimes[path] = os.stat(path).st_mtime_ns
+    return mtimes
+
+
+def module_name(path):
+    return os.path.splitext(os.path.relpath(path, ROOT))[0].replace(os.sep, ".")
+
+
+def changed_modules(previous, current):
+    """
+    - returns the sorted modules whose source was added, removed or modified
+    """
+    return sorted(
+        module_name(path)
+        for path in set(previous) | set(current)
+        if previous.get(path) != current.get(path)
+    )
+
+
+def reload_modules(graph, module_names):
+    """
+    - re-imports the changed modules and every loaded module importing them,
+      dependencies first, so `from ... import` bindings see the new definitions
+    - returns the reloaded module names in reload order
+    """
+    graph.invalidate(module_names)
+    loaded = [name for name in sys.modules if is_local_module(name)]
+
+    stale = {name for name in module_names if name in loaded}
+    while True:
+        importers = {
+            name
+            for name in loaded
+            if name not in stale and graph.dependencies(name) & stale
+        }
+        if not importers:
+            break
+        stale |= importers
+
+    order = []
+
+    def visit(name):
+        if name in order or name not in stale:
+            return
+        for dependency in sorted(graph.dependencies(name)):
+            visit(dependency)
+        order.append(name)
+
+    for name in sorted(stale):
+        visit(name)
+
+    for name in order:
+        module = sys.modules[name]
+        # * Drop stale definitions, including values cached by a module __getattr__
+        for attribute in [key for key in vars(module) if not key.startswith("__")]:
+            delattr(module, attribute)
+        importlib.reload(module)
+    return order
+
+
+def watch(rebuild, interval=0.5, directory=CONTRACTS_DIR):
+    """
+    - polls the sources every interval seconds and calls rebuild(changed modules)
+      after each edit, until interrupted
+    """
+    mtimes = source_mtimes(directory)
+    while True:
+        time.sleep(interval)
+        current = source_mtimes(directory)
+        changed = changed_modules(mtimes, current)
+        mtimes = current
+        if changed:
+            rebuild(changed)
@@ -0,0 +1,501 @@
+"""
+ARC-4 methods of the contracts.
+
+A method is called with its 4-byte selector as the first application arg, followed
+by its arguments: a uint64 as 8 big-endian bytes (what Itob produces and Btoi
+reads), a byte[] prefixed with its uint16 length and a uint64[] as its uint16
+count followed by its items. A transaction argument (txn, pay, axfer) takes no
+application arg: it is the transaction before the call in the group. An account,
+asset or application argument is a uint8 application arg, the index of the
+reference in the matching array of the call. The arrays may also hold references
+a method needs available without reading them, or a variable number of; the
+desc of each method in the contract description lists those by position, after
+the reference arguments, and module calls also reference the admin app, whose
+state every module reads. A method returning a value logs it last, after the
+ARC-4 return prefix.
+
+Importing a method name gives the pyteal expression of its selector.
+"""
+
+import ast
+import hashlib
+from collections import Counter
+
+from pyteal import (
+    Assert,
+    Btoi,
+    Bytes,
+    Concat,
+    Eq,
+    ExtractUint16,
+    Int,
+    Itob,
+    Len,
+    Log,
+    Minus,
+    Op,
+    Seq,
+    Suffix,
+    Txn,
+)
+
+# * method name -> (ARC-4 name, [(argument, ARC-4 type)]): the transactions it
+# * takes first, then its values, then the references it reads
+_METHODS = {
+    "ASSET_OPTIN": ("asset_optin", [("payment", "pay"), ("asset", "asset")]),
+    "CHANGE_ADMIN_ID": ("change_admin_id", [("new_admin", "application")]),
+    "MIGRATE_STATE": (
+        "migrate_state",
+        [("legacy_key", "byte[]"), ("key", "byte[]")],
+    ),
+    "PACK_RECORDS": ("pack_records", []),
+    # * Read by the subscribe or renew_subscription call before it in the group
+    "UTILITY": (
+        "utility",
+        [
+            ("payment_type", "uint64"),
+            ("amount", "uint64"),
+            ("expires_date", "uint64"),
+            ("subscription_type", "uint64"),
+            ("creator_pool", "account"),
+        ],
+    ),
+    # * admin
+    "CHANGE_OWNERSHIP": ("change_ownership", [("new_owner", "account")]),
+    "SET_LOCAL": (
+        "set_local",
+        [
+            ("module_name", "byte[]"),
+            ("local_name", "byte[]"),
+            ("local_value", "byte[]"),
+            ("local_int", "uint64"),
+            ("beneficiary", "account"),
+        ],
+    ),
+    "WITHDRAW_ALGOS": (
+        "withdraw_algos",
+        [("amount", "uint64"), ("beneficiary", "account")],
+    ),
+    "WITHDRAW_TOKENS": (
+        "withdraw_tokens",
+        [("amount", "uint64"), ("beneficiary", "account"), ("asset", "asset")],
+    ),
+    "SET_ROLE": ("set_role", [("role", "uint64"), ("account", "account")]),
+    "SET_VERIFIED_STATUS": (
+        "set_verified_status",
+        [("status", "uint64"), ("account", "account")],
+    ),
+    "ADD_MODULE": (
+        "add_module",
+        [("module_name", "byte[]"), ("module", "application")],
+    ),
+    "REMOVE_MODULE": ("remove_module", [("module_name", "byte[]")]),
+    "ASSETS_OPTIN": (
+        "assets_optin",
+        [("payment", "pay"), ("niftgen", "asset"), ("usdc", "asset")],
+    ),
+    # * auction
+    "CREATE_AUCTION": (
+        "create_auction",
+        [
+            ("transfer", "axfer"),
+            ("start_time", "uint64"),
+            ("end_time", "uint64"),
+            ("min_bid_increment", "uint64"),
+            ("payment_option", "uint64"),
+            ("start_price", "uint64"),
+            ("nft", "asset"),
+            ("nft_app", "application"),
+        ],
+    ),
+    # * previous_bidder is the highest bidder so far, the bidder before the first
+    # * bid
+    "ON_BID": (
+        "on_bid",
+        [
+            ("bid", "txn"),
+            ("previous_bidder", "account"),
+            ("nft_app", "application"),
+        ],
+    ),
+    "CLOSE_AUCTION": (
+        "close_auction",
+        [
+            ("nft_creator", "account"),
+            ("bidder_winner", "account"),
+            ("admin_address", "account"),
+            ("nft_owner", "account"),
+            ("nft", "asset"),
+            ("nft_app", "application"),
+        ],
+    ),
+    # * list
+    "START_SELL": (
+        "start_sell",
+        [
+            ("transfer", "axfer"),
+            ("price", "uint64"),
+            ("payment_option", "uint64"),
+            ("nft", "asset"),
+            ("nft_app", "application"),
+        ],
+    ),
+    "BULK_SELL": (
+        "bulk_sell",
+        [
+            ("payment_option", "uint64"),
+            ("first_transfer", "uint64"),
+            ("prices", "uint64[]"),
+        ],
+    ),
+    "PURCHASE_NFT": (
+        "purchase_nft",
+        [
+            ("payment", "txn"),
+            ("nft_owner", "account"),
+            ("nft_creator", "account"),
+            ("admin_address", "account"),
+            ("nft", "asset"),
+            ("nft_app", "application"),
+        ],
+    ),
+    # * price is the price the buyer expects the listing at
+    "CHECKOUT": (
+        "checkout",
+        [
+            ("price", "uint64"),
+            ("nft_owner", "account"),
+            ("nft_creator", "account"),
+            ("admin_address", "account"),
+            ("nft", "asset"),
+            ("nft_app", "application"),
+        ],
+    ),
+    "REVERT_NFT": (
+        "revert_nft",
+        [("nft", "asset"), ("nft_app", "application")],
+    ),
+    # * nft_app
+    "DEL_GLOBAL": (
+        "del_global",
+        [
+            ("module_name", "byte[]"),
+            ("global_name", "byte[]"),
+            ("admin", "application"),
+        ],
+    ),
+    "RESET_AUCTION": (
+        "reset_auction",
+        [
+            ("module_name", "byte[]"),
+            ("nft_owner", "account"),
+            ("admin", "application"),
+        ],
+    ),
+    # * bid_asset is 0 for a bid paid in ALGO
+    "BID": (
+        "bid",
+        [
+            ("module_name", "byte[]"),
+            ("bid_asset", "uint64"),
+            ("bid_amount", "uint64"),
+            ("bidder", "account"),
+            ("previous_bidder", "account"),
+            ("admin", "application"),
+        ],
+    ),
+    "PAY_ALGO": (
+        "pay_algo",
+        [
+            ("module_name", "byte[]"),
+            ("amount", "uint64"),
+            ("beneficiary", "account"),
+            ("admin", "application"),
+        ],
+    ),
+    "PAY_ASSET": (
+        "pay_asset",
+        [
+            ("module_name", "byte[]"),
+            ("amount", "uint64"),
+            ("beneficiary", "account"),
+            ("asset", "asset"),
+            ("admin", "application"),
+        ],
+    ),
+    "SET_LISTING": (
+        "set_listing",
+        [
+            ("module_name", "byte[]"),
+            ("price", "uint64"),
+            ("platform_fee", "uint64"),
+            ("payment_option", "uint64"),
+            ("admin", "application"),
+        ],
+    ),
+    "SET_AUCTION": (
+        "set_auction",
+        [
+            ("module_name", "byte[]"),
+            ("start_time", "uint64"),
+            ("end_time", "uint64"),
+            ("min_bid_increment", "uint64"),
+            ("payment_option", "uint64"),
+            ("start_price", "uint64"),
+            ("admin", "application"),
+        ],
+    ),
+    # * payment_asset is 0 for a sale paid in ALGO
+    "SETTLE": (
+        "settle",
+        [
+            ("module_name", "byte[]"),
+            ("payment_asset", "uint64"),
+            ("fee_to_platform", "uint64"),
+            ("royalty_fee", "uint64"),
+            ("seller_amount", "uint64"),
+            ("buyer", "account"),
+            ("nft_creator", "account"),
+            ("nft_owner", "account"),
+            ("admin_address", "account"),
+            ("admin", "application"),
+        ],
+    ),
+    "OPT_IN_ASSETS": (
+        "opt_in_assets",
+        [
+            ("payment", "pay"),
+            ("nft", "asset"),
+            ("usdc", "asset"),
+            ("admin", "application"),
+        ],
+    ),
+    # * creator_app
+    "CREATE_ASSET_APP": (
+        "create_asset_app",
+        [("payment", "pay"), ("royalty", "uint64"), ("nft", "asset")],
+    ),
+    # * metadata is empty or the 32-byte metadata hash of each NFT in turn
+    "MINT_NFTS": (
+        "mint_nfts",
+        [
+            ("payment", "pay"),
+            ("name", "byte[]"),
+            ("unit_name", "byte[]"),
+            ("count", "uint64"),
+            ("metadata", "byte[]"),
+        ],
+    ),
+    # * rewards_module
+    "EMERGENCY_WITHDRAW": (
+        "emergency_withdraw",
+        [("beneficiary", "account"), ("asset", "asset")],
+    ),
+    "INCREASE_REWARDS": (
+        "increase_rewards",
+        [("amount", "uint64"), ("beneficiary", "account")],
+    ),
+    "DECREASE_REWARDS": (
+        "decrease_rewards",
+        [("amount", "uint64"), ("beneficiary", "account")],
+    ),
+    "GET_PENDING_REWARDS": (
+        "get_pending_rewards",
+        [("payment", "pay"), ("amount", "uint64"), ("asset", "asset")],
+    ),
+    # * subscription_app and subscription_module
+    "SUBSCRIBE": ("subscribe", [("payment", "txn")]),
+    "RENEW_SUBSCRIPTION": ("renew_subscription", [("payment", "txn")]),
+    "DEPLOY_SUBSCRIPTION_APP": ("deploy_subscription_app", [("payment", "pay")]),
+    # * creator_pool
+    "WITHDRAW_ALGO": ("withdraw_algo", []),
+    "WITHDRAW_ASSET": ("withdraw_asset", [("asset", "asset")]),
+    "CALCULATE_ALGO_REWARDS": ("calculate_algo_rewards", []),
+    "CALCULATE_ASSET_REWARDS": ("calculate_asset_rewards", [("asset", "asset")]),
+    "INCREASE_ALGO_POOL": ("increase_algo_pool", [("payment", "pay")]),
+    "INCREASE_ASSET_POOL_REWARDS": (
+        "increase_asset_pool_rewards",
+        [("transfer", "axfer")],
+    ),
+}
+
+# * ARC-4 return type of the methods that return a value, logged by log_return
+_RETURNS = {"CREATE_ASSET_APP": "uint64", "MINT_NFTS": "uint64[]"}
+
+__all__ = list(_METHODS)
+
+# * Length prefix of an Itob result encoded as byte[]
+_UINT64_PREFIX = "0008"
+# * Prefix of the log carrying a method's return value
+_RETURN_PREFIX = "151f7c75"
+# * ARC-4 types of the transactions a method takes
+_TRANSACTION_TYPES = ("txn", "pay", "axfer")
+# * ARC-4 reference type -> (array it indexes, index of the first reference
+# * passed): accounts[0] is the sender and applications[0] the called app
+_REFERENCE_TYPES = {
+    "account": ("accounts", 1),
+    "asset": ("assets", 0),
+    "application": ("applications", 1),
+}
+
+
+def _app_args(method):
+    """
+    - returns [(argument, ARC-4 type)] of the method's arguments passed as
+      application args, after its selector
+    """
+    return [arg for arg in _METHODS[method][1] if arg[1] not in _TRANSACTION_TYPES]
+
+
+def signature(method):
+    name, args = _METHODS[method]
+    return "%s(%s)%s" % (
+        name,
+        ",".join(arg_type for _, arg_type in args),
+        _RETURNS.get(method, "void"),
+    )
+
+
+def selector(method):
+    return hashlib.new("sha512_256", signature(method).encode()).digest()[:4]
+
+
+def selectors():
+    """
+    - returns {ARC-4 name: selector} of every method
+    """
+    return {name: selector(method) for method, (name, _) in _METHODS.items()}
+
+
+def reference(method, name, txn=Txn):
+    """
+    - returns the account, asset or application of the method's reference
+      argument name, which indexes the matching array of txn
+    """
+    for position, (arg, arg_type) in enumerate(_app_args(method)):
+        if arg == name and arg_type in _REFERENCE_TYPES:
+            array = getattr(txn, _REFERENCE_TYPES[arg_type][0])
+            return array[Btoi(txn.application_args[position + 1])]
+    raise KeyError("%s has no reference argument %s" % (method, name))
+
+
+def reference_args(method):
+    """
+    - returns the uint8 application arg of each reference argument of the method,
+      for a call whose arrays start with them, in order
+    """
+    passed = Counter()
+    args = []
+    for _, arg_type in _app_args(method):
+        if arg_type in _REFERENCE_TYPES:
+            array, first = _REFERENCE_TYPES[arg_type]
+            args.append(bytes([first + passed[array]]))
+            passed[array] += 1
+    return args
+
+
+def log_return(value):
+    """
+    - logs the encoded value as the return value of the method
+    """
+    return Log(Concat(Bytes("base16", _RETURN_PREFIX), value))
+
+
+def returned(logs):
+    """
+    - returns the value a method call returned, read from the logs of the call;
+      None when its last log is not a return value
+    """
+    prefix = bytes.fromhex(_RETURN_PREFIX)
+    if not logs or not logs[-1].startswith(prefix):
+        return None
+    return logs[-1][len(prefix) :]
+
+
+def decode_bytes(arg):
+    """
+    - returns the value of a byte[] argument, failing unless its length prefix
+      counts the bytes that follow
+    """
+    return Seq(
+        Assert(Eq(ExtractUint16(arg, Int(0)), Minus(Len(arg), Int(2)))),
+        Suffix(arg, Int(2)),
+    )
+
+
+def constant_bytes(value):
+    """
+    - returns the bytes of a pyteal Bytes constant, None for any other expression
+    """
+    if not isinstance(value, Bytes):
+        return None
+    if value.base == "base16":
+        return bytes.fromhex(value.byte_str)
+    if value.base == "utf8":
+        return ast.literal_eval(value.byte_str).encode()
+    return None
+
+
+def encode_bytes(value):
+    """
+    - returns value encoded as a byte[] argument; constants are encoded at compile
+      time and Itob results only gain their fixed prefix, anything else is
+      evaluated twice
+    """
+    constant = constant_bytes(value)
+    if constant is not None:
+        return Bytes(len(constant).to_bytes(2, "big") + constant)
+    if getattr(value, "op", None) == Op.itob:
+        return Concat(Bytes("base16", _UINT64_PREFIX), value)
+    return Concat(Suffix(Itob(Len(value)), Int(6)), value)
+
+
+def describe_references(method, references):
+    """
+    - returns the desc of a method whose call also holds references, {"accounts"
+      | "assets" | "applications": [name of each position]}, None when it holds
+      none; they follow the method's reference arguments in each array
+    """
+    passed = Counter(
+        _REFERENCE_TYPES[arg_type][0]
+        for _, arg_type in _METHODS[method][1]
+        if arg_type in _REFERENCE_TYPES
+    )
+    described = []
+    for array, first in _REFERENCE_TYPES.values():
+        described += [
+            "%s[%d] %s" % (array, first + passed[array] + position, reference)
+            for position, reference in enumerate(references.get(array, []))
+        ]
+    return "References " + "; ".join(described) if described else None
+
+
+def contract(name, methods):
+    """
+    - returns the ARC-4 contract description of the methods, {name of this module:
+      references the call holds besides its arguments}
+    """
+    described = []
+    for method, references in methods.items():
+        description = {
+            "name": _METHODS[method][0],
+            "args": [
+                {"name": arg, "type": arg_type} for arg, arg_type in _METHODS[method][1]
+            ],
+            "returns": {"type": _RETURNS.get(method, "void")},
+        }
+        desc = describe_references(method, references)
+        if desc is not None:
+            description["desc"] = desc
+        described.append(description)
+    return {"name": name, "methods": described, "networks": {}}
+
+
+def __getattr__(name):
+    if name not in _METHODS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    expression = Bytes(selector(name))
+    # * Cache it so every contract shares one expression per selector
+    globals()[name] = expression
+    return expression
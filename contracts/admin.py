@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
     set_verified_status_checker,
     assets_optin_checker,
@@ -8,9 +10,9 @@ from contracts.checkers import (
     withdraw_algos_checker,
     withdraw_tokens_checker,
     set_local_checker,
+    change_ownership_checker,
 )
 from contracts.constants import (
-    NFT_ID,
     PLATFORM_FEE,
     FIRST_ADMIN,
     ROLE,
@@ -24,6 +26,19 @@ from contracts.constants import (
     NIFTGEN_ASSET,
     OWNER,
 )
+from contracts.abi import (
+    ASSETS_OPTIN,
+    CHANGE_OWNERSHIP,
+    SET_LOCAL,
+    WITHDRAW_ALGOS,
+    WITHDRAW_TOKENS,
+    SET_ROLE,
+    SET_VERIFIED_STATUS,
+    ADD_MODULE,
+    REMOVE_MODULE,
+    decode_bytes,
+    reference,
+)
 from contracts.utility import (
     inner_asset_transaction,
     inner_payment_transaction,
@@ -58,7 +73,7 @@ def deploy_contract():
 @Subroutine(TealType.uint64)
 def change_ownership():
     _sender = Txn.sender()
-    _new_owner = Txn.accounts[1]
+    _new_owner = reference("CHANGE_OWNERSHIP", "new_owner")
 
     owner = App.globalGet(OWNER)
 
@@ -73,8 +88,8 @@ def change_ownership():
 @Subroutine(TealType.uint64)
 def assets_optin():
     _sender = Txn.sender()
-    _niftgen_asset = Txn.assets[0]
-    _usdc_asset = Txn.assets[1]
+    _niftgen_asset = reference("ASSETS_OPTIN", "niftgen")
+    _usdc_asset = reference("ASSETS_OPTIN", "usdc")
     sender_role = App.localGet(_sender, ROLE)
 
     niftgen_asset_id = App.globalGet(NIFTGEN_ASSET)
@@ -140,7 +155,7 @@ def optin_admin():
 @Subroutine(TealType.uint64)
 def set_role():
     _sender = Txn.sender()
-    _account_to_set = Txn.accounts[1]
+    _account_to_set = reference("SET_ROLE", "account")
     _role = Btoi(Txn.application_args[1])
 
     return Seq(
@@ -157,8 +172,8 @@ def set_role():
 @Subroutine(TealType.uint64)
 def add_module():
     _sender = Txn.sender()
-    _module_name = Txn.application_args[1]
-    _module_id = Txn.applications[1]
+    _module_name = decode_bytes(Txn.application_args[1])
+    _module_id = reference("ADD_MODULE", "module")
 
     role = App.localGet(_sender, ROLE)
 
@@ -173,7 +188,7 @@ def add_module():
 def remove_module():
     _sender = Txn.sender()
     role = App.localGet(_sender, ROLE)
-    _module_name = Txn.application_args[1]
+    _module_name = decode_bytes(Txn.application_args[1])
     module = App.globalGet(_module_name)
 
     return Seq(
@@ -186,7 +201,7 @@ def remove_module():
 @Subroutine(TealType.uint64)
 def withdraw_algos():
     _sender = Txn.sender()
-    _beneficiary = Txn.accounts[1]
+    _beneficiary = reference("WITHDRAW_ALGOS", "beneficiary")
     _amount = Btoi(Txn.application_args[1])
 
     is_owner = App.globalGet(OWNER)
@@ -201,9 +216,9 @@ def withdraw_algos():
 @Subroutine(TealType.uint64)
 def withdraw_tokens():
     _sender = Txn.sender()
-    _beneficiary = Txn.accounts[1]
+    _beneficiary = reference("WITHDRAW_TOKENS", "beneficiary")
     _amount = Btoi(Txn.application_args[1])
-    _asset_id = Txn.assets[0]
+    _asset_id = reference("WITHDRAW_TOKENS", "asset")
 
     is_owner = App.globalGet(OWNER)
 
@@ -223,7 +238,7 @@ def update_app():
 @Subroutine(TealType.uint64)
 def set_verified_status():
     _sender = Txn.sender()
-    _account_to_set = Txn.accounts[1]
+    _account_to_set = reference("SET_VERIFIED_STATUS", "account")
     _new_status = Btoi(Txn.application_args[1])
 
     verified_creators = App.globalGet(VERIFIED_CREATORS)
@@ -246,10 +261,10 @@ def set_verified_status():
 @Subroutine(TealType.uint64)
 def set_local():
     _sender_id = Global.caller_app_id()
-    _beneficiary = Txn.accounts[1]
-    _module_name = Txn.application_args[1]
-    _local_name = Txn.application_args[2]
-    _local_value = Txn.application_args[3]
+    _beneficiary = reference("SET_LOCAL", "beneficiary")
+    _module_name = decode_bytes(Txn.application_args[1])
+    _local_name = decode_bytes(Txn.application_args[2])
+    _local_value = decode_bytes(Txn.application_args[3])
     _local_int = Btoi(Txn.application_args[4])
 
     module_id = App.globalGet(_module_name)
@@ -269,40 +284,34 @@ def set_local():
     )
 
 
+# * ARC-4 methods routed by admin_approval with the references their calls hold
+# * besides the arguments, exported to admin_contract.json
+ADMIN_METHODS = {
+    "CHANGE_OWNERSHIP": {},
+    "SET_LOCAL": {},
+    "WITHDRAW_ALGOS": {},
+    "WITHDRAW_TOKENS": {},
+    "SET_ROLE": {},
+    "SET_VERIFIED_STATUS": {},
+    "ADD_MODULE": {},
+    "REMOVE_MODULE": {},
+    "ASSETS_OPTIN": {},
+}
+
+
 def admin_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * GROUP SIZE = 1
-        [
-            set_local_checker(),
-            Return(change_ownership()),
-        ],
-        [
-            set_local_checker(),
-            Return(set_local()),
-        ],
-        [withdraw_algos_checker(), Return(withdraw_algos())],
-        [withdraw_tokens_checker(), Return(withdraw_tokens())],
-        [
-            set_role_checker(),
-            Return(set_role()),
-        ],
-        [
-            set_verified_status_checker(),
-            Return(set_verified_status()),
-        ],
-        [
-            add_module_checker(),
-            Return(add_module()),
-        ],
-        [
-            remove_module_checker(),
-            Return(remove_module()),
-        ],
+        (CHANGE_OWNERSHIP, change_ownership_checker, change_ownership()),
+        (SET_LOCAL, set_local_checker, set_local()),
+        (WITHDRAW_ALGOS, withdraw_algos_checker, withdraw_algos()),
+        (WITHDRAW_TOKENS, withdraw_tokens_checker, withdraw_tokens()),
+        (SET_ROLE, set_role_checker, set_role()),
+        (SET_VERIFIED_STATUS, set_verified_status_checker, set_verified_status()),
+        (ADD_MODULE, add_module_checker, add_module()),
+        (REMOVE_MODULE, remove_module_checker, remove_module()),
         # * GROUP SIZE > 1
-        [
-            assets_optin_checker(),
-            Return(assets_optin()),
-        ],
+        (ASSETS_OPTIN, assets_optin_checker, assets_optin()),
     )
 
     program = Cond(
@@ -315,9 +324,9 @@ def admin_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def admin_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
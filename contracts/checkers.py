@@ -1,587 +1,281 @@
-from pyteal import *
-from contracts.constants import *
-
-
-@Subroutine(TealType.uint64)
-def set_role_checker():
-
-    return And(
-        Eq(Txn.application_args[0], SET_ROLE),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def set_verified_status_checker():
-
-    return And(
-        Eq(Txn.application_args[0], SET_VERIFIED_STATUS),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def add_module_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], ADD_MODULE),
-    )
-
-
-@Subroutine(TealType.uint64)
-def remove_module_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], REMOVE_MODULE),
-    )
-
-
-@Subroutine(TealType.uint64)
-def asset_optin_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(100_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Gtxn[1].application_args[0], ASSET_OPTIN),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def assets_optin_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(200_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Gtxn[1].application_args[0], ASSET_OPTIN),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def change_asset_manager_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], CHANGE_ASSET_MANAGER),
-    )
-
-
-@Subroutine(TealType.uint64)
-def clawback_asset_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], CLAWBACK_ASSET),
-    )
-
-
-@Subroutine(TealType.uint64)
-def freeze_asset_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], FREEZE_ASSET),
-    )
-
-
-@Subroutine(TealType.uint64)
-def create_asset_app_checker():
-
-    return And(
-        Eq(Txn.application_args[0], CREATE_ASSET_APP),
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(1_400_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def change_admin_id_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], CHANGE_ADMIN_ID),
-    )
-
-
-@Subroutine(TealType.uint64)
-def optin_admin_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(900_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], OPTIN_ADMIN),
-    )
-
-
-@Subroutine(TealType.uint64)
-def create_auction_checker():
-
-    return And(
-        Eq(Txn.application_args[0], START_AUCTION),
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
-        Eq(Gtxn[0].asset_amount(), Int(1)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def on_bid_auction_checker():
-
-    return And(
-        Eq(Txn.application_args[0], ON_BID),
-        Eq(Global.group_size(), Int(2)),
-        Or(
-            Eq(Gtxn[0].type_enum(), TxnType.Payment),
-            Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
-        ),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def close_auction_checker():
-
-    return And(
-        Eq(Txn.application_args[0], CLOSE_AUCTION),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def revert_nft_checker():
-
-    return And(
-        Eq(Txn.application_args[0], REVERT_NFT),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def start_sell_checker():
-
-    return And(
-        Eq(Txn.application_args[0], START_SELL),
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
-        Eq(Gtxn[0].asset_amount(), Int(1)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def purchase_nft_checker():
-
-    return And(
-        Eq(Txn.application_args[0], PURCHASE_NFT),
-        Eq(Global.group_size(), Int(2)),
-        Or(
-            Eq(Gtxn[0].type_enum(), TxnType.Payment),
-            Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
-        ),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def pay_algo_checker():
-
-    return And(
-        Eq(Txn.application_args[0], PAY_ALGO),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def pay_asset_checker():
-
-    return And(
-        Eq(Txn.application_args[0], PAY_ASSET),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def set_global_checker():
-
-    return And(
-        Eq(Txn.application_args[0], SET_GLOBAL),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def del_global_checker():
-
-    return And(
-        Eq(Txn.application_args[0], DEL_GLOBAL),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def opt_in_assets_checker():
-
-    return And(
-        Eq(Txn.application_args[0], OPT_IN_ASSETS),
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(200_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def optin_niftgen_asset_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(100_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Gtxn[1].application_args[0], ASSET_OPTIN),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def emergency_withdraw_checker():
-
-    return And(
-        Eq(Txn.application_args[0], EMERGENCY_WITHDRAW),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
+"""
+Group shape of every method, checked once the router has selected the method.
+
+Each checker is declared as (group size, position of the app call, {position:
+{field: expected}}) and expanded into the predicate the approval program
+asserts. A group size is a number, a (min, max) range or None for any size. Fields are those of Gtxn[position], plus "method" for its first
+application arg. An expected str is a bytes value, an int a uint64 value, and a
+tuple accepts any of its values. APP stands for the application's address and
+CALLER for the sender of the transaction at position 1. The rekey check shared by
+every method is asserted once by contracts.router.route.
+"""
 
-
-@Subroutine(TealType.uint64)
-def increase_rewards_checker():
-
-    return And(
-        Eq(Txn.application_args[0], INCREASE_REWARDS),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def decrease_rewards_checker():
-
-    return And(
-        Eq(Txn.application_args[0], DECREASE_REWARDS),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def get_pending_rewards_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.application_args[0], GET_PENDING_REWARDS),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def create_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        # Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        # Eq(Gtxn[0].amount(), Int(200_000)),
-        # Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        # Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Txn.type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.application_args[0], CREATE_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def subscribe_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(3)),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.application_args[0], SUBSCRIBE),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Gtxn[2].application_args[0], UTILITY),
-    )
-
-
-@Subroutine(TealType.uint64)
-def renew_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(3)),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.application_args[0], RENEW_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def cancel_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Txn.application_args[0], CANCEL_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.group_index(), Int(0)),
-        Eq(Gtxn[1].on_completion(), OnComplete.CloseOut),
-    )
-
-
-@Subroutine(TealType.uint64)
-def cancel_and_refund_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Txn.application_args[0], CANCEL_AND_REFUND_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.group_index(), Int(0)),
-        Eq(Gtxn[1].on_completion(), OnComplete.CloseOut),
-    )
-
-
-@Subroutine(TealType.uint64)
-def admin_cancel_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], ADMIN_CANCEL_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def admin_cancel_and_refund_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], ADMIN_CANCEL_AND_REFUND_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def freeze_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], FREEZE_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def unfreeze_subscription_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], UNFREEZE_SUBSCRIPTION),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def deploy_creator_app_checker():
-
-    return And(
-        Eq(Txn.application_args[0], DEPLOY_CREATOR_APP),
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(3_440_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Gtxn[1].type_enum(), TxnType.ApplicationCall),
-        Eq(Txn.group_index(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def withdraw_algos_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], WITHDRAW_ALGOS),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def withdraw_tokens_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], WITHDRAW_TOKENS),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def utility_checker():
-
-    return And(
-        Eq(Txn.application_args[0], UTILITY),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def deploy_subscription_app_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].amount(), Int(660_000)),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], DEPLOY_SUBSCRIPTION_APP),
-    )
-
-
-@Subroutine(TealType.uint64)
-def increase_asset_pool_rewards_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
-        Eq(Gtxn[0].asset_receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], INCREASE_ASSET_POOL_REWARDS),
-    )
-
-
-@Subroutine(TealType.uint64)
-def increase_pool_rewards_checker():
-
-    return And(
-        Eq(Global.group_size(), Int(2)),
-        Eq(Gtxn[0].type_enum(), TxnType.Payment),
-        Eq(Gtxn[0].receiver(), Global.current_application_address()),
-        Eq(Gtxn[0].sender(), Gtxn[1].sender()),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-        Eq(Txn.application_args[0], INCREASE_ALGO_POOL),
-    )
-
-
-@Subroutine(TealType.uint64)
-def calculate_asset_rewards_checkers():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], CALCULATE_ASSET_REWARDS),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def calculate_algo_rewards_checkers():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], CALCULATE_ALGO_REWARDS),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def withdraw_asset_reward_checkers():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], WITHDRAW_ASSET),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def withdraw_algo_reward_checkers():
-
-    return And(
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.application_args[0], WITHDRAW_ALGO),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def set_local_checker():
-
-    return And(
-        Eq(Txn.application_args[0], SET_LOCAL),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
-
-
-@Subroutine(TealType.uint64)
-def change_ownership_checker():
-
-    return And(
-        Eq(Txn.application_args[0], CHANGE_OWNERSHIP),
-        Eq(Global.group_size(), Int(1)),
-        Eq(Txn.rekey_to(), Global.zero_address()),
-    )
+from pyteal import *
+from contracts.abi import UTILITY
+
+APP = "<app address>"
+CALLER = "<caller>"
+
+PAY = TxnType.Payment
+AXFER = TxnType.AssetTransfer
+APPL = TxnType.ApplicationCall
+
+# * checker -> (group size, app call position, {position: {field: expected}})
+_SHAPES = {
+    # * GROUP SIZE = 1
+    "set_role_checker": (1, None, {}),
+    "set_verified_status_checker": (1, None, {}),
+    "add_module_checker": (1, None, {}),
+    "remove_module_checker": (1, None, {}),
+    "change_asset_manager_checker": (1, None, {}),
+    "clawback_asset_checker": (1, None, {}),
+    "freeze_asset_checker": (1, None, {}),
+    "change_admin_id_checker": (1, None, {}),
+    "close_auction_checker": (1, None, {}),
+    "revert_nft_checker": (1, None, {}),
+    "pay_algo_checker": (1, None, {}),
+    "pay_asset_checker": (1, None, {}),
+    "set_listing_checker": (1, None, {}),
+    "set_auction_checker": (1, None, {}),
+    "settle_checker": (1, None, {}),
+    "reset_auction_checker": (1, None, {}),
+    "bid_checker": (1, None, {}),
+    "del_global_checker": (1, None, {}),
+    "emergency_withdraw_checker": (1, None, {}),
+    "increase_rewards_checker": (1, None, {}),
+    "decrease_rewards_checker": (1, None, {}),
+    "create_subscription_checker": (1, None, {0: {"type_enum": APPL}}),
+    "admin_cancel_subscription_checker": (1, None, {}),
+    "admin_cancel_and_refund_subscription_checker": (1, None, {}),
+    "freeze_subscription_checker": (1, None, {}),
+    "unfreeze_subscription_checker": (1, None, {}),
+    "withdraw_algos_checker": (1, None, {}),
+    "withdraw_tokens_checker": (1, None, {}),
+    "calculate_asset_rewards_checkers": (1, None, {}),
+    "calculate_algo_rewards_checkers": (1, None, {}),
+    "withdraw_asset_reward_checkers": (1, None, {}),
+    "withdraw_algo_reward_checkers": (1, None, {}),
+    "set_local_checker": (1, None, {}),
+    "change_ownership_checker": (1, None, {}),
+    "migrate_state_checker": (1, None, {}),
+    "pack_records_checker": (1, None, {}),
+    # * GROUP SIZE > 1
+    "asset_optin_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": PAY, "receiver": APP, "amount": 100_000, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "assets_optin_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": PAY, "receiver": APP, "amount": 200_000, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    # * Covers the minimum balance of the NFT app (NFT_APP_SCHEMA) and its funding
+    "create_asset_app_checker": (
+        2,
+        1,
+        {
+            0: {
+                "type_enum": PAY,
+                "receiver": APP,
+                "amount": 922_000,
+                "sender": CALLER,
+            },
+            1: {"type_enum": APPL},
+        },
+    ),
+    # * Any later transactions are utility calls pooling their opcode budget
+    "mint_nfts_checker": (
+        None,
+        1,
+        {
+            0: {"type_enum": PAY, "receiver": APP, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "optin_admin_checker": (
+        2,
+        None,
+        {0: {"type_enum": PAY, "receiver": APP, "amount": 900_000, "sender": CALLER}},
+    ),
+    "create_auction_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": AXFER, "asset_amount": 1, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "on_bid_auction_checker": (
+        2,
+        1,
+        {0: {"type_enum": (PAY, AXFER), "sender": CALLER}, 1: {"type_enum": APPL}},
+    ),
+    "start_sell_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": AXFER, "asset_amount": 1, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "purchase_nft_checker": (
+        2,
+        1,
+        {0: {"type_enum": (PAY, AXFER), "sender": CALLER}, 1: {"type_enum": APPL}},
+    ),
+    "opt_in_assets_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": PAY, "receiver": APP, "amount": 200_000, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "optin_niftgen_asset_checker": (
+        2,
+        1,
+        {
+            0: {"type_enum": PAY, "receiver": APP, "amount": 100_000, "sender": CALLER},
+            1: {"type_enum": APPL},
+        },
+    ),
+    "get_pending_rewards_checker": (
+        2,
+        None,
+        {0: {"type_enum": PAY, "sender": CALLER}, 1: {"type_enum": APPL}},
+    ),
+    "subscribe_checker": (3, 1, {2: {"method": UTILITY}}),
+    "renew_checker": (3, 1, {}),
+    "cancel_subscription_checker": (
+        2,
+        0,
+        {1: {"on_completion": OnComplete.CloseOut}},
+    ),
+    "cancel_and_refund_subscription_checker": (
+        2,
+        0,
+        {1: {"on_completion": OnComplete.CloseOut}},
+    ),
+    "deploy_creator_app_checker": (
+        2,
+        1,
+        {
+            0: {
+                "type_enum": PAY,
+                "receiver": APP,
+                "amount": 3_440_000,
+                "sender": CALLER,
+            },
+            1: {"type_enum": APPL},
+        },
+    ),
+    "deploy_subscription_app_checker": (
+        2,
+        None,
+        {0: {"type_enum": PAY, "receiver": APP, "amount": 660_000, "sender": CALLER}},
+    ),
+    "increase_asset_pool_rewards_checker": (
+        2,
+        None,
+        {0: {"type_enum": AXFER, "asset_receiver": APP, "sender": CALLER}},
+    ),
+    "increase_pool_rewards_checker": (
+        2,
+        None,
+        {0: {"type_enum": PAY, "receiver": APP, "sender": CALLER}},
+    ),
+    # * GROUP SIZE 2 to 16: the payment, then one call per listing
+    "checkout_checker": (
+        None,
+        None,
+        {0: {"type_enum": (PAY, AXFER), "sender": CALLER}},
+    ),
+    # * GROUP SIZE 2 to 16: the NFT transfers, then the calls listing them
+    "bulk_sell_checker": ((2, 16), None, {}),
+    # * Any group
+    "utility_checker": (None, None, {}),
+}
+
+__all__ = list(_SHAPES)
+
+
+def _expected(value):
+    if isinstance(value, tuple):
+        return [_expected(option)[0] for option in value]
+    if isinstance(value, int):
+        return [Int(value)]
+    if not isinstance(value, str):
+        return [value]
+    if value == APP:
+        return [Global.current_application_address()]
+    if value == CALLER:
+        return [Gtxn[1].sender()]
+    return [Bytes(value)]
+
+
+def _field(position, field):
+    if field == "method":
+        return Gtxn[position].application_args[0]
+    return getattr(Gtxn[position], field)()
+
+
+class Checker:
+    """
+    - a group-shape predicate, expanded inline where it is checked; a program that
+      checks it from several places calls it as one subroutine instead (frame
+      pointers from AVM v8)
+    """
+
+    def __init__(self, name, size, index, txns):
+        self.name = name
+        self.size = size
+        self.index = index
+        self.txns = txns
+        self.subroutine = Subroutine(TealType.uint64, name)(self.predicate)
+
+    def terms(self):
+        terms = []
+        if isinstance(self.size, tuple):
+            terms.append(Ge(Global.group_size(), Int(self.size[0])))
+            terms.append(Le(Global.group_size(), Int(self.size[1])))
+        elif self.size is not None:
+            terms.append(Eq(Global.group_size(), Int(self.size)))
+        if self.index is not None:
+            terms.append(Eq(Txn.group_index(), Int(self.index)))
+        for position, fields in self.txns.items():
+            for field, value in fields.items():
+                options = [
+                    Eq(_field(position, field), expected)
+                    for expected in _expected(value)
+                ]
+                terms.append(options[0] if len(options) == 1 else Or(*options))
+        return terms
+
+    def predicate(self):
+        terms = self.terms()
+        return terms[0] if len(terms) == 1 else And(*terms)
+
+    def __call__(self, shared=False):
+        """
+        - returns the predicate, or None when the method accepts any group
+        """
+        if not self.terms():
+            return None
+        return self.subroutine() if shared else self.predicate()
+
+
+def __getattr__(name):
+    if name not in _SHAPES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    # * Cache it so a program routing to it twice shares one subroutine
+    checker = Checker(name, *_SHAPES[name])
+    globals()[name] = checker
+    return checker
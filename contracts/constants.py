@@ -1,118 +1,128 @@
+"""
+State keys and enum values shared by the contracts; the methods they route are
+in contracts.abi.
+
+A state key is stored under a short code instead of its name, so it takes less of
+the 64 bytes shared by key and value, and less of every program that reads it.
+state_keys() maps the codes back to the names for tooling. Codes are fixed once
+released: a new key gets a new code, it never reuses or renumbers one.
+
+The pyteal expressions are only built when a name is first imported, so a
+contract pays for the constants it uses rather than for the whole table.
+"""
+
 from pyteal import Bytes, Int
 
-OWNER = Bytes("OWNER")
-INCREASE_ALGO_POOL = Bytes("INCREASE_ALGO_POOL")
-INCREASE_ASSET_POOL_REWARDS = Bytes("INCREASE_ASSET_POOL_REWARDS")
-CREATOR_POOL = Bytes("CREATOR_POOL")
-CALCULATE_ALGO_REWARDS = Bytes("CALCULATE_ALGO_REWARDS")
-WITHDRAW_ASSET = Bytes("WITHDRAW_ASSET")
-WITHDRAW_ALGO = Bytes("WITHDRAW_ALGO")
-WITHDRAW_ALGO_COUNTER = Bytes("WITHDRAW_ALGO_COUNTER")
-WITHDRAW_ASSET_COUNTER = Bytes("WITHDRAW_ASSET_COUNTER")
-ALGO_BALANCE = Bytes("ALGO_BALANCE")
-VERIFIED_CREATORS = Bytes("VERIFIED_CREATORS")
-CALCULATE_ASSET_REWARDS = Bytes("CALCULATE_ASSET_REWARDS")
-SET_VERIFIED_STATUS = Bytes("SET_VERIFIED_STATUS")
-INCREASE_POOL_REWARDS = Bytes("INCREASE_POOL_REWARDS")
-CREATE_ASSET_APP = Bytes("CREATE_ASSET_APP")
-NIFTGEN_ASSET = Bytes("NIFTGEN_ASSET")
-ASSET_OPTIN = Bytes("ASSET_OPTIN")
-ROLE = Bytes("ROLE")
-STATUS = Bytes("STATUS")
-SET_ROLE = Bytes("SET_ROLE")
-FIRST_ADMIN = Bytes("FIRST_ADMIN")
-REVERT_NFT = Bytes("REVERT_NFT")
-START_SELL = Bytes("START_SELL")
-PURCHASE_NFT = Bytes("PURCHASE_NFT")
-NFT_PRICE = Bytes("NFT_PRICE")
-NFT_ID = Bytes("NFT_ID")
-CREATE_ASSET = Bytes("CREATE_ASSET")
-CLAIM_NFT = Bytes("CLAIM_NFT")
-START_AUCTION = Bytes("START_AUCTION")
-END_AUCTION = Bytes("END_AUCTION")
-MIN_BID_INCREMENT = Bytes("MIN_BID_INCREMENT")
-NFT_OWNER = Bytes("NFT_OWNER")
-ON_BID = Bytes("ON_BID")
-CURRENT_BID = Bytes("CURRENT_BID")
-BIDDER_WINNER = Bytes("BIDDER_WINNER")
-SET_LOCAL = Bytes("SET_LOCAL")
-CHANGE_OWNERSHIP = Bytes("CHANGE_OWNERSHIP")
-ADMIN_ID = Bytes("ADMIN_ID")
-OPT_IN_ASSETS = Bytes("OPT_IN_ASSETS")
-CLOSE_AUCTION = Bytes("CLOSE_AUCTION")
-ROYALTY = Bytes("ROYALTY")
-NFT_CREATOR = Bytes("NFT_CREATOR")
-PLATFORM_FEE = Bytes("PLATFORM_FEE")
-PAYMENT_OPTION = Bytes("PAYMENT_OPTION")
-START_PRICE = Bytes("START_PRICE")
-GET_TOKENS = Bytes("GET_TOKENS")
-PAY_ALGO = Bytes("PAY_ALGO")
-PAY_ASSET = Bytes("PAY_ASSET")
-SET_GLOBAL = Bytes("SET_GLOBAL")
-DEL_GLOBAL = Bytes("DEL_GLOBAL")
-CREATOR_ADDRESS = Bytes("CREATOR_ADDRESS")
-CHANGE_ASSET_MANAGER = Bytes("CHANGE_ASSET_MANAGER")
-NEW_ADMIN_ID = Bytes("NEW_ADMIN_ID")
-CLAWBACK_ASSET = Bytes("CLAWBACK_ASSET")
-FREEZE_ASSET = Bytes("FREEZE_ASSET")
-CHANGE_ADMIN_ID = Bytes("CHANGE_ADMIN_ID")
-OPTIN_ADMIN = Bytes("OPTIN_ADMIN")
-SUBSCRIPTION_STATUS = Bytes("SUBSCRIPTION_STATUS")
-REWARDS_AMOUNT = Bytes("REWARDS_AMOUNT")
-EMERGENCY_WITHDRAW = Bytes("EMERGENCY_WITHDRAW")
-INCREASE_REWARDS = Bytes("INCREASE_REWARDS")
-DECREASE_REWARDS = Bytes("DECREASE_REWARDS")
-GET_PENDING_REWARDS = Bytes("GET_PENDING_REWARDS")
-SUBSCRIPTION_NFT_ID = Bytes("SUBSCRIPTION_NFT_ID")
-SUBSCRIPTION_PRICE = Bytes("SUBSCRIPTION_PRICE")
-FEES_TO_PAY = Bytes("FEES_TO_PAY")
-CREATE_SUBSCRIPTION = Bytes("CREATE_SUBSCRIPTION")
-SUBSCRIBE = Bytes("SUBSCRIBE")
-CANCEL_SUBSCRIPTION = Bytes("CANCEL_SUBSCRIPTION")
-ADMIN_CANCEL_SUBSCRIPTION = Bytes("ADMIN_CANCEL_SUBSCRIPTION")
-CANCEL_AND_REFUND_SUBSCRIPTION = Bytes("CANCEL_AND_REFUND_SUBSCRIPTION")
-ADMIN_CANCEL_AND_REFUND_SUBSCRIPTION = Bytes("ADMIN_CANCEL_AND_REFUND_SUBSCRIPTION")
-RENEW_SUBSCRIPTION = Bytes("RENEW_SUBSCRIPTION")
-FREEZE_SUBSCRIPTION = Bytes("FREEZE_SUBSCRIPTION")
-UNFREEZE_SUBSCRIPTION = Bytes("UNFREEZE_SUBSCRIPTION")
-DAILY_DATE = Bytes("DAILY_DATE")
-DAILY_AMOUNT = Bytes("DAILY_AMOUNT")
-REWARD_MODULE = Bytes("REWARD_MODULE")
-DEPLOY_CREATOR_APP = Bytes("DEPLOY_CREATOR_APP")
-WITHDRAW_ALGOS = Bytes("WITHDRAW_ALGOS")
-WITHDRAW_TOKENS = Bytes("WITHDRAW_TOKENS")
-UTILITY = Bytes("UTILITY")
-DEPLOY_SUBSCRIPTION_APP = Bytes("DEPLOY_SUBSCRIPTION_APP")
-BASIC_SUBSCRIPTION = Int(0)
-PREMIUM_SUBSCRIPTION = Int(1)
-USER_ROLE = Int(0)
-ADMIN_ROLE = Int(1)
-ALGO_STATE = Bytes("ALGO")
-ALGO = Int(0)
-USDC = Int(1)
-MAX_UINT = Int(9007199254740991)
-SUBSCRIPTION_EXPIRES_DATE = Bytes("SUBSCRIPTION_EXPIRES_DATE")
-SUBSCRIPTION = Bytes("SUBSCRIPTION")
-SUBSCRIPTION_PAYMENT_TYPE = Bytes("SUBSCRIPTION_PAYMENT_TYPE")
-SUBSCRIPTION_AMOUNT_PAID = Bytes("SUBSCRIPTION_AMOUNT_PAID")
-SUBSCRIPTION_DURATION = Bytes("SUBSCRIPTION_DURATION")
-CREATOR_FUND = Bytes("CREATOR_FUND")
-NOT_VERIFIED_STATUS = Int(0)
-VERIFIED_STATUS = Int(1)
-USDC_ASSET_ID = Bytes("USDC_ASSET_ID")
-SUBSCRIBE_CREATOR = Int(0)
-SUBSCRIBE_REFERRAL = Int(1)
-SUBSCRIBE_PLATFORM = Int(2)
+# * name -> code the value is stored under in global or local state
+_STATE_KEYS = {
+    "OWNER": "ow",
+    "CREATOR_POOL": "mp",
+    "WITHDRAW_ALGO_COUNTER": "wa",
+    "WITHDRAW_ASSET_COUNTER": "wt",
+    "ALGO_BALANCE": "ab",
+    "VERIFIED_CREATORS": "vc",
+    "NIFTGEN_ASSET": "ng",
+    "ROLE": "ro",
+    "STATUS": "st",
+    "FIRST_ADMIN": "fa",
+    "NFT_PRICE": "np",
+    "NFT_ID": "ni",
+    "START_AUCTION": "as",
+    "END_AUCTION": "ae",
+    "MIN_BID_INCREMENT": "mb",
+    "NFT_OWNER": "no",
+    "CURRENT_BID": "cb",
+    "BIDDER_WINNER": "bw",
+    "ADMIN_ID": "ai",
+    "ROYALTY": "ry",
+    "NFT_CREATOR": "nc",
+    "PLATFORM_FEE": "pf",
+    "PAYMENT_OPTION": "po",
+    "START_PRICE": "sp",
+    # * Packed records, see contracts.records
+    "LISTING": "ls",
+    "AUCTION": "au",
+    "CREATOR_ADDRESS": "ca",
+    "NEW_ADMIN_ID": "na",
+    "SUBSCRIPTION_STATUS": "ss",
+    "REWARDS_AMOUNT": "ra",
+    "FEES_TO_PAY": "fp",
+    "DAILY_DATE": "dd",
+    "DAILY_AMOUNT": "da",
+    "SUBSCRIPTION_EXPIRES_DATE": "se",
+    "SUBSCRIPTION": "su",
+    "SUBSCRIPTION_PAYMENT_TYPE": "pt",
+    "SUBSCRIPTION_AMOUNT_PAID": "ap",
+    "SUBSCRIPTION_DURATION": "sd",
+    "USDC_ASSET_ID": "ua",
+    "SUBSCRIPTION_APP_ID": "si",
+    # * Modules: MODULE_NAME holds one of them, admin keeps their ids under them
+    "MODULE_NAME": "mn",
+    "AUCTION_MODULE": "ma",
+    "LIST_MODULE": "ml",
+    "SUBSCRIPTION_MODULE": "ms",
+    "SUBSCRIPTION_APP": "mu",
+    "CREATOR_APP": "mc",
+    "REWARD_MODULE": "mr",
+}
+
+# * name -> bytes (str) or uint64 (int) value
+_CONSTANTS = {
+    "INCREASE_POOL_REWARDS": "INCREASE_POOL_REWARDS",
+    "CREATE_ASSET": "CREATE_ASSET",
+    "CLAIM_NFT": "CLAIM_NFT",
+    "GET_TOKENS": "GET_TOKENS",
+    "CHANGE_ASSET_MANAGER": "CHANGE_ASSET_MANAGER",
+    "CLAWBACK_ASSET": "CLAWBACK_ASSET",
+    "FREEZE_ASSET": "FREEZE_ASSET",
+    "OPTIN_ADMIN": "OPTIN_ADMIN",
+    "SUBSCRIPTION_NFT_ID": "SUBSCRIPTION_NFT_ID",
+    "SUBSCRIPTION_PRICE": "SUBSCRIPTION_PRICE",
+    "CREATE_SUBSCRIPTION": "CREATE_SUBSCRIPTION",
+    "CANCEL_SUBSCRIPTION": "CANCEL_SUBSCRIPTION",
+    "ADMIN_CANCEL_SUBSCRIPTION": "ADMIN_CANCEL_SUBSCRIPTION",
+    "CANCEL_AND_REFUND_SUBSCRIPTION": "CANCEL_AND_REFUND_SUBSCRIPTION",
+    "ADMIN_CANCEL_AND_REFUND_SUBSCRIPTION": "ADMIN_CANCEL_AND_REFUND_SUBSCRIPTION",
+    "FREEZE_SUBSCRIPTION": "FREEZE_SUBSCRIPTION",
+    "UNFREEZE_SUBSCRIPTION": "UNFREEZE_SUBSCRIPTION",
+    "DEPLOY_CREATOR_APP": "DEPLOY_CREATOR_APP",
+    "BASIC_SUBSCRIPTION": 0,
+    "PREMIUM_SUBSCRIPTION": 1,
+    "USER_ROLE": 0,
+    "ADMIN_ROLE": 1,
+    "ALGO_STATE": "ALGO",
+    "ALGO": 0,
+    "USDC": 1,
+    "MAX_UINT": 9007199254740991,
+    "CREATOR_FUND": "CREATOR_FUND",
+    "NOT_VERIFIED_STATUS": 0,
+    "VERIFIED_STATUS": 1,
+    "SUBSCRIBE_CREATOR": 0,
+    "SUBSCRIBE_REFERRAL": 1,
+    "SUBSCRIBE_PLATFORM": 2,
+    "DEPLOY_CONTRACT": "DEPLOY_CONTRACT",
+    "CREATOR_APP_ID": "CREATOR_APP_ID",
+}
+
+__all__ = list(_STATE_KEYS) + list(_CONSTANTS)
+
+
+def state_keys():
+    """
+    - returns {code: name} of every state key
+    """
+    return {code: name for name, code in _STATE_KEYS.items()}
+
+
+def __getattr__(name):
+    if name in _STATE_KEYS:
+        expression = Bytes(_STATE_KEYS[name])
+    elif name in _CONSTANTS:
+        value = _CONSTANTS[name]
+        expression = Int(value) if isinstance(value, int) else Bytes(value)
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-# * Modules
-MODULE_NAME = Bytes("MODULE_NAME")
-AUCTION_MODULE = Bytes("AUCTION_MODULE")
-LIST_MODULE = Bytes("LIST_MODULE")
-SUBSCRIPTION_MODULE = Bytes("SUBSCRIPTION_MODULE")
-SUBSCRIPTION_APP_ID = Bytes("SUBSCRIPTION_APP_ID")
-SUBSCRIPTION_APP = Bytes("SUBSCRIPTION_APP")
-ADD_MODULE = Bytes("ADD_MODULE")
-REMOVE_MODULE = Bytes("REMOVE_MODULE")
-DEPLOY_CONTRACT = Bytes("DEPLOY_CONTRACT")
-CREATOR_APP = Bytes("CREATOR_APP")
-CREATOR_APP_ID = Bytes("CREATOR_APP_ID")
+    # * Cache it so every contract shares one expression per constant
+    globals()[name] = expression
+    return expression
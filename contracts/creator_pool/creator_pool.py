@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.constants import (
     ADMIN_ID,
     ROLE,
@@ -11,6 +13,16 @@ from contracts.constants import (
     WITHDRAW_ASSET_COUNTER,
     WITHDRAW_ALGO_COUNTER,
 )
+from contracts.abi import (
+    ASSET_OPTIN,
+    WITHDRAW_ALGO,
+    WITHDRAW_ASSET,
+    CALCULATE_ALGO_REWARDS,
+    CALCULATE_ASSET_REWARDS,
+    INCREASE_ALGO_POOL,
+    INCREASE_ASSET_POOL_REWARDS,
+    reference,
+)
 from contracts.utility import (
     inner_asset_transaction,
     inner_payment_transaction,
@@ -37,7 +49,7 @@ def deploy_contract():
 @Subroutine(TealType.uint64)
 def asset_optin():
     _sender = Txn.sender()
-    _asset_id = Txn.assets[0]
+    _asset_id = reference("ASSET_OPTIN", "asset")
 
     admin_id = App.globalGet(ADMIN_ID)
     application_address = Global.current_application_address()
@@ -108,7 +120,7 @@ def check_subscription_id(subscription_creator_address, subscription_id):
 @Subroutine(TealType.uint64)
 def calculate_asset_rewards():
     _sender = Txn.sender()
-    _asset_id = Txn.assets[0]
+    _asset_id = reference("CALCULATE_ASSET_REWARDS", "asset")
 
     admin_id = App.globalGet(ADMIN_ID)
     asset_amount = App.globalGet(Itob(_asset_id))
@@ -166,7 +178,7 @@ def _calculate_amount(verified_users, amount):
 @Subroutine(TealType.uint64)
 def withdraw_asset_reward():
     _sender = Txn.sender()
-    _asset_id = Txn.assets[0]
+    _asset_id = reference("WITHDRAW_ASSET", "asset")
 
     asset_amount = App.globalGet(Concat(Bytes("AMOUNT_"), Itob(_asset_id)))
     withdraw_asset_counter = App.globalGet(
@@ -189,7 +201,7 @@ def withdraw_asset_reward():
             _sender,
             Concat(WITHDRAW_ASSET_COUNTER, Itob(_asset_id)),
             Itob(Add(user_asset_counter.value(), Int(1))),
-            Int(1),
+            Itob(Int(1)),
         ),
         Return(Int(1)),
     )
@@ -222,17 +234,42 @@ def withdraw_reward():
     )
 
 
+# * ARC-4 methods routed by creator_pool_approval with the references their calls
+# * hold besides the arguments, exported to creator_pool_contract.json
+CREATOR_POOL_METHODS = {
+    "WITHDRAW_ALGO": {},
+    "WITHDRAW_ASSET": {},
+    "CALCULATE_ALGO_REWARDS": {},
+    "CALCULATE_ASSET_REWARDS": {},
+    "ASSET_OPTIN": {},
+    "INCREASE_ALGO_POOL": {},
+    "INCREASE_ASSET_POOL_REWARDS": {},
+}
+
+
 def creator_pool_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group txns === 1
-        [withdraw_algo_reward_checkers(), Return(withdraw_reward())],
-        [withdraw_asset_reward_checkers(), Return(withdraw_asset_reward())],
-        [calculate_algo_rewards_checkers(), Return(calculate_algo_rewards())],
-        [calculate_asset_rewards_checkers(), Return(calculate_asset_rewards())],
+        (WITHDRAW_ALGO, withdraw_algo_reward_checkers, withdraw_reward()),
+        (WITHDRAW_ASSET, withdraw_asset_reward_checkers, withdraw_asset_reward()),
+        (
+            CALCULATE_ALGO_REWARDS,
+            calculate_algo_rewards_checkers,
+            calculate_algo_rewards(),
+        ),
+        (
+            CALCULATE_ASSET_REWARDS,
+            calculate_asset_rewards_checkers,
+            calculate_asset_rewards(),
+        ),
         # * Group txns > 1
-        [asset_optin_checker(), Return(asset_optin())],
-        [increase_pool_rewards_checker(), Return(increase_pool_rewards())],
-        [increase_asset_pool_rewards_checker(), Return(increase_asset_pool_rewards())],
+        (ASSET_OPTIN, asset_optin_checker, asset_optin()),
+        (INCREASE_ALGO_POOL, increase_pool_rewards_checker, increase_pool_rewards()),
+        (
+            INCREASE_ASSET_POOL_REWARDS,
+            increase_asset_pool_rewards_checker,
+            increase_asset_pool_rewards(),
+        ),
     )
 
     program = Cond(
@@ -247,9 +284,9 @@ def creator_pool_approval():
         [Txn.on_completion() == OnComplete.NoOp, handle_noop],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def creator_pool_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -0,0 +1,270 @@
+"""
+Program a deployed app is updated to while its state moves from the legacy keys
+(the names of contracts.constants state keys) to their codes.
+
+The owner updates the app to this program, calls MIGRATE_STATE once per key it
+holds, then updates it to its current program. The production programs carry no
+migration code. Migrate the admin app last: until then the programs of the other
+apps look its owner up under the legacy key.
+
+NFT apps deployed before the packed records kept a listing and an auction field
+by field, escrowed bids included. Once their keys are moved, PACK_RECORDS turns
+those fields into the LISTING and AUCTION records; the update back to the
+current program fails while any of them is left.
+"""
+
+from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
+from contracts import constants
+from contracts.checkers import migrate_state_checker, pack_records_checker
+from contracts.constants import (
+    ADMIN_ID,
+    AUCTION,
+    BIDDER_WINNER,
+    CURRENT_BID,
+    END_AUCTION,
+    LISTING,
+    MIN_BID_INCREMENT,
+    MODULE_NAME,
+    NFT_CREATOR,
+    NFT_ID,
+    NFT_OWNER,
+    NFT_PRICE,
+    OWNER,
+    PAYMENT_OPTION,
+    PLATFORM_FEE,
+    ROYALTY,
+    START_AUCTION,
+    START_PRICE,
+    USDC,
+    USDC_ASSET_ID,
+)
+from contracts.abi import MIGRATE_STATE, PACK_RECORDS, decode_bytes
+from contracts.records import pack
+
+# * Values MODULE_NAME held under their names, rewritten to their codes
+_MODULES = [
+    "AUCTION_MODULE",
+    "LIST_MODULE",
+    "SUBSCRIPTION_MODULE",
+    "SUBSCRIPTION_APP",
+    "CREATOR_APP",
+    "REWARD_MODULE",
+]
+
+# * Per-field listing and auction globals of NFT apps, replaced by the records;
+# * PLATFORM_FEE is left out as the admin app keeps its own
+_RECORD_FIELDS = [
+    "NFT_PRICE",
+    "PAYMENT_OPTION",
+    "START_AUCTION",
+    "END_AUCTION",
+    "MIN_BID_INCREMENT",
+    "START_PRICE",
+    "CURRENT_BID",
+    "BIDDER_WINNER",
+]
+
+
+@Subroutine(TealType.uint64)
+def _admin_id():
+    """
+    - returns the admin app, which is the app itself when it keeps no ADMIN_ID
+    """
+    admin_id = App.globalGetEx(Int(0), ADMIN_ID)
+    legacy_admin_id = App.globalGetEx(Int(0), Bytes("ADMIN_ID"))
+
+    return Seq(
+        admin_id,
+        legacy_admin_id,
+        If(admin_id.hasValue())
+        .Then(admin_id.value())
+        .ElseIf(legacy_admin_id.hasValue())
+        .Then(legacy_admin_id.value())
+        .Else(Global.current_application_id()),
+    )
+
+
+@Subroutine(TealType.none)
+def _check_owner():
+    _sender = Txn.sender()
+    admin_id = _admin_id()
+
+    owner = App.globalGetEx(admin_id, OWNER)
+    legacy_owner = App.globalGetEx(admin_id, Bytes("OWNER"))
+
+    return Seq(
+        owner,
+        legacy_owner,
+        Assert(Eq(_sender, If(owner.hasValue(), owner.value(), legacy_owner.value()))),
+    )
+
+
+@Subroutine(TealType.none)
+def _move_local(account, legacy_key, key):
+    value = App.localGetEx(account, Int(0), legacy_key)
+
+    return Seq(
+        value,
+        If(value.hasValue()).Then(
+            Seq(
+                App.localPut(account, key, value.value()),
+                App.localDel(account, legacy_key),
+            )
+        ),
+    )
+
+
+@Subroutine(TealType.bytes)
+def _module_code(value):
+    """
+    - returns the code of the module named value, value itself for any other
+    """
+    code = value
+    for name in reversed(_MODULES):
+        code = If(Eq(value, Bytes(name)), getattr(constants, name), code)
+    return code
+
+
+@Subroutine(TealType.uint64)
+def migrate_state():
+    """
+    - moves the value kept under legacy_key to key, in global state and in the
+      local state of every account the call references
+    - a module name kept under MODULE_NAME is rewritten to its code; legacy_key
+      may equal key for apps whose keys are moved already
+    """
+    _legacy_key = decode_bytes(Txn.application_args[1])
+    _key = decode_bytes(Txn.application_args[2])
+
+    value = App.globalGetEx(Int(0), _legacy_key)
+    index = ScratchVar(TealType.uint64)
+
+    return Seq(
+        _check_owner(),
+        value,
+        If(value.hasValue()).Then(
+            Seq(
+                If(Eq(_key, MODULE_NAME))
+                .Then(App.globalPut(_key, _module_code(value.value())))
+                .Else(App.globalPut(_key, value.value())),
+                If(Neq(_legacy_key, _key)).Then(App.globalDel(_legacy_key)),
+            )
+        ),
+        # * Txn.accounts[0] is the sender
+        For(
+            index.store(Int(0)),
+            Le(index.load(), Txn.accounts.length()),
+            index.store(Add(index.load(), Int(1))),
+        ).Do(_move_local(Txn.accounts[index.load()], _legacy_key, _key)),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def pack_records():
+    """
+    - turns the per-field listing and auction globals of an NFT app, once moved
+      to their codes, into its LISTING and AUCTION records and deletes them; a
+      price or an end of 0 marked no listing or no auction
+    """
+    nft_id = App.globalGetEx(Int(0), NFT_ID)
+    payment_asset = If(
+        Eq(App.globalGet(PAYMENT_OPTION), USDC), App.globalGet(USDC_ASSET_ID), Int(0)
+    )
+
+    return Seq(
+        _check_owner(),
+        nft_id,
+        # * PLATFORM_FEE is a listing field only in an NFT app
+        Assert(nft_id.hasValue()),
+        If(App.globalGet(NFT_PRICE)).Then(
+            App.globalPut(
+                LISTING,
+                pack(
+                    "LISTING",
+                    {
+                        "price": App.globalGet(NFT_PRICE),
+                        "platform_fee": App.globalGet(PLATFORM_FEE),
+                        "payment_asset": payment_asset,
+                        "royalty": App.globalGet(ROYALTY),
+                        "owner": App.globalGet(NFT_OWNER),
+                        "creator": App.globalGet(NFT_CREATOR),
+                    },
+                ),
+            )
+        ),
+        # * The escrowed bid and its bidder carry over
+        If(App.globalGet(END_AUCTION)).Then(
+            App.globalPut(
+                AUCTION,
+                pack(
+                    "AUCTION",
+                    {
+                        "start": App.globalGet(START_AUCTION),
+                        "end": App.globalGet(END_AUCTION),
+                        "min_bid_increment": App.globalGet(MIN_BID_INCREMENT),
+                        "start_price": App.globalGet(START_PRICE),
+                        "payment_asset": payment_asset,
+                        "current_bid": App.globalGet(CURRENT_BID),
+                        "bidder": If(
+                            App.globalGet(CURRENT_BID),
+                            App.globalGet(BIDDER_WINNER),
+                            Global.zero_address(),
+                        ),
+                    },
+                ),
+            )
+        ),
+        App.globalDel(PLATFORM_FEE),
+        *[App.globalDel(getattr(constants, name)) for name in _RECORD_FIELDS],
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.none)
+def _check_no_record_fields():
+    """
+    - fails while the app keeps a listing or auction field, under its name or its
+      code, that pack_records has not turned into a record
+    """
+    checks = []
+    for name in _RECORD_FIELDS:
+        for key in (getattr(constants, name), Bytes(name)):
+            value = App.globalGetEx(Int(0), key)
+            checks += [value, Assert(Not(value.hasValue()))]
+    return Seq(*checks)
+
+
+@Subroutine(TealType.uint64)
+def update_app():
+
+    return Seq(_check_owner(), _check_no_record_fields(), Return(Int(1)))
+
+
+# * ARC-4 methods routed by migration_approval with the references their calls
+# * hold besides the arguments, exported to migration_contract.json
+MIGRATION_METHODS = {
+    "MIGRATE_STATE": {"accounts": ["each account whose local state moves"]},
+    "PACK_RECORDS": {},
+}
+
+
+def migration_approval():
+    handle_noop = route(
+        (MIGRATE_STATE, migrate_state_checker, migrate_state()),
+        (PACK_RECORDS, pack_records_checker, pack_records()),
+    )
+
+    program = Cond(
+        [Txn.on_completion() == OnComplete.NoOp, handle_noop],
+        [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
+    )
+
+    return compile_application(program)
+
+
+def migration_clear():
+    program = Return(Int(1))
+    return compile_application(program)
@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
     change_admin_id_checker,
     close_auction_checker,
@@ -9,30 +11,29 @@ from contracts.constants import (
     ADMIN_ID,
     ADMIN_ROLE,
     ALGO,
-    NEW_ADMIN_ID,
     NFT_ID,
     NFT_OWNER,
-    NFT_CREATOR,
     USDC,
-    PAYMENT_OPTION,
     ROLE,
     ROYALTY,
-    USDC_ASSET_ID,
-    START_AUCTION,
-    END_AUCTION,
-    MIN_BID_INCREMENT,
-    CURRENT_BID,
-    BIDDER_WINNER,
     PLATFORM_FEE,
-    START_PRICE,
     MODULE_NAME,
     AUCTION_MODULE,
+    AUCTION,
 )
+from contracts.abi import (
+    CHANGE_ADMIN_ID,
+    CREATE_AUCTION,
+    ON_BID,
+    CLOSE_AUCTION,
+    reference,
+)
+from contracts.records import field
 from contracts.utility import (
-    set_global_txn,
-    pay_asset_txn,
-    pay_algo_txn,
-    del_global_txn,
+    set_auction_txn,
+    reset_auction_txn,
+    bid_txn,
+    settle_txn,
     _check_owner_role,
 )
 
@@ -55,8 +56,8 @@ def create_auction():
     _min_bid_increment = Btoi(Txn.application_args[3])
     _payment_option = Btoi(Txn.application_args[4])
     _start_price = Btoi(Txn.application_args[5])
-    _nft_app_id = Txn.applications[1]
-    _nft_id = Txn.assets[0]
+    _nft_app_id = reference("CREATE_AUCTION", "nft_app")
+    _nft_id = reference("CREATE_AUCTION", "nft")
     _sender = Txn.sender()
 
     nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
@@ -80,31 +81,14 @@ def create_auction():
             )
         ),
         Assert(Ge(_start_price, Int(0))),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, START_AUCTION, Itob(_start_time), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, END_AUCTION, Itob(_end_time), Itob(Int(1))
-        ),
-        set_global_txn(
+        set_auction_txn(
             _nft_app_id,
             AUCTION_MODULE,
-            MIN_BID_INCREMENT,
-            Itob(_min_bid_increment),
-            Itob(Int(1)),
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, CURRENT_BID, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id,
-            AUCTION_MODULE,
-            PAYMENT_OPTION,
-            Itob(_payment_option),
-            Itob(Int(1)),
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, START_PRICE, Itob(_start_price), Itob(Int(1))
+            _start_time,
+            _end_time,
+            _min_bid_increment,
+            _payment_option,
+            _start_price,
         ),
         Return(Int(1)),
     )
@@ -113,87 +97,40 @@ def create_auction():
 @Subroutine(TealType.uint64)
 def on_bid_auction():
     _bidder = Txn.sender()
-    _nft_app_id = Txn.applications[1]
-
-    current_bid = App.globalGetEx(_nft_app_id, CURRENT_BID)
-    min_bid_increment = App.globalGetEx(_nft_app_id, MIN_BID_INCREMENT)
-    bidder_winner = App.globalGetEx(_nft_app_id, BIDDER_WINNER)
-    payment_option = App.globalGetEx(_nft_app_id, PAYMENT_OPTION)
-    usdc_asset = App.globalGetEx(_nft_app_id, USDC_ASSET_ID)
-    start_price = App.globalGetEx(_nft_app_id, START_PRICE)
-    start_auction = App.globalGetEx(_nft_app_id, START_AUCTION)
-    end_auction = App.globalGetEx(_nft_app_id, END_AUCTION)
+    _nft_app_id = reference("ON_BID", "nft_app")
+    # * The highest bidder so far, refunded by nft_app; unused before the first bid
+    _previous_bidder = reference("ON_BID", "previous_bidder")
 
     nft_app_address = AppParam.address(_nft_app_id)
 
+    bid_asset = ScratchVar(TealType.uint64)
     bid_amount = ScratchVar(TealType.uint64)
-    minimum_bid_amount = ScratchVar(TealType.uint64)
 
     return Seq(
-        current_bid,
-        min_bid_increment,
-        bidder_winner,
-        payment_option,
-        usdc_asset,
-        start_price,
         nft_app_address,
-        start_auction,
-        end_auction,
-        minimum_bid_amount.store(Add(current_bid.value(), min_bid_increment.value())),
-        bid_amount.store(Int(0)),
-        Assert(
-            Or(
-                Eq(Gtxn[0].receiver(), nft_app_address.value()),
-                Eq(Gtxn[0].asset_receiver(), nft_app_address.value()),
-            ),
-        ),
-        If(Eq(payment_option.value(), ALGO)).Then(
+        # * nft_app checks the bid against the auction it holds
+        If(Eq(Gtxn[0].type_enum(), TxnType.Payment))
+        .Then(
             Seq(
-                Assert(Eq(Gtxn[0].type_enum(), TxnType.Payment)),
+                Assert(Eq(Gtxn[0].receiver(), nft_app_address.value())),
+                bid_asset.store(Int(0)),
                 bid_amount.store(Gtxn[0].amount()),
             )
-        ),
-        If(Eq(payment_option.value(), USDC)).Then(
+        )
+        .Else(
             Seq(
-                Assert(Eq(Gtxn[0].xfer_asset(), usdc_asset.value())),
+                Assert(Eq(Gtxn[0].asset_receiver(), nft_app_address.value())),
+                bid_asset.store(Gtxn[0].xfer_asset()),
                 bid_amount.store(Gtxn[0].asset_amount()),
             )
         ),
-        Assert(Ge(Global.latest_timestamp(), start_auction.value())),
-        Assert(Lt(Global.latest_timestamp(), end_auction.value())),
-        Assert(Ge(bid_amount.load(), minimum_bid_amount.load())),
-        Assert(Neq(bid_amount.load(), Int(0))),
-        Assert(Ge(bid_amount.load(), start_price.value())),
-        If(Gt(current_bid.value(), Int(0))).Then(
-            Seq(
-                If(Eq(payment_option.value(), ALGO)).Then(
-                    pay_algo_txn(
-                        _nft_app_id,
-                        bidder_winner.value(),
-                        current_bid.value(),
-                        AUCTION_MODULE,
-                    )
-                ),
-                If(Eq(payment_option.value(), USDC)).Then(
-                    pay_asset_txn(
-                        _nft_app_id,
-                        bidder_winner.value(),
-                        usdc_asset.value(),
-                        current_bid.value(),
-                        AUCTION_MODULE,
-                    )
-                ),
-            )
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, BIDDER_WINNER, _bidder, Itob(Int(0))
-        ),
-        set_global_txn(
+        bid_txn(
             _nft_app_id,
             AUCTION_MODULE,
-            CURRENT_BID,
-            Itob(bid_amount.load()),
-            Itob(Int(1)),
+            _bidder,
+            _previous_bidder,
+            bid_asset.load(),
+            bid_amount.load(),
         ),
         Return(Int(1)),
     )
@@ -201,34 +138,13 @@ def on_bid_auction():
 
 @Subroutine(TealType.none)
 def close_auction_before():
-    _nft_id = Txn.assets[0]
-    _nft_app_id = Txn.applications[1]
+    _nft_id = reference("CLOSE_AUCTION", "nft")
+    _nft_app_id = reference("CLOSE_AUCTION", "nft_app")
     _sender = Txn.sender()
 
-    nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
-    nft_owner = App.globalGetEx(_nft_app_id, NFT_OWNER)
-
     return Seq(
-        nft_id,
-        nft_owner,
-        Assert(Eq(_nft_id, nft_id.value())),
-        Assert(Eq(_sender, nft_owner.value())),
-        pay_asset_txn(_nft_app_id, _sender, _nft_id, Int(1), AUCTION_MODULE),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, START_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, END_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, MIN_BID_INCREMENT, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, CURRENT_BID, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, BIDDER_WINNER, Bytes(""), Itob(Int(0))
-        ),
+        # * nft_app only gives its NFT back to its owner
+        reset_auction_txn(_nft_app_id, AUCTION_MODULE, _sender, _nft_id),
         Log(Bytes("BEFORE")),
     )
 
@@ -236,56 +152,29 @@ def close_auction_before():
 @Subroutine(TealType.none)
 def close_auction_after():
     _sender = Txn.sender()
-    _nft_id = Txn.assets[0]
-    _nft_app_id = Txn.applications[1]
-
-    nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
-    nft_owner = App.globalGetEx(_nft_app_id, NFT_OWNER)
+    _nft_id = reference("CLOSE_AUCTION", "nft")
+    _nft_app_id = reference("CLOSE_AUCTION", "nft_app")
 
     return Seq(
-        nft_id,
-        nft_owner,
-        Assert(Eq(nft_owner.value(), _sender)),
-        Assert(Eq(_nft_id, nft_id.value())),
-        pay_asset_txn(_nft_app_id, _sender, _nft_id, Int(1), AUCTION_MODULE),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, START_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, END_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, MIN_BID_INCREMENT, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, CURRENT_BID, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, BIDDER_WINNER, Bytes(""), Itob(Int(0))
-        ),
+        reset_auction_txn(_nft_app_id, AUCTION_MODULE, _sender, _nft_id),
         Log(Bytes("AFTER")),
     )
 
 
 @Subroutine(TealType.none)
-def close_auction_winner():
-    _nft_id = Txn.assets[0]
-    _sender = Txn.sender()
-    _nft_creator = Txn.accounts[1]
-    _bidder_winner = Txn.accounts[2]
-    _admin_address = Txn.accounts[3]
-    _nft_app_id = Txn.applications[1]
+def close_auction_winner(auction):
+    _nft_id = reference("CLOSE_AUCTION", "nft")
+    _nft_creator = reference("CLOSE_AUCTION", "nft_creator")
+    _bidder_winner = reference("CLOSE_AUCTION", "bidder_winner")
+    _admin_address = reference("CLOSE_AUCTION", "admin_address")
+    _nft_owner = reference("CLOSE_AUCTION", "nft_owner")
+    _nft_app_id = reference("CLOSE_AUCTION", "nft_app")
 
     admin_id = App.globalGet(ADMIN_ID)
-    nft_creator = App.globalGetEx(_nft_app_id, NFT_CREATOR)
-    nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
     royalty = App.globalGetEx(_nft_app_id, ROYALTY)
-    current_bid = App.globalGetEx(_nft_app_id, CURRENT_BID)
-    payment_option = App.globalGetEx(_nft_app_id, PAYMENT_OPTION)
-    usdc_asset = App.globalGetEx(_nft_app_id, USDC_ASSET_ID)
-    bidder_winner = App.globalGetEx(_nft_app_id, BIDDER_WINNER)
     platform_fee = App.globalGetEx(admin_id, PLATFORM_FEE)
     admin_address = AppParam.address(admin_id)
+    current_bid = field("AUCTION", auction, "current_bid")
 
     fee_to_platform = ScratchVar(TealType.uint64)
     nft_creator_amount = ScratchVar(TealType.uint64)
@@ -294,91 +183,34 @@ def close_auction_winner():
     return Seq(
         platform_fee,
         admin_address,
-        nft_creator,
-        nft_id,
         royalty,
-        current_bid,
-        payment_option,
-        usdc_asset,
-        bidder_winner,
-        nft_creator_amount.store(
-            WideRatio([current_bid.value(), royalty.value()], [Int(100)])
-        ),
+        nft_creator_amount.store(WideRatio([current_bid, royalty.value()], [Int(100)])),
         Assert(Eq(_admin_address, admin_address.value())),
-        Assert(Eq(_bidder_winner, bidder_winner.value())),
+        Assert(Eq(_bidder_winner, field("AUCTION", auction, "bidder"))),
         fee_to_platform.store(
-            WideRatio([platform_fee.value(), current_bid.value()], [Int(100)])
+            WideRatio([platform_fee.value(), current_bid], [Int(100)])
         ),
         owner_amount.store(
             Minus(
-                current_bid.value(),
+                current_bid,
                 Add(nft_creator_amount.load(), fee_to_platform.load()),
             )
         ),
-        Assert(Eq(_nft_id, nft_id.value())),
-        Assert(Eq(_nft_creator, nft_creator.value())),
-        If(Eq(payment_option.value(), ALGO)).Then(
-            Seq(
-                pay_algo_txn(
-                    _nft_app_id, _admin_address, fee_to_platform.load(), AUCTION_MODULE
-                ),
-                pay_algo_txn(
-                    _nft_app_id, _nft_creator, nft_creator_amount.load(), AUCTION_MODULE
-                ),
-                pay_algo_txn(_nft_app_id, _sender, owner_amount.load(), AUCTION_MODULE),
-                pay_asset_txn(
-                    _nft_app_id, _bidder_winner, nft_id.value(), Int(1), AUCTION_MODULE
-                ),
-            )
-        ),
-        If(Eq(payment_option.value(), USDC)).Then(
-            Seq(
-                pay_asset_txn(
-                    _nft_app_id,
-                    _admin_address,
-                    usdc_asset.value(),
-                    fee_to_platform.load(),
-                    AUCTION_MODULE,
-                ),
-                pay_asset_txn(
-                    _nft_app_id,
-                    _nft_creator,
-                    usdc_asset.value(),
-                    nft_creator_amount.load(),
-                    AUCTION_MODULE,
-                ),
-                pay_asset_txn(
-                    _nft_app_id,
-                    _sender,
-                    usdc_asset.value(),
-                    owner_amount.load(),
-                    AUCTION_MODULE,
-                ),
-                pay_asset_txn(
-                    _nft_app_id,
-                    _bidder_winner,
-                    nft_id.value(),
-                    Int(1),
-                    AUCTION_MODULE,
-                ),
-            )
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, START_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, END_AUCTION, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, MIN_BID_INCREMENT, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, CURRENT_BID, Itob(Int(0)), Itob(Int(1))
-        ),
-        set_global_txn(
-            _nft_app_id, AUCTION_MODULE, NFT_OWNER, _bidder_winner, Itob(Int(0))
+        # * Anyone may close a won auction; nft_app pays the proceeds to the NFT
+        # * owner, checks the creator and delivers its own NFT
+        settle_txn(
+            _nft_app_id,
+            AUCTION_MODULE,
+            _nft_id,
+            field("AUCTION", auction, "payment_asset"),
+            _bidder_winner,
+            _nft_creator,
+            _nft_owner,
+            _admin_address,
+            fee_to_platform.load(),
+            nft_creator_amount.load(),
+            owner_amount.load(),
         ),
-        del_global_txn(_nft_app_id, AUCTION_MODULE, PAYMENT_OPTION),
         Log(Bytes("WINNER")),
         Log(_bidder_winner),
     )
@@ -386,27 +218,26 @@ def close_auction_winner():
 
 @Subroutine(TealType.uint64)
 def close_auction():
-    _nft_app_id = Txn.applications[1]
+    _nft_app_id = reference("CLOSE_AUCTION", "nft_app")
 
-    start_auction = App.globalGetEx(_nft_app_id, START_AUCTION)
-    end_auction = App.globalGetEx(_nft_app_id, END_AUCTION)
-    current_bid = App.globalGetEx(_nft_app_id, CURRENT_BID)
+    auction = App.globalGetEx(_nft_app_id, AUCTION)
+    start_auction = field("AUCTION", auction.value(), "start")
+    end_auction = field("AUCTION", auction.value(), "end")
 
     return Seq(
-        start_auction,
-        end_auction,
-        current_bid,
+        auction,
+        Assert(auction.hasValue()),
         Log(Itob(Global.latest_timestamp())),
-        Log(Itob(start_auction.value())),
-        Log(Itob(end_auction.value())),
-        If(Lt(Global.latest_timestamp(), start_auction.value())).Then(
+        Log(Itob(start_auction)),
+        Log(Itob(end_auction)),
+        If(Lt(Global.latest_timestamp(), start_auction)).Then(
             Seq(close_auction_before(), Approve())
         ),
-        If(Gt(Global.latest_timestamp(), end_auction.value())).Then(
+        If(Gt(Global.latest_timestamp(), end_auction)).Then(
             Seq(
-                If(Eq(current_bid.value(), Int(0)))
+                If(Eq(field("AUCTION", auction.value(), "current_bid"), Int(0)))
                 .Then(Seq(close_auction_after(), Approve()))
-                .Else(Seq(close_auction_winner(), Approve()))
+                .Else(Seq(close_auction_winner(auction.value()), Approve()))
             )
         ),
         Return(Int(0)),
@@ -416,7 +247,7 @@ def close_auction():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
-    _new_admin_id = Txn.applications[1]
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
@@ -435,26 +266,24 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by auction_approval with the references their calls hold
+# * besides the arguments, exported to auction_contract.json
+AUCTION_METHODS = {
+    "CLOSE_AUCTION": {},
+    "CHANGE_ADMIN_ID": {},
+    "CREATE_AUCTION": {},
+    "ON_BID": {},
+}
+
+
 def auction_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group transaction === 1
-        [
-            close_auction_checker(),
-            Return(close_auction()),
-        ],
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+        (CLOSE_AUCTION, close_auction_checker, close_auction()),
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
         # * Group transaction > 1
-        [
-            create_auction_checker(),
-            Return(create_auction()),
-        ],
-        [
-            on_bid_auction_checker(),
-            Return(on_bid_auction()),
-        ],
+        (CREATE_AUCTION, create_auction_checker, create_auction()),
+        (ON_BID, on_bid_auction_checker, on_bid_auction()),
     )
 
     program = Cond(
@@ -470,9 +299,9 @@ def auction_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def auction_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,16 +1,42 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
     change_admin_id_checker,
     create_asset_app_checker,
+    mint_nfts_checker,
     asset_optin_checker,
     utility_checker,
 )
 from contracts.constants import *
+from contracts.abi import (
+    ASSET_OPTIN,
+    CHANGE_ADMIN_ID,
+    UTILITY,
+    CREATE_ASSET_APP,
+    MINT_NFTS,
+    decode_bytes,
+    log_return,
+    reference,
+)
 from contracts.utility import (
+    MINT_BATCH,
+    inner_nft_batch_creation,
     inner_contract_payment_transaction,
     _check_owner_role,
 )
 
+# * State schema and extra pages of every NFT app deployed by create_asset_app:
+# * ADMIN_ID, NFT_ID, ROYALTY, USDC_ASSET_ID and NEW_ADMIN_ID; NFT_OWNER,
+# * NFT_CREATOR and the LISTING and AUCTION records
+NFT_APP_SCHEMA = {
+    "global_num_uints": 5,
+    "global_num_byte_slices": 4,
+    "local_num_uints": 0,
+    "local_num_byte_slices": 0,
+    "extra_program_pages": 2,
+}
+
 
 @Subroutine(TealType.uint64)
 def deploy_contract():
@@ -30,7 +56,7 @@ def deploy_contract():
 def create_asset_app(asset_program_approval, nft_app_clear_program):
     _royalty = Btoi(Txn.application_args[1])
     _nft_owner = Txn.sender()
-    _nft_id = Txn.assets[0]
+    _nft_id = reference("CREATE_ASSET_APP", "nft")
 
     admin_id = App.globalGet(ADMIN_ID)
     creator_address = App.globalGet(CREATOR_ADDRESS)
@@ -54,17 +80,57 @@ def create_asset_app(asset_program_approval, nft_app_clear_program):
                 TxnField.accounts: [_nft_owner],
                 TxnField.assets: [_nft_id, usdc_asset_id.value()],
                 TxnField.fee: Int(0),
-                TxnField.local_num_uints: Int(0),
-                TxnField.local_num_byte_slices: Int(0),
-                TxnField.global_num_uints: Int(13),
-                TxnField.global_num_byte_slices: Int(9),
-                TxnField.extra_program_pages: Int(2),
+                TxnField.local_num_uints: Int(NFT_APP_SCHEMA["local_num_uints"]),
+                TxnField.local_num_byte_slices: Int(
+                    NFT_APP_SCHEMA["local_num_byte_slices"]
+                ),
+                TxnField.global_num_uints: Int(NFT_APP_SCHEMA["global_num_uints"]),
+                TxnField.global_num_byte_slices: Int(
+                    NFT_APP_SCHEMA["global_num_byte_slices"]
+                ),
+                TxnField.extra_program_pages: Int(
+                    NFT_APP_SCHEMA["extra_program_pages"]
+                ),
             }
         ),
         InnerTxnBuilder.Submit(),
         nft_app_id.store(InnerTxn.created_application_id()),
         inner_contract_payment_transaction(nft_app_id.load(), Int(100_000)),
-        Log(Itob(nft_app_id.load())),
+        log_return(Itob(nft_app_id.load())),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def mint_nfts():
+    _name = decode_bytes(Txn.application_args[1])
+    _unit_name = decode_bytes(Txn.application_args[2])
+    _count = Btoi(Txn.application_args[3])
+    _metadata = decode_bytes(Txn.application_args[4])
+    _sender = Txn.sender()
+
+    creator_address = App.globalGet(CREATOR_ADDRESS)
+
+    return Seq(
+        Assert(Eq(_sender, creator_address)),
+        Assert(And(Ge(_count, Int(1)), Le(_count, Int(MINT_BATCH)))),
+        Assert(
+            Or(
+                Eq(Len(_metadata), Int(0)),
+                Eq(Len(_metadata), Mul(_count, Int(32))),
+            )
+        ),
+        # * Every NFT the app holds raises its minimum balance by 0.1 ALGO
+        Assert(Ge(Gtxn[0].amount(), Mul(_count, Int(100_000)))),
+        # * uint64[]: a uint16 count, then the ids
+        log_return(
+            Concat(
+                Suffix(Itob(_count), Int(6)),
+                inner_nft_batch_creation(
+                    _name, _unit_name, _count, creator_address, _metadata
+                ),
+            )
+        ),
         Return(Int(1)),
     )
 
@@ -72,7 +138,7 @@ def create_asset_app(asset_program_approval, nft_app_clear_program):
 @Subroutine(TealType.uint64)
 def usdc_asset_optin():
     _sender = Txn.sender()
-    _usdc_asset_id = Txn.assets[0]
+    _usdc_asset_id = reference("ASSET_OPTIN", "asset")
 
     creator_address = App.globalGet(CREATOR_ADDRESS)
 
@@ -97,15 +163,15 @@ def usdc_asset_optin():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        App.globalPut(ADMIN_ID, _new_admin_id),
         Return(Int(1)),
     )
 
@@ -128,27 +194,32 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by creator_app_approval with the references their calls
+# * hold besides the arguments, exported to creator_app_contract.json
+CREATOR_APP_METHODS = {
+    "UTILITY": {},
+    "CHANGE_ADMIN_ID": {},
+    "ASSET_OPTIN": {},
+    "CREATE_ASSET_APP": {"assets": ["usdc"]},
+    "MINT_NFTS": {},
+}
+
+
 def creator_app_approval(nft_app_approval_program, nft_app_clear_program):
-    handle_noop = Cond(
-        [utility_checker(), Return(Int(1))],
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+    handle_noop = route(
+        (UTILITY, utility_checker, Int(1)),
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
         # * GROUP SIZE > 1
-        [
-            asset_optin_checker(),
-            Return(usdc_asset_optin()),
-        ],
-        [
-            create_asset_app_checker(),
-            Return(
-                create_asset_app(
-                    Bytes("base64", nft_app_approval_program),
-                    Bytes("base64", nft_app_clear_program),
-                )
+        (ASSET_OPTIN, asset_optin_checker, usdc_asset_optin()),
+        (
+            CREATE_ASSET_APP,
+            create_asset_app_checker,
+            create_asset_app(
+                Bytes("base64", nft_app_approval_program),
+                Bytes("base64", nft_app_clear_program),
             ),
-        ],
+        ),
+        (MINT_NFTS, mint_nfts_checker, mint_nfts()),
     )
 
     program = Cond(
@@ -159,13 +230,9 @@ def creator_app_approval(nft_app_approval_program, nft_app_clear_program):
         [Txn.on_completion() == OnComplete.CloseOut, Return(Int(1))],
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def creator_app_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
-
-def compile_program(client, source_code):
-    compile_response = client.compile(source_code)
-    return base64.b64decode(compile_response["result"])
+    return compile_application(program)
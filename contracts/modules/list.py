@@ -1,6 +1,11 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
+    asset_optin_checker,
+    bulk_sell_checker,
     change_admin_id_checker,
+    checkout_checker,
     purchase_nft_checker,
     revert_nft_checker,
     start_sell_checker,
@@ -9,25 +14,34 @@ from contracts.constants import (
     ADMIN_ID,
     ADMIN_ROLE,
     ALGO,
-    NEW_ADMIN_ID,
     NFT_ID,
     NFT_OWNER,
-    NFT_CREATOR,
     USDC,
-    PAYMENT_OPTION,
     ROLE,
-    ROYALTY,
-    USDC_ASSET_ID,
     PLATFORM_FEE,
     MODULE_NAME,
     LIST_MODULE,
-    NFT_PRICE,
+    LISTING,
+    USDC_ASSET_ID,
+)
+from contracts.abi import (
+    ASSET_OPTIN,
+    BULK_SELL,
+    CHANGE_ADMIN_ID,
+    CHECKOUT,
+    START_SELL,
+    PURCHASE_NFT,
+    REVERT_NFT,
+    reference,
 )
+from contracts.records import field
 from contracts.utility import (
-    set_global_txn,
-    pay_asset_txn,
-    pay_algo_txn,
+    set_listing_txn,
     del_global_txn,
+    pay_asset_txn,
+    settle_txn,
+    inner_asset_transaction,
+    payout_fields,
     _check_owner_role,
 )
 
@@ -43,56 +57,109 @@ def deploy_contract():
     )
 
 
+@Subroutine(TealType.none)
+def list_nft(nft_app_id, transfer, price, payment_option, platform_fee):
+    """
+    - lists the NFT of nft_app_id, which Gtxn[transfer] moves from the sender to
+      the NFT app, at price
+    """
+    _sender = Txn.sender()
+
+    nft_id = App.globalGetEx(nft_app_id, NFT_ID)
+    nft_owner = App.globalGetEx(nft_app_id, NFT_OWNER)
+    nft_app_address = AppParam.address(nft_app_id)
+
+    return Seq(
+        nft_id,
+        nft_owner,
+        nft_app_address,
+        Assert(Eq(_sender, nft_owner.value())),
+        Assert(
+            And(
+                Eq(Gtxn[transfer].type_enum(), TxnType.AssetTransfer),
+                Eq(Gtxn[transfer].sender(), _sender),
+                Eq(Gtxn[transfer].asset_receiver(), nft_app_address.value()),
+                Eq(Gtxn[transfer].xfer_asset(), nft_id.value()),
+                Eq(Gtxn[transfer].asset_amount(), Int(1)),
+            )
+        ),
+        set_listing_txn(
+            nft_app_id,
+            LIST_MODULE,
+            price,
+            platform_fee,
+            payment_option,
+        ),
+    )
+
+
 @Subroutine(TealType.uint64)
 def start_sell():
     _nft_price = Btoi(Txn.application_args[1])
     _payment_option = Btoi(Txn.application_args[2])
-    _nft_id = Txn.assets[0]
-    _sender = Txn.sender()
-    _nft_app_id = Txn.applications[1]
+    _nft_id = reference("START_SELL", "nft")
+    _nft_app_id = reference("START_SELL", "nft_app")
 
     admin_id = App.globalGet(ADMIN_ID)
     platform_fee = App.globalGetEx(admin_id, PLATFORM_FEE)
-    nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
-    nft_owner = App.globalGetEx(_nft_app_id, NFT_OWNER)
-
-    nft_app_address = AppParam.address(_nft_app_id)
 
     return Seq(
         platform_fee,
-        nft_id,
-        nft_owner,
-        nft_app_address,
-        Assert(Eq(_nft_id, nft_id.value())),
-        Assert(Eq(_sender, nft_owner.value())),
-        Assert(Eq(Gtxn[0].asset_receiver(), nft_app_address.value())),
-        Assert(Eq(Gtxn[0].xfer_asset(), nft_id.value())),
+        Assert(Eq(_nft_id, Gtxn[0].xfer_asset())),
         Assert(
             Or(
                 Eq(_payment_option, ALGO),
                 Eq(_payment_option, USDC),
             )
         ),
-        set_global_txn(
-            _nft_app_id,
-            LIST_MODULE,
-            NFT_PRICE,
-            Itob(_nft_price),
-            Itob(Int(1)),
+        list_nft(
+            _nft_app_id, Int(0), _nft_price, _payment_option, platform_fee.value()
         ),
-        set_global_txn(
-            _nft_app_id,
-            LIST_MODULE,
-            PLATFORM_FEE,
-            Itob(platform_fee.value()),
-            Itob(Int(1)),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def bulk_sell():
+    """
+    - lists one NFT per price: the i-th is the NFT of Txn.applications[i + 1],
+      moved to its NFT app by Gtxn[first_transfer + i]
+    """
+    _payment_option = Btoi(Txn.application_args[1])
+    _first_transfer = Btoi(Txn.application_args[2])
+    _prices = Txn.application_args[3]
+
+    admin_id = App.globalGet(ADMIN_ID)
+    platform_fee = App.globalGetEx(admin_id, PLATFORM_FEE)
+
+    # * uint64[]: a uint16 count, then 8 bytes per price
+    count = ExtractUint16(_prices, Int(0))
+    index = ScratchVar(TealType.uint64)
+
+    return Seq(
+        platform_fee,
+        Assert(Eq(Len(_prices), Add(Int(2), Mul(count, Int(8))))),
+        # * One NFT app per price; the admin app takes one of the foreign apps
+        Assert(Ge(count, Int(1))),
+        Assert(Lt(count, Txn.applications.length())),
+        Assert(
+            Or(
+                Eq(_payment_option, ALGO),
+                Eq(_payment_option, USDC),
+            )
         ),
-        set_global_txn(
-            _nft_app_id,
-            LIST_MODULE,
-            PAYMENT_OPTION,
-            Itob(_payment_option),
-            Itob(Int(1)),
+        For(
+            index.store(Int(0)),
+            Lt(index.load(), count),
+            index.store(Add(index.load(), Int(1))),
+        ).Do(
+            list_nft(
+                Txn.applications[Add(index.load(), Int(1))],
+                Add(_first_transfer, index.load()),
+                ExtractUint64(_prices, Add(Int(2), Mul(index.load(), Int(8)))),
+                _payment_option,
+                platform_fee.value(),
+            )
         ),
         Return(Int(1)),
     )
@@ -101,8 +168,8 @@ def start_sell():
 @Subroutine(TealType.uint64)
 def revert_nft():
     _sender = Txn.sender()
-    _nft_id = Txn.assets[0]
-    _nft_app_id = Txn.applications[1]
+    _nft_id = reference("REVERT_NFT", "nft")
+    _nft_app_id = reference("REVERT_NFT", "nft_app")
 
     nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
     nft_owner = App.globalGetEx(_nft_app_id, NFT_OWNER)
@@ -115,141 +182,251 @@ def revert_nft():
         pay_asset_txn(
             _nft_app_id, nft_owner.value(), nft_id.value(), Int(1), LIST_MODULE
         ),
-        set_global_txn(
-            _nft_app_id,
-            LIST_MODULE,
-            NFT_PRICE,
-            Itob(Int(0)),
-            Itob(Int(1)),
-        ),
+        del_global_txn(_nft_app_id, LIST_MODULE, LISTING),
         Return(Int(1)),
     )
 
 
-@Subroutine(TealType.uint64)
-def purchase_nft():
-    _sender = Txn.sender()
-    _nft_owner = Txn.accounts[1]
-    _nft_creator = Txn.accounts[2]
-    _admin_address = Txn.accounts[3]
-    _nft_id = Txn.assets[0]
-    _nft_app_id = Txn.applications[1]
+@Subroutine(TealType.none)
+def check_payment(payment_asset, receiver, amount):
+    """
+    - asserts Gtxn[0] pays amount of payment_asset (0 for ALGO) to receiver
+    """
+
+    return (
+        If(payment_asset)
+        .Then(
+            Assert(
+                And(
+                    Eq(Gtxn[0].type_enum(), TxnType.AssetTransfer),
+                    Eq(Gtxn[0].xfer_asset(), payment_asset),
+                    Eq(Gtxn[0].asset_receiver(), receiver),
+                    Eq(Gtxn[0].asset_amount(), amount),
+                )
+            )
+        )
+        .Else(
+            Assert(
+                And(
+                    Eq(Gtxn[0].type_enum(), TxnType.Payment),
+                    Eq(Gtxn[0].receiver(), receiver),
+                    Eq(Gtxn[0].amount(), amount),
+                )
+            )
+        )
+    )
 
-    admin_id = App.globalGet(ADMIN_ID)
 
-    platform_fee = App.globalGetEx(admin_id, PLATFORM_FEE)
-    nft_owner = App.globalGetEx(_nft_app_id, NFT_OWNER)
-    nft_price = App.globalGetEx(_nft_app_id, NFT_PRICE)
-    royalty = App.globalGetEx(_nft_app_id, ROYALTY)
-    nft_creator = App.globalGetEx(_nft_app_id, NFT_CREATOR)
-    nft_id = App.globalGetEx(_nft_app_id, NFT_ID)
-    payment_option = App.globalGetEx(_nft_app_id, PAYMENT_OPTION)
-    usdc_asset = App.globalGetEx(_nft_app_id, USDC_ASSET_ID)
-
-    admin_address = AppParam.address(admin_id)
-    nft_app_address = AppParam.address(_nft_app_id)
+@Subroutine(TealType.none)
+def settle_listing(
+    nft_app_id, nft_id, listing, buyer, nft_owner, nft_creator, admin_address, pay_out
+):
+    """
+    - splits the listing's price into the platform fee, the royalty and the
+      seller's proceeds and delivers the NFT to buyer
+    - the NFT app pays them out of the price it holds, or this app does when
+      pay_out is set
+    """
+    price = field("LISTING", listing, "price")
+    payment_asset = field("LISTING", listing, "payment_asset")
+    admin_id = App.globalGet(ADMIN_ID)
+    admin_app_address = AppParam.address(admin_id)
 
     royalty_fee = ScratchVar(TealType.uint64)
     fee_to_platform = ScratchVar(TealType.uint64)
     rest_amount = ScratchVar(TealType.uint64)
-    payment_amount = ScratchVar(TealType.uint64)
 
     return Seq(
-        admin_address,
-        nft_app_address,
-        platform_fee,
-        nft_owner,
-        nft_price,
-        royalty,
-        nft_creator,
-        nft_id,
-        payment_option,
-        usdc_asset,
-        royalty_fee.store(WideRatio([royalty.value(), nft_price.value()], [Int(100)])),
-        payment_amount.store(Int(0)),
+        admin_app_address,
+        royalty_fee.store(
+            WideRatio([field("LISTING", listing, "royalty"), price], [Int(100)])
+        ),
         fee_to_platform.store(
-            WideRatio([platform_fee.value(), nft_price.value()], [Int(100)])
+            WideRatio([field("LISTING", listing, "platform_fee"), price], [Int(100)])
         ),
         rest_amount.store(
-            Minus(nft_price.value(), Add(fee_to_platform.load(), royalty_fee.load()))
+            Minus(price, Add(fee_to_platform.load(), royalty_fee.load()))
         ),
-        Assert(Eq(_nft_creator, nft_creator.value())),
-        Assert(Eq(_nft_owner, nft_owner.value())),
-        Assert(Eq(_admin_address, admin_address.value())),
-        Assert(
-            Or(
-                Eq(Gtxn[0].receiver(), nft_app_address.value()),
-                Eq(Gtxn[0].asset_receiver(), nft_app_address.value()),
+        Assert(Eq(nft_creator, field("LISTING", listing, "creator"))),
+        Assert(Eq(nft_owner, field("LISTING", listing, "owner"))),
+        Assert(Eq(admin_address, admin_app_address.value())),
+        If(pay_out).Then(
+            Seq(
+                InnerTxnBuilder.Begin(),
+                payout_fields(payment_asset, admin_address, fee_to_platform.load()),
+                InnerTxnBuilder.Next(),
+                payout_fields(payment_asset, nft_creator, royalty_fee.load()),
+                InnerTxnBuilder.Next(),
+                payout_fields(payment_asset, nft_owner, rest_amount.load()),
+                InnerTxnBuilder.Submit(),
+                # * Left for the NFT app is the delivery of the NFT
+                fee_to_platform.store(Int(0)),
+                royalty_fee.store(Int(0)),
+                rest_amount.store(Int(0)),
             )
         ),
-        If(Eq(payment_option.value(), ALGO)).Then(
-            payment_amount.store(Gtxn[0].amount())
+        settle_txn(
+            nft_app_id,
+            LIST_MODULE,
+            nft_id,
+            payment_asset,
+            buyer,
+            nft_creator,
+            nft_owner,
+            admin_address,
+            fee_to_platform.load(),
+            royalty_fee.load(),
+            rest_amount.load(),
         ),
-        If(Eq(payment_option.value(), USDC)).Then(
-            Seq(
-                Assert(Eq(Gtxn[0].xfer_asset(), usdc_asset.value())),
-                payment_amount.store(Gtxn[0].asset_amount()),
-            )
+    )
+
+
+@Subroutine(TealType.uint64)
+def purchase_nft():
+    _sender = Txn.sender()
+    _nft_owner = reference("PURCHASE_NFT", "nft_owner")
+    _nft_creator = reference("PURCHASE_NFT", "nft_creator")
+    _admin_address = reference("PURCHASE_NFT", "admin_address")
+    _nft_id = reference("PURCHASE_NFT", "nft")
+    _nft_app_id = reference("PURCHASE_NFT", "nft_app")
+
+    # * One read for the whole listing; nft_app checks the NFT it delivers
+    listing = App.globalGetEx(_nft_app_id, LISTING)
+    nft_app_address = AppParam.address(_nft_app_id)
+
+    return Seq(
+        listing,
+        nft_app_address,
+        Assert(listing.hasValue()),
+        check_payment(
+            field("LISTING", listing.value(), "payment_asset"),
+            nft_app_address.value(),
+            field("LISTING", listing.value(), "price"),
         ),
-        Assert(Eq(payment_amount.load(), nft_price.value())),
-        Assert(Eq(_nft_id, nft_id.value())),
-        If(Eq(payment_option.value(), ALGO)).Then(
+        settle_listing(
+            _nft_app_id,
+            _nft_id,
+            listing.value(),
+            _sender,
+            _nft_owner,
+            _nft_creator,
+            _admin_address,
+            Int(0),
+        ),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def checkout():
+    """
+    - buys one listing of a cart: Gtxn[0] pays the whole cart to this app and
+      every later transaction of the group is a checkout call of the buyer, one
+      per listing, carrying the price it expects
+    - the first call checks the group and the payment once, every call pays its
+      listing out of the cart
+    """
+    _price = Btoi(Txn.application_args[1])
+    _sender = Txn.sender()
+    _nft_owner = reference("CHECKOUT", "nft_owner")
+    _nft_creator = reference("CHECKOUT", "nft_creator")
+    _admin_address = reference("CHECKOUT", "admin_address")
+    _nft_id = reference("CHECKOUT", "nft")
+    _nft_app_id = reference("CHECKOUT", "nft_app")
+
+    listing = App.globalGetEx(_nft_app_id, LISTING)
+    payment_asset = field("LISTING", listing.value(), "payment_asset")
+
+    index = ScratchVar(TealType.uint64)
+    total = ScratchVar(TealType.uint64)
+
+    return Seq(
+        listing,
+        Assert(listing.hasValue()),
+        Assert(Eq(_price, field("LISTING", listing.value(), "price"))),
+        If(Eq(Txn.group_index(), Int(1)))
+        .Then(
             Seq(
-                pay_algo_txn(
-                    _nft_app_id, _admin_address, fee_to_platform.load(), LIST_MODULE
-                ),
-                pay_algo_txn(
-                    _nft_app_id, _nft_creator, royalty_fee.load(), LIST_MODULE
-                ),
-                pay_algo_txn(_nft_app_id, _nft_owner, rest_amount.load(), LIST_MODULE),
-                pay_asset_txn(
-                    _nft_app_id, _sender, nft_id.value(), Int(1), LIST_MODULE
+                # * Each checkout asserts its own price, so the prices the calls
+                # * carry add up to what the cart costs; a transaction other
+                # * than an app call has no application_id
+                total.store(Int(0)),
+                For(
+                    index.store(Int(1)),
+                    Lt(index.load(), Global.group_size()),
+                    index.store(Add(index.load(), Int(1))),
+                ).Do(
+                    Seq(
+                        Assert(
+                            And(
+                                Eq(
+                                    Gtxn[index.load()].application_id(),
+                                    Global.current_application_id(),
+                                ),
+                                Eq(
+                                    Gtxn[index.load()].on_completion(),
+                                    OnComplete.NoOp,
+                                ),
+                                Eq(Gtxn[index.load()].application_args[0], CHECKOUT),
+                                Eq(Gtxn[index.load()].sender(), _sender),
+                            )
+                        ),
+                        total.store(
+                            Add(
+                                total.load(),
+                                Btoi(Gtxn[index.load()].application_args[1]),
+                            )
+                        ),
+                    )
                 ),
             )
-        ),
-        If(Eq(payment_option.value(), USDC)).Then(
+        )
+        .Else(
             Seq(
-                pay_asset_txn(
-                    _nft_app_id,
-                    _admin_address,
-                    usdc_asset.value(),
-                    fee_to_platform.load(),
-                    LIST_MODULE,
-                ),
-                pay_asset_txn(
-                    _nft_app_id,
-                    _nft_creator,
-                    usdc_asset.value(),
-                    royalty_fee.load(),
-                    LIST_MODULE,
+                # * The first call checked the whole group, so only the asset
+                # * of the payment is left to match this listing
+                Assert(
+                    And(
+                        Eq(Gtxn[1].application_id(), Global.current_application_id()),
+                        Eq(Gtxn[1].on_completion(), OnComplete.NoOp),
+                        Eq(Gtxn[1].application_args[0], CHECKOUT),
+                    )
                 ),
-                pay_asset_txn(
-                    _nft_app_id,
-                    _nft_owner,
-                    usdc_asset.value(),
-                    rest_amount.load(),
-                    LIST_MODULE,
-                ),
-                pay_asset_txn(
-                    _nft_app_id, _sender, nft_id.value(), Int(1), LIST_MODULE
+                total.store(
+                    If(payment_asset, Gtxn[0].asset_amount(), Gtxn[0].amount())
                 ),
             )
         ),
-        set_global_txn(
-            _nft_app_id,
-            LIST_MODULE,
-            NFT_PRICE,
-            Itob(Int(0)),
-            Itob(Int(1)),
+        check_payment(
+            payment_asset, Global.current_application_address(), total.load()
         ),
-        set_global_txn(
+        settle_listing(
             _nft_app_id,
-            LIST_MODULE,
-            NFT_OWNER,
+            _nft_id,
+            listing.value(),
             _sender,
-            Itob(Int(0)),
+            _nft_owner,
+            _nft_creator,
+            _admin_address,
+            Int(1),
+        ),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def usdc_asset_optin():
+    _usdc_asset_id = reference("ASSET_OPTIN", "asset")
+
+    admin_id = App.globalGet(ADMIN_ID)
+    usdc_asset_id = App.globalGetEx(admin_id, USDC_ASSET_ID)
+
+    return Seq(
+        usdc_asset_id,
+        Assert(Eq(_usdc_asset_id, usdc_asset_id.value())),
+        inner_asset_transaction(
+            Global.current_application_address(), _usdc_asset_id, Int(0)
         ),
-        del_global_txn(_nft_app_id, LIST_MODULE, PAYMENT_OPTION),
         Return(Int(1)),
     )
 
@@ -257,15 +434,15 @@ def purchase_nft():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        App.globalPut(ADMIN_ID, _new_admin_id),
         Return(Int(1)),
     )
 
@@ -276,26 +453,30 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by list_approval with the references their calls hold
+# * besides the arguments, exported to list_contract.json
+LIST_METHODS = {
+    "REVERT_NFT": {},
+    "CHANGE_ADMIN_ID": {},
+    "START_SELL": {},
+    "BULK_SELL": {"applications": ["nft_app of each price, in order"]},
+    "PURCHASE_NFT": {},
+    "CHECKOUT": {"assets": ["usdc, for a cart paid in USDC"]},
+    "ASSET_OPTIN": {},
+}
+
+
 def list_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group transaction === 1
-        [
-            revert_nft_checker(),
-            Return(revert_nft()),
-        ],
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+        (REVERT_NFT, revert_nft_checker, revert_nft()),
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
         # * Group transaction >= 1
-        [
-            start_sell_checker(),
-            Return(start_sell()),
-        ],
-        [
-            purchase_nft_checker(),
-            Return(purchase_nft()),
-        ],
+        (START_SELL, start_sell_checker, start_sell()),
+        (BULK_SELL, bulk_sell_checker, bulk_sell()),
+        (PURCHASE_NFT, purchase_nft_checker, purchase_nft()),
+        (CHECKOUT, checkout_checker, checkout()),
+        (ASSET_OPTIN, asset_optin_checker, usdc_asset_optin()),
     )
 
     program = Cond(
@@ -311,9 +492,9 @@ def list_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def list_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,29 +1,49 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
-    change_admin_id_checker,
     del_global_checker,
     opt_in_assets_checker,
     pay_algo_checker,
     pay_asset_checker,
-    set_global_checker,
+    set_listing_checker,
+    set_auction_checker,
+    settle_checker,
+    reset_auction_checker,
+    bid_checker,
 )
 from contracts.constants import (
     ADMIN_ID,
     CREATOR_ADDRESS,
-    NEW_ADMIN_ID,
     NFT_ID,
     NFT_OWNER,
     NFT_CREATOR,
     ROYALTY,
     USDC_ASSET_ID,
-    CURRENT_BID,
-    BIDDER_WINNER,
+    LISTING,
+    AUCTION,
     ADMIN_ROLE,
     ROLE,
+    USDC,
 )
+from contracts.abi import (
+    DEL_GLOBAL,
+    PAY_ALGO,
+    PAY_ASSET,
+    SET_LISTING,
+    SET_AUCTION,
+    SETTLE,
+    RESET_AUCTION,
+    BID,
+    OPT_IN_ASSETS,
+    decode_bytes,
+    reference,
+)
+from contracts.records import field, pack, replace
 from contracts.utility import (
-    send_asset_txn,
+    inner_asset_transaction,
     inner_payment_transaction,
+    payout_fields,
     _check_owner_role,
 )
 
@@ -78,9 +98,9 @@ def deploy_contract():
 
 @Subroutine(TealType.uint64)
 def opt_in_assets():
-    _nft_id = Txn.assets[0]
-    _usdc_asset = Txn.assets[1]
-    _admin_id = Txn.applications[1]
+    _nft_id = reference("OPT_IN_ASSETS", "nft")
+    _usdc_asset = reference("OPT_IN_ASSETS", "usdc")
+    _admin_id = reference("OPT_IN_ASSETS", "admin")
 
     app_address = Global.current_application_address()
     nft_id = App.globalGet(NFT_ID)
@@ -121,24 +141,22 @@ def delete_app():
     _sender = Txn.sender()
 
     admin_id = App.globalGet(ADMIN_ID)
-    bid_amount = App.globalGet(CURRENT_BID)
-    bidder_winner = App.globalGet(BIDDER_WINNER)
+    auction = App.globalGetEx(Global.current_application_id(), AUCTION)
+    current_bid = field("AUCTION", auction.value(), "current_bid")
 
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
+        auction,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        If(Gt(bid_amount, Int(0))).Then(
+        If(And(auction.hasValue(), Gt(current_bid, Int(0)))).Then(
             Seq(
                 InnerTxnBuilder.Begin(),
-                InnerTxnBuilder.SetFields(
-                    {
-                        TxnField.type_enum: TxnType.Payment,
-                        TxnField.amount: bid_amount,
-                        TxnField.receiver: bidder_winner,
-                        TxnField.fee: Int(0),
-                    }
+                payout_fields(
+                    field("AUCTION", auction.value(), "payment_asset"),
+                    field("AUCTION", auction.value(), "bidder"),
+                    current_bid,
                 ),
                 InnerTxnBuilder.Submit(),
             )
@@ -150,9 +168,9 @@ def delete_app():
 @Subroutine(TealType.uint64)
 def pay_algo():
     _sender_id = Global.caller_app_id()
-    _module_name = Txn.application_args[1]
-    _admin_id = Txn.applications[1]
-    _beneficiary = Txn.accounts[1]
+    _module_name = decode_bytes(Txn.application_args[1])
+    _admin_id = reference("PAY_ALGO", "admin")
+    _beneficiary = reference("PAY_ALGO", "beneficiary")
     _amount = Btoi(Txn.application_args[2])
 
     admin_id = App.globalGet(ADMIN_ID)
@@ -171,8 +189,11 @@ def pay_algo():
 @Subroutine(TealType.uint64)
 def pay_asset():
     _sender_id = Global.caller_app_id()
-    _module_name = Txn.application_args[1]
-    _admin_id = Txn.applications[1]
+    _module_name = decode_bytes(Txn.application_args[1])
+    _amount = Btoi(Txn.application_args[2])
+    _beneficiary = reference("PAY_ASSET", "beneficiary")
+    _asset_id = reference("PAY_ASSET", "asset")
+    _admin_id = reference("PAY_ASSET", "admin")
 
     admin_id = App.globalGet(ADMIN_ID)
     module_id = App.globalGetEx(admin_id, _module_name)
@@ -182,19 +203,19 @@ def pay_asset():
         Assert(Eq(_admin_id, admin_id)),
         Assert(Neq(_sender_id, Int(0))),
         Assert(Eq(_sender_id, module_id.value())),
-        send_asset_txn(),
+        inner_asset_transaction(_beneficiary, _asset_id, _amount),
         Return(Int(1)),
     )
 
 
 @Subroutine(TealType.uint64)
-def set_global():
+def set_listing():
     _sender_id = Global.caller_app_id()
-    _module_name = Txn.application_args[1]
-    _global_name = Txn.application_args[2]
-    _global_value = Txn.application_args[3]
-    _global_int = Btoi(Txn.application_args[4])
-    _admin_id = Txn.applications[1]
+    _module_name = decode_bytes(Txn.application_args[1])
+    _price = Btoi(Txn.application_args[2])
+    _platform_fee = Btoi(Txn.application_args[3])
+    _payment_option = Btoi(Txn.application_args[4])
+    _admin_id = reference("SET_LISTING", "admin")
 
     admin_id = App.globalGet(ADMIN_ID)
     module_id = App.globalGetEx(admin_id, _module_name)
@@ -204,24 +225,36 @@ def set_global():
         Assert(Eq(_admin_id, admin_id)),
         Assert(Neq(_sender_id, Int(0))),
         Assert(Eq(_sender_id, module_id.value())),
-        # * If the global_int is 0 the value is in bytes otherwise is a number
-        If(Eq(_global_int, Int(0)))
-        .Then(
-            App.globalPut(_global_name, _global_value),
-        )
-        .Else(
-            App.globalPut(_global_name, Btoi(_global_value)),
+        App.globalPut(
+            LISTING,
+            pack(
+                "LISTING",
+                {
+                    "price": _price,
+                    "platform_fee": _platform_fee,
+                    "payment_asset": If(Eq(_payment_option, USDC))
+                    .Then(App.globalGet(USDC_ASSET_ID))
+                    .Else(Int(0)),
+                    "royalty": App.globalGet(ROYALTY),
+                    "owner": App.globalGet(NFT_OWNER),
+                    "creator": App.globalGet(NFT_CREATOR),
+                },
+            ),
         ),
         Return(Int(1)),
     )
 
 
 @Subroutine(TealType.uint64)
-def remove_global():
+def set_auction():
     _sender_id = Global.caller_app_id()
-    _module_name = Txn.application_args[1]
-    _global_name = Txn.application_args[2]
-    _admin_id = Txn.applications[1]
+    _module_name = decode_bytes(Txn.application_args[1])
+    _start = Btoi(Txn.application_args[2])
+    _end = Btoi(Txn.application_args[3])
+    _min_bid_increment = Btoi(Txn.application_args[4])
+    _payment_option = Btoi(Txn.application_args[5])
+    _start_price = Btoi(Txn.application_args[6])
+    _admin_id = reference("SET_AUCTION", "admin")
 
     admin_id = App.globalGet(ADMIN_ID)
     module_id = App.globalGetEx(admin_id, _module_name)
@@ -231,23 +264,208 @@ def remove_global():
         Assert(Eq(_admin_id, admin_id)),
         Assert(Neq(_sender_id, Int(0))),
         Assert(Eq(_sender_id, module_id.value())),
-        App.globalDel(_global_name),
+        App.globalPut(
+            AUCTION,
+            pack(
+                "AUCTION",
+                {
+                    "start": _start,
+                    "end": _end,
+                    "min_bid_increment": _min_bid_increment,
+                    "start_price": _start_price,
+                    "payment_asset": If(Eq(_payment_option, USDC))
+                    .Then(App.globalGet(USDC_ASSET_ID))
+                    .Else(Int(0)),
+                    "current_bid": Int(0),
+                    "bidder": Global.zero_address(),
+                },
+            ),
+        ),
         Return(Int(1)),
     )
 
 
 @Subroutine(TealType.uint64)
-def change_admin_id():
-    _sender = Txn.sender()
+def settle():
+    _sender_id = Global.caller_app_id()
+    _module_name = decode_bytes(Txn.application_args[1])
+    _payment_asset = Btoi(Txn.application_args[2])
+    _fee_to_platform = Btoi(Txn.application_args[3])
+    _royalty_fee = Btoi(Txn.application_args[4])
+    _seller_amount = Btoi(Txn.application_args[5])
+    _buyer = reference("SETTLE", "buyer")
+    _nft_creator = reference("SETTLE", "nft_creator")
+    _nft_owner = reference("SETTLE", "nft_owner")
+    _admin_address = reference("SETTLE", "admin_address")
+    _admin_id = reference("SETTLE", "admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
-    sender_role = App.localGetEx(_sender, admin_id, ROLE)
+    nft_id = App.globalGet(NFT_ID)
+    usdc_asset = App.globalGet(USDC_ASSET_ID)
+    nft_owner = App.globalGet(NFT_OWNER)
+    module_id = App.globalGetEx(admin_id, _module_name)
+    admin_address = AppParam.address(admin_id)
+    listing = App.globalGetEx(Global.current_application_id(), LISTING)
+    auction = App.globalGetEx(Global.current_application_id(), AUCTION)
 
     return Seq(
-        sender_role,
-        Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        module_id,
+        admin_address,
+        listing,
+        auction,
+        Assert(Eq(_admin_id, admin_id)),
+        Assert(Neq(_sender_id, Int(0))),
+        Assert(Eq(_sender_id, module_id.value())),
+        # * A sale closes exactly one record, so settling a listing never drops
+        # * an auction holding a bid
+        Assert(Neq(listing.hasValue(), auction.hasValue())),
+        Assert(Eq(_nft_creator, App.globalGet(NFT_CREATOR))),
+        # * Only referenced so the proceeds can reach the owner
+        Assert(Eq(_nft_owner, nft_owner)),
+        Assert(Eq(_admin_address, admin_address.value())),
+        Assert(Or(Eq(_payment_asset, Int(0)), Eq(_payment_asset, usdc_asset))),
+        # * Platform fee, royalty, seller proceeds and the NFT in one inner group;
+        # * a module paying them out itself settles with all three at 0
+        InnerTxnBuilder.Begin(),
+        If(Or(_fee_to_platform, _royalty_fee, _seller_amount)).Then(
+            Seq(
+                payout_fields(_payment_asset, _admin_address, _fee_to_platform),
+                InnerTxnBuilder.Next(),
+                payout_fields(_payment_asset, _nft_creator, _royalty_fee),
+                InnerTxnBuilder.Next(),
+                payout_fields(_payment_asset, nft_owner, _seller_amount),
+                InnerTxnBuilder.Next(),
+            )
+        ),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.AssetTransfer,
+                TxnField.xfer_asset: nft_id,
+                TxnField.asset_amount: Int(1),
+                TxnField.asset_receiver: _buyer,
+                TxnField.fee: Int(0),
+            }
+        ),
+        InnerTxnBuilder.Submit(),
+        # * Closes whichever sale was running
+        App.globalPut(NFT_OWNER, _buyer),
+        App.globalDel(LISTING),
+        App.globalDel(AUCTION),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def reset_auction():
+    _sender_id = Global.caller_app_id()
+    _module_name = decode_bytes(Txn.application_args[1])
+    _nft_owner = reference("RESET_AUCTION", "nft_owner")
+    _admin_id = reference("RESET_AUCTION", "admin")
+
+    admin_id = App.globalGet(ADMIN_ID)
+    module_id = App.globalGetEx(admin_id, _module_name)
+
+    return Seq(
+        module_id,
+        Assert(Eq(_admin_id, admin_id)),
+        Assert(Neq(_sender_id, Int(0))),
+        Assert(Eq(_sender_id, module_id.value())),
+        Assert(Eq(_nft_owner, App.globalGet(NFT_OWNER))),
+        # * An auction closed without a winner gives the NFT back to its owner
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.AssetTransfer,
+                TxnField.xfer_asset: App.globalGet(NFT_ID),
+                TxnField.asset_amount: Int(1),
+                TxnField.asset_receiver: _nft_owner,
+                TxnField.fee: Int(0),
+            }
+        ),
+        InnerTxnBuilder.Submit(),
+        App.globalDel(AUCTION),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def bid():
+    _sender_id = Global.caller_app_id()
+    _module_name = decode_bytes(Txn.application_args[1])
+    _bid_asset = Btoi(Txn.application_args[2])
+    _bid_amount = Btoi(Txn.application_args[3])
+    _bidder = reference("BID", "bidder")
+    _previous_bidder = reference("BID", "previous_bidder")
+    _admin_id = reference("BID", "admin")
+
+    admin_id = App.globalGet(ADMIN_ID)
+    module_id = App.globalGetEx(admin_id, _module_name)
+    auction = App.globalGetEx(Global.current_application_id(), AUCTION)
+    current_bid = field("AUCTION", auction.value(), "current_bid")
+
+    return Seq(
+        module_id,
+        auction,
+        Assert(Eq(_admin_id, admin_id)),
+        Assert(Neq(_sender_id, Int(0))),
+        Assert(Eq(_sender_id, module_id.value())),
+        Assert(auction.hasValue()),
+        Assert(Eq(_bid_asset, field("AUCTION", auction.value(), "payment_asset"))),
+        Assert(
+            Ge(Global.latest_timestamp(), field("AUCTION", auction.value(), "start"))
+        ),
+        Assert(Lt(Global.latest_timestamp(), field("AUCTION", auction.value(), "end"))),
+        Assert(
+            Ge(
+                _bid_amount,
+                Add(
+                    current_bid,
+                    field("AUCTION", auction.value(), "min_bid_increment"),
+                ),
+            )
+        ),
+        Assert(Neq(_bid_amount, Int(0))),
+        Assert(Ge(_bid_amount, field("AUCTION", auction.value(), "start_price"))),
+        # * The bid being beaten goes back to its bidder
+        If(Gt(current_bid, Int(0))).Then(
+            Seq(
+                Assert(
+                    Eq(_previous_bidder, field("AUCTION", auction.value(), "bidder"))
+                ),
+                InnerTxnBuilder.Begin(),
+                payout_fields(_bid_asset, _previous_bidder, current_bid),
+                InnerTxnBuilder.Submit(),
+            )
+        ),
+        App.globalPut(
+            AUCTION,
+            replace(
+                "AUCTION",
+                replace("AUCTION", auction.value(), "current_bid", _bid_amount),
+                "bidder",
+                _bidder,
+            ),
+        ),
+        Return(Int(1)),
+    )
+
+
+@Subroutine(TealType.uint64)
+def remove_global():
+    _sender_id = Global.caller_app_id()
+    _module_name = decode_bytes(Txn.application_args[1])
+    _global_name = decode_bytes(Txn.application_args[2])
+    _admin_id = reference("DEL_GLOBAL", "admin")
+
+    admin_id = App.globalGet(ADMIN_ID)
+    module_id = App.globalGetEx(admin_id, _module_name)
+
+    return Seq(
+        module_id,
+        Assert(Eq(_admin_id, admin_id)),
+        Assert(Neq(_sender_id, Int(0))),
+        Assert(Eq(_sender_id, module_id.value())),
+        App.globalDel(_global_name),
         Return(Int(1)),
     )
 
@@ -258,34 +476,34 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by nft_app_approval with the references their calls hold
+# * besides the arguments, exported to nft_app_contract.json
+NFT_APP_METHODS = {
+    "PAY_ALGO": {},
+    "PAY_ASSET": {},
+    "SET_LISTING": {},
+    "SET_AUCTION": {},
+    "SETTLE": {"assets": ["nft", "payment_asset, for a sale in USDC"]},
+    "RESET_AUCTION": {"assets": ["nft"]},
+    "BID": {"assets": ["bid_asset, for a bid in USDC"]},
+    "DEL_GLOBAL": {},
+    "OPT_IN_ASSETS": {},
+}
+
+
 def nft_app_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group transaction = 1
-        [
-            set_global_checker(),
-            Return(set_global()),
-        ],
-        [
-            pay_algo_checker(),
-            Return(pay_algo()),
-        ],
-        [
-            pay_asset_checker(),
-            Return(pay_asset()),
-        ],
-        [
-            del_global_checker(),
-            Return(remove_global()),
-        ],
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+        (PAY_ALGO, pay_algo_checker, pay_algo()),
+        (PAY_ASSET, pay_asset_checker, pay_asset()),
+        (SET_LISTING, set_listing_checker, set_listing()),
+        (SET_AUCTION, set_auction_checker, set_auction()),
+        (SETTLE, settle_checker, settle()),
+        (RESET_AUCTION, reset_auction_checker, reset_auction()),
+        (BID, bid_checker, bid()),
+        (DEL_GLOBAL, del_global_checker, remove_global()),
         # * Group transaction > 1
-        [
-            opt_in_assets_checker(),
-            Return(opt_in_assets()),
-        ],
+        (OPT_IN_ASSETS, opt_in_assets_checker, opt_in_assets()),
     )
 
     program = Cond(
@@ -302,9 +520,9 @@ def nft_app_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def nft_app_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.teal import compile_application
 from contracts.constants import *
 from contracts.utility import (
     inner_contract_payment_transaction,
@@ -113,9 +114,9 @@ def nft_hub_approval():
         [Txn.on_completion() == OnComplete.NoOp, handle_noop],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def nft_hub_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
     change_admin_id_checker,
     decrease_rewards_checker,
@@ -11,7 +13,6 @@ from contracts.constants import (
     ADMIN_ID,
     ADMIN_ROLE,
     FEES_TO_PAY,
-    NEW_ADMIN_ID,
     REWARDS_AMOUNT,
     ROLE,
     MODULE_NAME,
@@ -20,6 +21,15 @@ from contracts.constants import (
     REWARD_MODULE,
     NIFTGEN_ASSET,
 )
+from contracts.abi import (
+    ASSET_OPTIN,
+    CHANGE_ADMIN_ID,
+    EMERGENCY_WITHDRAW,
+    INCREASE_REWARDS,
+    DECREASE_REWARDS,
+    GET_PENDING_REWARDS,
+    reference,
+)
 from contracts.utility import (
     inner_asset_transaction,
     _check_owner_role,
@@ -84,15 +94,15 @@ def optin():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        App.globalPut(ADMIN_ID, _new_admin_id),
         Return(Int(1)),
     )
 
@@ -100,7 +110,7 @@ def change_admin_id():
 @Subroutine(TealType.uint64)
 def optin_niftgen_asset():
     _sender = Txn.sender()
-    _niftgen_asset = Txn.assets[0]
+    _niftgen_asset = reference("ASSET_OPTIN", "asset")
 
     admin_id = App.globalGet(ADMIN_ID)
     niftgen_asset = App.globalGetEx(admin_id, NIFTGEN_ASSET)
@@ -121,8 +131,8 @@ def optin_niftgen_asset():
 @Subroutine(TealType.uint64)
 def emergency_withdraw():
     _sender = Txn.sender()
-    _beneficiary = Txn.accounts[1]
-    _asset_id = Txn.assets[0]
+    _beneficiary = reference("EMERGENCY_WITHDRAW", "beneficiary")
+    _asset_id = reference("EMERGENCY_WITHDRAW", "asset")
 
     admin_id = App.globalGet(ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
@@ -142,7 +152,7 @@ def emergency_withdraw():
 @Subroutine(TealType.uint64)
 def increase_rewards():
     _sender = Txn.sender()
-    _beneficiary = Txn.accounts[1]
+    _beneficiary = reference("INCREASE_REWARDS", "beneficiary")
     _amount = Btoi(Txn.application_args[1])
 
     admin_id = App.globalGet(ADMIN_ID)
@@ -165,7 +175,7 @@ def increase_rewards():
 @Subroutine(TealType.uint64)
 def decrease_rewards():
     _sender = Txn.sender()
-    _beneficiary = Txn.accounts[1]
+    _beneficiary = reference("DECREASE_REWARDS", "beneficiary")
     _amount = Btoi(Txn.application_args[1])
 
     admin_id = App.globalGet(ADMIN_ID)
@@ -186,7 +196,7 @@ def decrease_rewards():
 def get_pending_rewards():
     _sender = Txn.sender()
     _amount = Btoi(Txn.application_args[1])
-    _asset_id = Txn.assets[0]
+    _asset_id = reference("GET_PENDING_REWARDS", "asset")
 
     rewards_amount = App.localGet(_sender, REWARDS_AMOUNT)
     fees_to_pay = App.localGet(_sender, FEES_TO_PAY)
@@ -218,31 +228,28 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by rewards_module_approval with the references their
+# * calls hold besides the arguments, exported to rewards_module_contract.json
+REWARDS_MODULE_METHODS = {
+    "CHANGE_ADMIN_ID": {},
+    "EMERGENCY_WITHDRAW": {},
+    "INCREASE_REWARDS": {},
+    "DECREASE_REWARDS": {},
+    "GET_PENDING_REWARDS": {},
+    "ASSET_OPTIN": {},
+}
+
+
 def rewards_module_approval():
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group transaction === 1
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
-        [
-            emergency_withdraw_checker(),
-            Return(emergency_withdraw()),
-        ],
-        [
-            increase_rewards_checker(),
-            Return(increase_rewards()),
-        ],
-        [
-            decrease_rewards_checker(),
-            Return(decrease_rewards()),
-        ],
-        [
-            get_pending_rewards_checker(),
-            Return(get_pending_rewards()),
-        ],
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
+        (EMERGENCY_WITHDRAW, emergency_withdraw_checker, emergency_withdraw()),
+        (INCREASE_REWARDS, increase_rewards_checker, increase_rewards()),
+        (DECREASE_REWARDS, decrease_rewards_checker, decrease_rewards()),
+        (GET_PENDING_REWARDS, get_pending_rewards_checker, get_pending_rewards()),
         # * Group transaction >= 1
-        [optin_niftgen_asset_checker(), Return(optin_niftgen_asset())],
+        (ASSET_OPTIN, optin_niftgen_asset_checker, optin_niftgen_asset()),
     )
 
     program = Cond(
@@ -259,9 +266,9 @@ def rewards_module_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def rewards_module_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import (
     change_admin_id_checker,
     asset_optin_checker,
@@ -7,6 +9,14 @@ from contracts.checkers import (
     renew_checker,
 )
 from contracts.constants import *
+from contracts.abi import (
+    ASSET_OPTIN,
+    CHANGE_ADMIN_ID,
+    UTILITY,
+    SUBSCRIBE,
+    RENEW_SUBSCRIPTION,
+    reference,
+)
 from contracts.utility import (
     _check_owner_role,
     _check_admin_role,
@@ -35,12 +45,14 @@ def deploy_contract():
 @Subroutine(TealType.uint64)
 def usdc_asset_optin():
     _sender = Txn.sender()
+    _usdc_asset_id = reference("ASSET_OPTIN", "asset")
 
     usdc_asset_id = App.globalGet(USDC_ASSET_ID)
     creator_address = Global.creator_address()
 
     return Seq(
         Assert(Eq(_sender, creator_address)),
+        Assert(Eq(_usdc_asset_id, usdc_asset_id)),
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields(
             {
@@ -59,15 +71,15 @@ def usdc_asset_optin():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        App.globalPut(ADMIN_ID, _new_admin_id),
         Return(Int(1)),
     )
 
@@ -93,7 +105,7 @@ def subscribe_creator():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
 
     admin_id = App.globalGet(ADMIN_ID)
     admin_address = AppParam.address(admin_id)
@@ -156,7 +168,7 @@ def renew_creator():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
 
     admin_id = App.globalGet(ADMIN_ID)
     admin_address = AppParam.address(admin_id)
@@ -211,7 +223,7 @@ def subscribe_with_referral():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
     _referral_creator_address = Gtxn[2].accounts[2]
 
     admin_id = App.globalGet(ADMIN_ID)
@@ -284,7 +296,7 @@ def renew_with_referral():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
     _referral_creator_address = Gtxn[2].accounts[2]
 
     admin_id = App.globalGet(ADMIN_ID)
@@ -349,7 +361,7 @@ def subscribe_platform():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
 
     admin_id = App.globalGet(ADMIN_ID)
     admin_address = AppParam.address(admin_id)
@@ -412,7 +424,7 @@ def renew_platform():
     _payment_type = Btoi(Gtxn[2].application_args[1])
     _amount_to_receive = Btoi(Gtxn[2].application_args[2])
     _new_expires_date = Btoi(Gtxn[2].application_args[3])
-    _creator_pool_address = Gtxn[2].accounts[1]
+    _creator_pool_address = reference("UTILITY", "creator_pool", Gtxn[2])
 
     admin_id = App.globalGet(ADMIN_ID)
     admin_address = AppParam.address(admin_id)
@@ -506,26 +518,25 @@ def update_app():
     return Seq(_check_owner_role(), Return(Int(1)))
 
 
+# * ARC-4 methods routed by subscription_app_approval with the references their
+# * calls hold besides the arguments, exported to subscription_app_contract.json
+SUBSCRIPTION_APP_METHODS = {
+    "UTILITY": {"accounts": ["referral_creator, for a referral"]},
+    "CHANGE_ADMIN_ID": {},
+    "ASSET_OPTIN": {},
+    "RENEW_SUBSCRIPTION": {},
+    "SUBSCRIBE": {},
+}
+
+
 def subscription_app_approval():
-    handle_noop = Cond(
-        [utility_checker(), Return(Int(1))],
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+    handle_noop = route(
+        (UTILITY, utility_checker, Int(1)),
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
         # * GROUP SIZE > 1
-        [
-            asset_optin_checker(),
-            Return(usdc_asset_optin()),
-        ],
-        [
-            renew_checker(),
-            Return(renew()),
-        ],
-        [
-            subscribe_checker(),
-            Return(subscribe()),
-        ],
+        (ASSET_OPTIN, asset_optin_checker, usdc_asset_optin()),
+        (RENEW_SUBSCRIPTION, renew_checker, renew()),
+        (SUBSCRIBE, subscribe_checker, subscribe()),
     )
 
     program = Cond(
@@ -535,9 +546,9 @@ def subscription_app_approval():
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
         [Txn.on_completion() == OnComplete.CloseOut, Return(Int(1))],
     )
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def subscription_app_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
@@ -1,22 +1,38 @@
 from pyteal import *
+from contracts.teal import compile_application
+from contracts.router import route
 from contracts.checkers import change_admin_id_checker, deploy_subscription_app_checker
 
 from contracts.constants import (
     ADMIN_ID,
     ADMIN_ROLE,
-    NEW_ADMIN_ID,
     ROLE,
     MODULE_NAME,
     SUBSCRIPTION_MODULE,
-    ASSET_OPTIN,
     SUBSCRIPTION_APP_ID,
     USDC_ASSET_ID,
 )
+from contracts.abi import (
+    ASSET_OPTIN,
+    CHANGE_ADMIN_ID,
+    DEPLOY_SUBSCRIPTION_APP,
+    reference,
+    reference_args,
+)
 from contracts.utility import (
     _check_owner_role,
     inner_contract_payment_transaction,
 )
 
+# * State schema and extra pages of every subscription app deployed by this module
+SUBSCRIPTION_APP_SCHEMA = {
+    "global_num_uints": 2,
+    "global_num_byte_slices": 2,
+    "local_num_uints": 5,
+    "local_num_byte_slices": 1,
+    "extra_program_pages": 1,
+}
+
 
 @Subroutine(TealType.uint64)
 def deploy_contract():
@@ -47,15 +63,15 @@ def optin():
 @Subroutine(TealType.uint64)
 def change_admin_id():
     _sender = Txn.sender()
+    _new_admin_id = reference("CHANGE_ADMIN_ID", "new_admin")
 
     admin_id = App.globalGet(ADMIN_ID)
-    new_admin_id = App.globalGet(NEW_ADMIN_ID)
     sender_role = App.localGetEx(_sender, admin_id, ROLE)
 
     return Seq(
         sender_role,
         Assert(Eq(sender_role.value(), ADMIN_ROLE)),
-        App.globalPut(ADMIN_ID, new_admin_id),
+        App.globalPut(ADMIN_ID, _new_admin_id),
         Return(Int(1)),
     )
 
@@ -89,11 +105,21 @@ def deploy_subscription_app(
                 TxnField.accounts: [_subscription_owner],
                 TxnField.assets: [usdc_asset_id.value()],
                 TxnField.fee: Int(0),
-                TxnField.local_num_uints: Int(5),
-                TxnField.local_num_byte_slices: Int(1),
-                TxnField.global_num_uints: Int(2),
-                TxnField.global_num_byte_slices: Int(2),
-                TxnField.extra_program_pages: Int(1),
+                TxnField.local_num_uints: Int(
+                    SUBSCRIPTION_APP_SCHEMA["local_num_uints"]
+                ),
+                TxnField.local_num_byte_slices: Int(
+                    SUBSCRIPTION_APP_SCHEMA["local_num_byte_slices"]
+                ),
+                TxnField.global_num_uints: Int(
+                    SUBSCRIPTION_APP_SCHEMA["global_num_uints"]
+                ),
+                TxnField.global_num_byte_slices: Int(
+                    SUBSCRIPTION_APP_SCHEMA["global_num_byte_slices"]
+                ),
+                TxnField.extra_program_pages: Int(
+                    SUBSCRIPTION_APP_SCHEMA["extra_program_pages"]
+                ),
             }
         ),
         InnerTxnBuilder.Submit(),
@@ -126,7 +152,10 @@ def subscription_optin(subscription_app_id, usdc_asset_id):
         InnerTxnBuilder.SetFields(
             {
                 TxnField.application_id: subscription_app_id,
-                TxnField.application_args: [ASSET_OPTIN],
+                TxnField.application_args: [
+                    ASSET_OPTIN,
+                    *[Bytes(arg) for arg in reference_args("ASSET_OPTIN")],
+                ],
                 TxnField.fee: Int(0),
                 TxnField.assets: [usdc_asset_id],
                 TxnField.type_enum: TxnType.ApplicationCall,
@@ -136,25 +165,30 @@ def subscription_optin(subscription_app_id, usdc_asset_id):
     )
 
 
+# * ARC-4 methods routed by subscription_module_approval with the references their
+# * calls hold besides the arguments, exported to
+# * subscription_module_contract.json
+SUBSCRIPTION_MODULE_METHODS = {
+    "CHANGE_ADMIN_ID": {},
+    "DEPLOY_SUBSCRIPTION_APP": {"assets": ["usdc"]},
+}
+
+
 def subscription_module_approval(
     subscription_app_approval_compiled, subscription_app_clear_compiled
 ):
-    handle_noop = Cond(
+    handle_noop = route(
         # * Group transaction === 1
-        [
-            change_admin_id_checker(),
-            Return(change_admin_id()),
-        ],
+        (CHANGE_ADMIN_ID, change_admin_id_checker, change_admin_id()),
         # * Group transaction > 1
-        [
-            deploy_subscription_app_checker(),
-            Return(
-                deploy_subscription_app(
-                    Bytes("base64", subscription_app_approval_compiled),
-                    Bytes("base64", subscription_app_clear_compiled),
-                )
+        (
+            DEPLOY_SUBSCRIPTION_APP,
+            deploy_subscription_app_checker,
+            deploy_subscription_app(
+                Bytes("base64", subscription_app_approval_compiled),
+                Bytes("base64", subscription_app_clear_compiled),
             ),
-        ],
+        ),
     )
 
     program = Cond(
@@ -171,9 +205,9 @@ def subscription_module_approval(
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(update_app())],
     )
 
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
 
 
 def subscription_module_clear():
     program = Return(Int(1))
-    return compileTeal(program, Mode.Application, version=6)
+    return compile_application(program)
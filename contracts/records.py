@@ -0,0 +1,112 @@
+"""
+Fixed-layout records nft_app keeps under a single global.
+
+A record packs its fields in order, a uint64 as 8 big-endian bytes and an
+address as its 32 bytes, so a contract reads any field with one extract at a
+constant offset and updates one in place. decode turns the value of the global
+back into its fields.
+"""
+
+from pyteal import Concat, Extract, ExtractUint64, Int, Itob, Replace, Suffix
+
+from contracts.teal import teal_version
+
+# * First AVM version with replace2/replace3
+REPLACE_VERSION = 7
+
+# * record (the state key it is stored under) -> [(field, ARC-4 type)]
+_RECORDS = {
+    # * payment_asset is 0 for a listing paid in ALGO
+    "LISTING": [
+        ("price", "uint64"),
+        ("platform_fee", "uint64"),
+        ("payment_asset", "uint64"),
+        ("royalty", "uint64"),
+        ("owner", "address"),
+        ("creator", "address"),
+    ],
+    # * bidder is the zero address until the first bid
+    "AUCTION": [
+        ("start", "uint64"),
+        ("end", "uint64"),
+        ("min_bid_increment", "uint64"),
+        ("start_price", "uint64"),
+        ("payment_asset", "uint64"),
+        ("current_bid", "uint64"),
+        ("bidder", "address"),
+    ],
+}
+
+_SIZES = {"uint64": 8, "address": 32}
+
+
+def layout(record):
+    """
+    - returns {field: (offset, ARC-4 type)} of the record
+    """
+    fields = {}
+    offset = 0
+    for name, field_type in _RECORDS[record]:
+        fields[name] = (offset, field_type)
+        offset += _SIZES[field_type]
+    return fields
+
+
+def size(record):
+    return sum(_SIZES[field_type] for _, field_type in _RECORDS[record])
+
+
+def field(record, value, name):
+    """
+    - returns the pyteal expression reading the field out of the record's value
+    """
+    offset, field_type = layout(record)[name]
+    if field_type == "uint64":
+        return ExtractUint64(value, Int(offset))
+    return Extract(value, Int(offset), Int(_SIZES[field_type]))
+
+
+def replace(record, value, name, new):
+    """
+    - returns the pyteal expression of the record's value with the field set to
+      new, a uint64 or an address
+    """
+    offset, field_type = layout(record)[name]
+    if field_type == "uint64":
+        new = Itob(new)
+    if teal_version() >= REPLACE_VERSION:
+        return Replace(value, Int(offset), new)
+    rest = Suffix(value, Int(offset + _SIZES[field_type]))
+    if offset == 0:
+        return Concat(new, rest)
+    # * extract with a constant length of 0 would run to the end
+    return Concat(Extract(value, Int(0), Int(offset)), new, rest)
+
+
+def pack(record, values):
+    """
+    - values: {field: pyteal expression}, a uint64 or an address
+    - returns the pyteal expression of the record's value
+    """
+    return Concat(
+        *[
+            Itob(values[name]) if field_type == "uint64" else values[name]
+            for name, field_type in _RECORDS[record]
+        ]
+    )
+
+
+def decode(record, value):
+    """
+    - returns {field: int or 32-byte address} of a record's value, e.g. read from
+      the app's global state
+    """
+    if len(value) != size(record):
+        raise ValueError(
+            "%s record is %d bytes, got %d" % (record, size(record), len(value))
+        )
+    fields = {}
+    for name, (offset, field_type) in layout(record).items():
+        chunk = value[offset : offset + _SIZES[field_type]]
+        fields[name] = int.from_bytes(chunk, "big") if field_type == "uint64" else chunk
+    return fields
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+from collections import Counter
+
+from pyteal import *
+from contracts.abi import constant_bytes, selectors
+
+# * First AVM version with match/pushbytess
+MATCH_VERSION = 8
+# * JSON file of {ARC-4 method name: call count} the dispatch is ordered by
+PROFILE_VARIABLE = "DISPATCH_PROFILE"
+
+_METHOD_ARG = "txna ApplicationArgs 0"
+_BRANCH = re.compile(r"bnz (\S+)$")
+
+
+def dispatch_profile():
+    """
+    - returns {selector: call count} read from the file named by DISPATCH_PROFILE,
+      empty when it is not set
+    """
+    path = os.environ.get(PROFILE_VARIABLE)
+    if not path:
+        return {}
+    with open(path) as source:
+        counts = json.load(source)
+    return {
+        selector: counts[name]
+        for name, selector in selectors().items()
+        if name in counts
+    }
+
+
+def route(*methods):
+    """
+    - methods: (method name, group shape checker, uint64 handler)
+    - dispatches on the first application arg alone; only the selected method's
+      group shape is checked before its handler runs, unknown methods are rejected
+    - the rekey check every method shares is asserted once, ahead of the dispatch
+    - with a dispatch profile the most called methods are compared first, ties
+      keep the order they are given in
+    """
+    profile = dispatch_profile()
+    if profile:
+        methods = sorted(
+            methods, key=lambda method: -profile.get(constant_bytes(method[0]), 0)
+        )
+
+    uses = Counter(shape for _, shape, _ in methods)
+    branches = []
+    for method, shape, handler in methods:
+        check = shape(shared=uses[shape] > 1)
+        body = [Return(handler)] if check is None else [Assert(check), Return(handler)]
+        branches.append([Eq(Txn.application_args[0], method), Seq(*body)])
+
+    return Seq(
+        Assert(Eq(Txn.rekey_to(), Global.zero_address())),
+        Cond(*branches),
+    )
+
+
+def _constants(lines):
+    for line in lines:
+        tokens = line.split()
+        if tokens and tokens[0] == "bytecblock":
+            return tokens[1:]
+    return []
+
+
+def _bytec_index(line):
+    """
+    - returns the bytecblock index the line reads, or None if it reads none
+    """
+    tokens = line.split("//")[0].split()
+    if len(tokens) == 1 and re.fullmatch(r"bytec_[0-3]", tokens[0]):
+        return int(tokens[0][-1])
+    if len(tokens) == 2 and tokens[0] == "bytec":
+        return int(tokens[1])
+    return None
+
+
+def _method(line, bytec):
+    """
+    - returns the hex constant pushed by the line, or None if it is not a byte constant
+    """
+    index = _bytec_index(line)
+    if index is not None:
+        return bytec[index]
+    tokens = line.split("//")[0].split()
+    if len(tokens) == 2 and tokens[0] == "pushbytes" and tokens[1].startswith("0x"):
+        return tokens[1]
+    return None
+
+
+def _prune_constants(lines):
+    """
+    - drops the bytecblock constants only the dispatch read, pushes the ones
+      now read once and orders the others by use count, as PyTeal assembles them
+    """
+    bytec = _constants(lines)
+    uses = Counter(_bytec_index(line) for line in lines)
+    kept = sorted(
+        (index for index in range(len(bytec)) if uses[index] > 1),
+        key=lambda index: -uses[index],
+    )
+    renumbered = {index: position for position, index in enumerate(kept)}
+
+    pruned = []
+    for line in lines:
+        tokens = line.split()
+        if tokens and tokens[0] == "bytecblock":
+            if kept:
+                pruned.append("bytecblock " + " ".join(bytec[i] for i in kept))
+            continue
+        index = _bytec_index(line)
+        if index is None:
+            pruned.append(line)
+            continue
+        comment = line[line.index("//") :] if "//" in line else ""
+        if index in renumbered:
+            position = renumbered[index]
+            op = "bytec_%d" % position if position < 4 else "bytec %d" % position
+        else:
+            op = "pushbytes %s" % bytec[index]
+        pruned.append(" ".join(filter(None, [op, comment])))
+    return pruned
+
+
+def lower_dispatch(teal):
+    """
+    - rewrites the compare-and-branch chain emitted by route into one match, so
+      selecting any method costs the same three ops
+    - the selectors move into the match's pushbytess, so the bytecblock keeps
+      only the constants the rest of the program reads more than once
+    """
+    lines = teal.split("\n")
+    bytec = _constants(lines)
+    lowered = []
+    index = 0
+
+    while index < len(lines):
+        methods, labels = [], []
+        cursor = index
+        while cursor + 3 < len(lines) and lines[cursor].strip() == _METHOD_ARG:
+            method = _method(lines[cursor + 1].strip(), bytec)
+            branch = _BRANCH.match(lines[cursor + 3].strip())
+            if method is None or lines[cursor + 2].strip() != "==" or not branch:
+                break
+            methods.append(method)
+            labels.append(branch.group(1))
+            cursor += 4
+
+        if len(methods) < 2:
+            lowered.append(lines[index])
+            index += 1
+            continue
+
+        lowered.append("pushbytess " + " ".join(methods))
+        lowered.append(_METHOD_ARG)
+        lowered.append("match " + " ".join(labels))
+        index = cursor
+
+    return "\n".join(_prune_constants(lowered))
@@ -0,0 +1,39 @@
+import os
+
+from pyteal import Mode, OptimizeOptions, compileTeal
+
+from contracts.router import MATCH_VERSION, lower_dispatch
+
+# * Target AVM version, overridable with the TEAL_VERSION environment variable
+DEFAULT_TEAL_VERSION = 8
+MIN_TEAL_VERSION = 6
+# * First version with proto/frame_dig, so subroutine arguments stay on the stack
+FRAME_POINTERS_VERSION = 8
+
+
+def teal_version():
+    version = int(os.environ.get("TEAL_VERSION", DEFAULT_TEAL_VERSION))
+    if version < MIN_TEAL_VERSION:
+        raise ValueError(
+            "TEAL_VERSION %d is older than the contracts support (%d)"
+            % (version, MIN_TEAL_VERSION)
+        )
+    return version
+
+
+def compile_application(program):
+    version = teal_version()
+    # * Constants are assembled by PyTeal so the output maps 1:1 onto bytecode
+    teal = compileTeal(
+        program,
+        Mode.Application,
+        version=version,
+        assembleConstants=True,
+        optimize=OptimizeOptions(
+            scratch_slots=True,
+            frame_pointers=version >= FRAME_POINTERS_VERSION,
+        ),
+    )
+    if version >= MATCH_VERSION:
+        teal = lower_dispatch(teal)
+    return teal
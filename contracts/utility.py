@@ -1,67 +1,127 @@
 from pyteal import *
 from contracts.constants import (
     ADMIN_ID,
+    ROLE,
+    ADMIN_ROLE,
+    CREATOR_POOL,
+    OWNER,
+)
+from contracts.abi import (
     PAY_ALGO,
     PAY_ASSET,
-    SET_GLOBAL,
+    SET_LISTING,
+    SET_AUCTION,
+    SETTLE,
+    RESET_AUCTION,
+    BID,
     DEL_GLOBAL,
-    ROLE,
-    ADMIN_ROLE,
     SET_LOCAL,
-    CREATOR_POOL,
     INCREASE_ALGO_POOL,
     INCREASE_ASSET_POOL_REWARDS,
-    OWNER,
+    encode_bytes,
+    reference_args,
 )
 
+# * Inner transactions one app call can issue, the most NFTs a batch mints
+MINT_BATCH = 16
 
-@Subroutine(TealType.uint64)
-def inner_nft_creation(name, unit_name, total, creator_address, metadata):
+
+def _nft_fields(name, unit_name, total, creator_address, metadata, offset):
     """
-    - returns the id of the generated asset or fails
+    - sets the fields of an NFT creation on the inner transaction being built;
+      its metadata hash is the 32 bytes of metadata at offset, none when metadata
+      is empty
     """
+    return Seq(
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.AssetConfig,
+                TxnField.config_asset_name: name,
+                TxnField.config_asset_clawback: creator_address,
+                TxnField.config_asset_freeze: creator_address,
+                TxnField.config_asset_manager: creator_address,
+                TxnField.config_asset_unit_name: unit_name,
+                TxnField.config_asset_total: total,
+                TxnField.config_asset_decimals: Int(0),
+                TxnField.fee: Int(0),
+            }
+        ),
+        If(Neq(metadata, Bytes(""))).Then(
+            InnerTxnBuilder.SetField(
+                TxnField.config_asset_metadata_hash,
+                Extract(metadata, offset, Int(32)),
+            )
+        ),
+    )
+
+
+@Subroutine(TealType.bytes)
+def inner_nft_batch_creation(name, unit_name, count, creator_address, metadata):
+    """
+    - creates count NFTs (at most MINT_BATCH) in one inner group; metadata is
+      empty or the 32-byte hash of each NFT in turn
+    - returns the ids of the generated assets, 8 bytes each
+    """
+    index = ScratchVar(TealType.uint64)
+    ids = ScratchVar(TealType.bytes)
 
     return Seq(
-        If(Eq(metadata, Bytes("")))
-        .Then(
+        InnerTxnBuilder.Begin(),
+        For(
+            index.store(Int(0)),
+            Lt(index.load(), count),
+            index.store(Add(index.load(), Int(1))),
+        ).Do(
             Seq(
-                InnerTxnBuilder.Begin(),
-                InnerTxnBuilder.SetFields(
-                    {
-                        TxnField.type_enum: TxnType.AssetConfig,
-                        TxnField.config_asset_name: name,
-                        TxnField.config_asset_clawback: creator_address,
-                        TxnField.config_asset_freeze: creator_address,
-                        TxnField.config_asset_manager: creator_address,
-                        TxnField.config_asset_unit_name: unit_name,
-                        TxnField.config_asset_total: total,
-                        TxnField.config_asset_decimals: Int(0),
-                        TxnField.fee: Int(0),
-                    }
+                If(index.load()).Then(InnerTxnBuilder.Next()),
+                _nft_fields(
+                    name,
+                    unit_name,
+                    Int(1),
+                    creator_address,
+                    metadata,
+                    Mul(index.load(), Int(32)),
                 ),
-                InnerTxnBuilder.Submit(),
-                Return(InnerTxn.created_asset_id()),
+            )
+        ),
+        InnerTxnBuilder.Submit(),
+        ids.store(Bytes("")),
+        # * gitxn takes the position in the inner group as an immediate
+        *[
+            If(Gt(count, Int(position))).Then(
+                ids.store(Concat(ids.load(), Itob(Gitxn[position].created_asset_id())))
+            )
+            for position in range(MINT_BATCH)
+        ],
+        ids.load(),
+    )
+
+
+def payout_fields(asset, receiver, amount):
+    """
+    - sets the fields of an inner payment of amount in asset, 0 for ALGO
+    """
+    return (
+        If(asset)
+        .Then(
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.type_enum: TxnType.AssetTransfer,
+                    TxnField.xfer_asset: asset,
+                    TxnField.asset_amount: amount,
+                    TxnField.asset_receiver: receiver,
+                    TxnField.fee: Int(0),
+                }
             )
         )
         .Else(
-            Seq(
-                InnerTxnBuilder.Begin(),
-                InnerTxnBuilder.SetFields(
-                    {
-                        TxnField.type_enum: TxnType.AssetConfig,
-                        TxnField.config_asset_name: name,
-                        TxnField.config_asset_clawback: creator_address,
-                        TxnField.config_asset_freeze: creator_address,
-                        TxnField.config_asset_manager: creator_address,
-                        TxnField.config_asset_unit_name: unit_name,
-                        TxnField.config_asset_total: total,
-                        TxnField.config_asset_metadata_hash: metadata,
-                        TxnField.config_asset_decimals: Int(0),
-                        TxnField.fee: Int(0),
-                    }
-                ),
-                InnerTxnBuilder.Submit(),
-                Return(InnerTxn.created_asset_id()),
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.type_enum: TxnType.Payment,
+                    TxnField.amount: amount,
+                    TxnField.receiver: receiver,
+                    TxnField.fee: Int(0),
+                }
             )
         )
     )
@@ -125,20 +185,36 @@ def add_module_txn():
     )
 
 
+def _reference_args(method):
+    """
+    - returns the reference arguments of a call to method whose arrays start with
+      the references they stand for
+    """
+    return [Bytes(arg) for arg in reference_args(method)]
+
+
+def pay_algo_txn(app_id, beneficiary, amount, module_name):
+    return _pay_algo_txn(app_id, beneficiary, amount, encode_bytes(module_name))
+
+
 @Subroutine(TealType.none)
-def send_asset_txn():
-    _asset_amount = Btoi(Txn.application_args[2])
-    _asset_id = Txn.assets[0]
-    _asset_receiver = Txn.accounts[1]
+def _pay_algo_txn(app_id, beneficiary, amount, module_name):
+    admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields(
             {
-                TxnField.type_enum: TxnType.AssetTransfer,
-                TxnField.xfer_asset: _asset_id,
-                TxnField.asset_receiver: _asset_receiver,
-                TxnField.asset_amount: _asset_amount,
+                TxnField.type_enum: TxnType.ApplicationCall,
+                TxnField.application_id: app_id,
+                TxnField.application_args: [
+                    PAY_ALGO,
+                    module_name,
+                    Itob(amount),
+                    *_reference_args("PAY_ALGO"),
+                ],
+                TxnField.accounts: [beneficiary],
+                TxnField.applications: [admin_id],
                 TxnField.fee: Int(0),
             }
         ),
@@ -146,8 +222,12 @@ def send_asset_txn():
     )
 
 
+def pay_asset_txn(app_id, beneficiary, asset, amount, module_name):
+    return _pay_asset_txn(app_id, beneficiary, asset, amount, encode_bytes(module_name))
+
+
 @Subroutine(TealType.none)
-def pay_algo_txn(app_id, beneficiary, amount, module_name):
+def _pay_asset_txn(app_id, beneficiary, asset, amount, module_name):
     admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
@@ -156,7 +236,13 @@ def pay_algo_txn(app_id, beneficiary, amount, module_name):
             {
                 TxnField.type_enum: TxnType.ApplicationCall,
                 TxnField.application_id: app_id,
-                TxnField.application_args: [PAY_ALGO, module_name, Itob(amount)],
+                TxnField.application_args: [
+                    PAY_ASSET,
+                    module_name,
+                    Itob(amount),
+                    *_reference_args("PAY_ASSET"),
+                ],
+                TxnField.assets: [asset],
                 TxnField.accounts: [beneficiary],
                 TxnField.applications: [admin_id],
                 TxnField.fee: Int(0),
@@ -166,8 +252,18 @@ def pay_algo_txn(app_id, beneficiary, amount, module_name):
     )
 
 
+def set_listing_txn(app_id, module_name, price, platform_fee, payment_option):
+    """
+    - stores the listing as nft_app's packed LISTING record with a single
+      set_listing call
+    """
+    return _set_listing_txn(
+        app_id, encode_bytes(module_name), price, platform_fee, payment_option
+    )
+
+
 @Subroutine(TealType.none)
-def pay_asset_txn(app_id, beneficiary, asset, amount, module_name):
+def _set_listing_txn(app_id, module_name, price, platform_fee, payment_option):
     admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
@@ -176,9 +272,74 @@ def pay_asset_txn(app_id, beneficiary, asset, amount, module_name):
             {
                 TxnField.type_enum: TxnType.ApplicationCall,
                 TxnField.application_id: app_id,
-                TxnField.application_args: [PAY_ASSET, module_name, Itob(amount)],
-                TxnField.assets: [asset],
-                TxnField.accounts: [beneficiary],
+                TxnField.application_args: [
+                    SET_LISTING,
+                    module_name,
+                    Itob(price),
+                    Itob(platform_fee),
+                    Itob(payment_option),
+                    *_reference_args("SET_LISTING"),
+                ],
+                TxnField.applications: [admin_id],
+                TxnField.fee: Int(0),
+            }
+        ),
+        InnerTxnBuilder.Submit(),
+    )
+
+
+def set_auction_txn(
+    app_id,
+    module_name,
+    start_time,
+    end_time,
+    min_bid_increment,
+    payment_option,
+    start_price,
+):
+    """
+    - stores a new auction as nft_app's packed AUCTION record with a single
+      set_auction call
+    """
+    return _set_auction_txn(
+        app_id,
+        encode_bytes(module_name),
+        start_time,
+        end_time,
+        min_bid_increment,
+        payment_option,
+        start_price,
+    )
+
+
+@Subroutine(TealType.none)
+def _set_auction_txn(
+    app_id,
+    module_name,
+    start_time,
+    end_time,
+    min_bid_increment,
+    payment_option,
+    start_price,
+):
+    admin_id = App.globalGet(ADMIN_ID)
+
+    return Seq(
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.ApplicationCall,
+                TxnField.application_id: app_id,
+                TxnField.application_args: [
+                    SET_AUCTION,
+                    module_name,
+                    Itob(start_time),
+                    Itob(end_time),
+                    Itob(min_bid_increment),
+                    Itob(payment_option),
+                    Itob(start_price),
+                    *_reference_args("SET_AUCTION"),
+                ],
                 TxnField.applications: [admin_id],
                 TxnField.fee: Int(0),
             }
@@ -187,15 +348,93 @@ def pay_asset_txn(app_id, beneficiary, asset, amount, module_name):
     )
 
 
+def settle_txn(
+    app_id,
+    module_name,
+    nft_id,
+    payment_asset,
+    buyer,
+    nft_creator,
+    nft_owner,
+    admin_address,
+    fee_to_platform,
+    royalty_fee,
+    seller_amount,
+):
+    """
+    - pays the platform fee, the royalty and the seller's proceeds (in
+      payment_asset, 0 for ALGO), delivers the NFT to buyer and closes the sale
+      with a single settle call
+    """
+    return _settle_txn(
+        app_id,
+        encode_bytes(module_name),
+        nft_id,
+        payment_asset,
+        buyer,
+        nft_creator,
+        nft_owner,
+        admin_address,
+        fee_to_platform,
+        royalty_fee,
+        seller_amount,
+    )
+
+
 @Subroutine(TealType.none)
-def set_global_txn(app_id, module_name, global_name, global_value, global_int):
+def _settle_txn(
+    app_id,
+    module_name,
+    nft_id,
+    payment_asset,
+    buyer,
+    nft_creator,
+    nft_owner,
+    admin_address,
+    fee_to_platform,
+    royalty_fee,
+    seller_amount,
+):
+    admin_id = App.globalGet(ADMIN_ID)
+
+    return Seq(
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.ApplicationCall,
+                TxnField.application_id: app_id,
+                TxnField.application_args: [
+                    SETTLE,
+                    module_name,
+                    Itob(payment_asset),
+                    Itob(fee_to_platform),
+                    Itob(royalty_fee),
+                    Itob(seller_amount),
+                    *_reference_args("SETTLE"),
+                ],
+                TxnField.accounts: [buyer, nft_creator, nft_owner, admin_address],
+                TxnField.assets: [nft_id],
+                TxnField.applications: [admin_id],
+                TxnField.fee: Int(0),
+            }
+        ),
+        If(payment_asset).Then(
+            InnerTxnBuilder.SetField(TxnField.assets, [payment_asset])
+        ),
+        InnerTxnBuilder.Submit(),
+    )
+
+
+def reset_auction_txn(app_id, module_name, nft_owner, nft_id):
     """
-    app_id: uint
-    module_name: bytes
-    global_name: bytes
-    global_value: bytes
-    global_int: indicate if global_value is a number (1 True - 0 False)
+    - returns the NFT to nft_owner and clears the auction record with a single
+      reset_auction call
     """
+    return _reset_auction_txn(app_id, encode_bytes(module_name), nft_owner, nft_id)
+
+
+@Subroutine(TealType.none)
+def _reset_auction_txn(app_id, module_name, nft_owner, nft_id):
     admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
@@ -205,12 +444,12 @@ def set_global_txn(app_id, module_name, global_name, global_value, global_int):
                 TxnField.type_enum: TxnType.ApplicationCall,
                 TxnField.application_id: app_id,
                 TxnField.application_args: [
-                    SET_GLOBAL,
+                    RESET_AUCTION,
                     module_name,
-                    global_name,
-                    global_value,
-                    global_int,
+                    *_reference_args("RESET_AUCTION"),
                 ],
+                TxnField.accounts: [nft_owner],
+                TxnField.assets: [nft_id],
                 TxnField.applications: [admin_id],
                 TxnField.fee: Int(0),
             }
@@ -219,8 +458,55 @@ def set_global_txn(app_id, module_name, global_name, global_value, global_int):
     )
 
 
+def bid_txn(app_id, module_name, bidder, previous_bidder, bid_asset, bid_amount):
+    """
+    - records bidder's bid of bid_amount (of bid_asset, 0 for ALGO) as the highest
+      one and refunds previous_bidder with a single bid call
+    """
+    return _bid_txn(
+        app_id,
+        encode_bytes(module_name),
+        bidder,
+        previous_bidder,
+        bid_asset,
+        bid_amount,
+    )
+
+
 @Subroutine(TealType.none)
+def _bid_txn(app_id, module_name, bidder, previous_bidder, bid_asset, bid_amount):
+    admin_id = App.globalGet(ADMIN_ID)
+
+    return Seq(
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.ApplicationCall,
+                TxnField.application_id: app_id,
+                TxnField.application_args: [
+                    BID,
+                    module_name,
+                    Itob(bid_asset),
+                    Itob(bid_amount),
+                    *_reference_args("BID"),
+                ],
+                TxnField.accounts: [bidder, previous_bidder],
+                TxnField.applications: [admin_id],
+                TxnField.fee: Int(0),
+            }
+        ),
+        # * A refund in USDC needs the asset
+        If(bid_asset).Then(InnerTxnBuilder.SetField(TxnField.assets, [bid_asset])),
+        InnerTxnBuilder.Submit(),
+    )
+
+
 def del_global_txn(app_id, module_name, global_name):
+    return _del_global_txn(app_id, encode_bytes(module_name), encode_bytes(global_name))
+
+
+@Subroutine(TealType.none)
+def _del_global_txn(app_id, module_name, global_name):
     admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
@@ -229,7 +515,12 @@ def del_global_txn(app_id, module_name, global_name):
             {
                 TxnField.type_enum: TxnType.ApplicationCall,
                 TxnField.application_id: app_id,
-                TxnField.application_args: [DEL_GLOBAL, module_name, global_name],
+                TxnField.application_args: [
+                    DEL_GLOBAL,
+                    module_name,
+                    global_name,
+                    *_reference_args("DEL_GLOBAL"),
+                ],
                 TxnField.applications: [admin_id],
                 TxnField.fee: Int(0),
             }
@@ -326,14 +617,20 @@ def _check_owner_role():
     return Seq(is_owner, Assert(Eq(_sender, is_owner.value())))
 
 
-@Subroutine(TealType.none)
 def set_admin_local_txn(beneficiary, local_name, local_value, local_int):
     """
     beneficiary: bytes
     local_name: bytes
     local_value: bytes
-    local_int: indicate if local_value is a number (1 True - 0 False)
+    local_int: indicate if local_value is a number (Itob of 1 True - 0 False)
     """
+    return _set_admin_local_txn(
+        beneficiary, encode_bytes(local_name), encode_bytes(local_value), local_int
+    )
+
+
+@Subroutine(TealType.none)
+def _set_admin_local_txn(beneficiary, local_name, local_value, local_int):
     admin_id = App.globalGet(ADMIN_ID)
 
     return Seq(
@@ -344,10 +641,11 @@ def set_admin_local_txn(beneficiary, local_name, local_value, local_int):
                 TxnField.application_id: admin_id,
                 TxnField.application_args: [
                     SET_LOCAL,
-                    CREATOR_POOL,
+                    encode_bytes(CREATOR_POOL),
                     local_name,
                     local_value,
                     local_int,
+                    *_reference_args("SET_LOCAL"),
                 ],
                 TxnField.accounts: [beneficiary],
                 TxnField.fee: Int(0),
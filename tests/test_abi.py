@@ -0,0 +1,114 @@
+import unittest
+
+from compiler.avm import application_address, evaluate_group, new_txn
+from compiler.bench import Marketplace, byte_array, uint
+from compiler.manifest import build_interface
+from contracts import abi
+
+
+class SignatureTest(unittest.TestCase):
+    def test_transactions_and_references_are_arguments(self):
+        self.assertEqual(
+            abi.signature("PURCHASE_NFT"),
+            "purchase_nft(txn,account,account,account,asset,application)void",
+        )
+        self.assertEqual(
+            abi.signature("CREATE_ASSET_APP"),
+            "create_asset_app(pay,uint64,asset)uint64",
+        )
+
+    def test_reference_args_index_the_arrays_in_order(self):
+        self.assertEqual(
+            abi.reference_args("WITHDRAW_TOKENS"), [bytes([1]), bytes([0])]
+        )
+        self.assertEqual(
+            abi.reference_args("SETTLE"), [bytes([n]) for n in (1, 2, 3, 4, 1)]
+        )
+
+    def test_desc_lists_the_other_references_after_the_arguments(self):
+        methods = {
+            method["name"]: method
+            for method in build_interface("creator_app")["methods"]
+        }
+        self.assertEqual(methods["create_asset_app"]["returns"], {"type": "uint64"})
+        self.assertEqual(
+            methods["create_asset_app"]["desc"], "References assets[1] usdc"
+        )
+        self.assertEqual(methods["mint_nfts"]["returns"], {"type": "uint64[]"})
+
+    def test_every_routed_method_has_one_selector(self):
+        selectors = abi.selectors()
+        self.assertEqual(len(set(selectors.values())), len(selectors))
+
+
+class CallTest(unittest.TestCase):
+    def test_create_asset_app_returns_the_nft_app(self):
+        market = Marketplace()
+        self.assertEqual(market.nft_app, max(market.ledger.apps))
+
+    def test_mint_nfts_returns_the_ids(self):
+        market = Marketplace()
+        mint = market.call(
+            market.seller,
+            market.creator_app,
+            "MINT_NFTS",
+            byte_array(b"Drop"),
+            byte_array(b"DROP"),
+            uint(2),
+            byte_array(b""),
+        )
+        step = market.step(
+            "mint_nfts",
+            market.pay(market.seller, application_address(market.creator_app), 200_000),
+            mint,
+        )
+        self.assertTrue(step.passed, step.error)
+        ids = abi.returned(mint["Logs"])
+        self.assertEqual(len(ids), 2 + 2 * 8)
+        self.assertEqual(int.from_bytes(ids[:2], "big"), 2)
+        for offset in (2, 10):
+            self.assertIn(
+                int.from_bytes(ids[offset : offset + 8], "big"), market.ledger.assets
+            )
+
+    def test_references_are_read_through_their_index(self):
+        # * A client may pass a reference once for several arguments and in any
+        # * order: here the owner and the creator are one account, after the
+        # * admin app's address
+        market = Marketplace()
+        listing = market.deploy("list", "LIST_MODULE")
+        nft_app_address = application_address(market.nft_app)
+        market.step(
+            "start_sell",
+            market.axfer(market.seller, nft_app_address, market.nft, 1),
+            market.call(
+                market.seller,
+                listing,
+                "START_SELL",
+                uint(1_000_000),
+                uint(0),
+                assets=[market.nft],
+                applications=[market.nft_app],
+            ),
+        )
+        market.ledger.account(market.bob)["assets"][market.nft] = [0, False]
+        purchase = new_txn(
+            Type=b"appl",
+            Sender=market.bob,
+            ApplicationID=listing,
+            ApplicationArgs=[
+                abi.selector("PURCHASE_NFT"),
+                *map(bytes, [[2], [2], [1], [0], [2]]),
+            ],
+            Accounts=[market.admin_address, market.seller],
+            Assets=[market.nft],
+            Applications=[market.admin_id, market.nft_app],
+        )
+        payment = market.pay(market.bob, nft_app_address, 1_000_000)
+        results = evaluate_group(market.ledger, [payment, purchase])
+        self.assertTrue(results[1].passed, results[1].error)
+        self.assertEqual(market.ledger.account(market.bob)["assets"][market.nft][0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import base64
+import json
+import os
+import unittest
+from unittest import mock
+
+from pyteal import GlobalField, TxnField
+from pyteal.ast.acct import AccountParamField
+from pyteal.ir import Op
+
+from compile_contracts import FIXTURES_DIR, check_against_fixtures
+from compiler.assembler import (
+    ACCT_PARAMS_FIELDS,
+    APP_PARAMS_FIELDS,
+    ASSET_PARAMS_FIELDS,
+    ECDSA_CURVES,
+    FIELD_VERSIONS,
+    GLOBAL_FIELDS,
+    OPCODE_VERSIONS,
+    OPCODES,
+    TXN_FIELDS,
+    AssembleError,
+    assemble,
+    parse,
+)
+from compiler.registry import ProgramRegistry
+from compiler.targets import TARGETS
+from contracts.teal import DEFAULT_TEAL_VERSION, MIN_TEAL_VERSION
+
+# * The op reading each kind of field, with the version it was introduced in
+FIELD_OPS = [
+    (TXN_FIELDS, "txn", 1),
+    (GLOBAL_FIELDS, "global", 1),
+    (ASSET_PARAMS_FIELDS, "asset_params_get", 2),
+    (APP_PARAMS_FIELDS, "app_params_get", 5),
+    (ACCT_PARAMS_FIELDS, "acct_params_get", 6),
+    (ECDSA_CURVES, "ecdsa_verify", 5),
+]
+
+
+def fixtures():
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, file_name)) as source:
+            yield file_name, json.load(source)
+
+
+class FixturesTest(unittest.TestCase):
+    def test_every_fixture_assembles_to_its_bytecode(self):
+        for file_name, fixture in fixtures():
+            with self.subTest(file_name):
+                self.assertEqual(
+                    assemble(fixture["teal"]).hex(),
+                    base64.b64decode(fixture["result"]).hex(),
+                )
+
+    def test_check_against_fixtures(self):
+        mismatches, checked = check_against_fixtures()
+        self.assertEqual(mismatches, [])
+        self.assertEqual(checked, len(list(fixtures())))
+
+    def test_fixtures_cover_every_immediate_kind(self):
+        kinds = set()
+        for _, fixture in fixtures():
+            _, instructions, _ = parse(fixture["teal"])
+            for instruction in instructions:
+                kinds.update(
+                    "enum" if isinstance(kind, list) else kind
+                    for kind in instruction.immediates()
+                )
+        self.assertEqual(
+            kinds,
+            {
+                "enum",
+                "uint8",
+                "int8",
+                "varuint",
+                "bytes",
+                "label",
+                "labels",
+                "ints",
+                "bytess",
+            },
+        )
+
+
+class VersionTest(unittest.TestCase):
+    def test_opcode_versions_agree_with_pyteal(self):
+        # * PyTeal starts at v2
+        pyteal_versions = {op.value.value: op.value.min_version for op in Op}
+        for op in OPCODES:
+            if op in pyteal_versions:
+                with self.subTest(op):
+                    self.assertEqual(
+                        max(OPCODE_VERSIONS.get(op, 1), 2), pyteal_versions[op]
+                    )
+
+    def test_field_versions_agree_with_pyteal(self):
+        for fields in (TxnField, GlobalField, AccountParamField):
+            for field in fields:
+                if field.arg_name in FIELD_VERSIONS or field.min_version <= 2:
+                    with self.subTest(field.arg_name):
+                        self.assertEqual(
+                            max(FIELD_VERSIONS.get(field.arg_name, 1), 2),
+                            field.min_version,
+                        )
+
+    def test_opcode_is_rejected_before_its_version(self):
+        for op, version in OPCODE_VERSIONS.items():
+            with self.subTest(op):
+                parse("#pragma version %d\n%s\n" % (version, op))
+                with self.assertRaisesRegex(
+                    AssembleError, "introduced in v%d" % version
+                ):
+                    parse("#pragma version %d\n%s\n" % (version - 1, op))
+
+    def test_field_is_rejected_before_its_version(self):
+        for names, op, op_version in FIELD_OPS:
+            for field in names:
+                version = max(FIELD_VERSIONS.get(field, 1), op_version)
+                with self.subTest(field):
+                    assemble("#pragma version %d\n%s %s\n" % (version, op, field))
+                    if version > op_version:
+                        with self.assertRaisesRegex(
+                            AssembleError, "%s field was introduced" % field
+                        ):
+                            assemble(
+                                "#pragma version %d\n%s %s\n" % (version - 1, op, field)
+                            )
+
+    def test_match_needs_v8(self):
+        teal = "#pragma version %d\npushint 1\npushint 1\nmatch done\ndone:\n"
+        self.assertEqual(assemble(teal % 8), bytes.fromhex("08 8101 8101 8e010000"))
+        with self.assertRaisesRegex(AssembleError, "line 4: match opcode"):
+            assemble(teal % 6)
+
+    def test_contracts_assemble_at_every_supported_version(self):
+        for version in range(MIN_TEAL_VERSION, DEFAULT_TEAL_VERSION + 1):
+            with self.subTest(version=version), mock.patch.dict(
+                os.environ, {"TEAL_VERSION": str(version)}
+            ):
+                registry = ProgramRegistry()
+                for name in TARGETS:
+                    registry.target(name)
+
+
+class ErrorTest(unittest.TestCase):
+    def test_undefined_label(self):
+        with self.assertRaisesRegex(AssembleError, "line 2: .*undefined label nowhere"):
+            assemble("#pragma version 8\nb nowhere\n")
+
+    def test_duplicate_label(self):
+        with self.assertRaisesRegex(AssembleError, "line 3: duplicate label here"):
+            assemble("#pragma version 8\nhere:\nhere:\n")
+
+    def test_branch_too_far(self):
+        teal = "#pragma version 8\nb end\n%send:\n" % ("pushint 1\npop\n" * 20000)
+        with self.assertRaisesRegex(AssembleError, "too far"):
+            assemble(teal)
+
+    def test_immediate_out_of_range(self):
+        with self.assertRaisesRegex(AssembleError, "out of range"):
+            assemble("#pragma version 8\nframe_dig 128\n")
+
+    def test_unknown_field(self):
+        with self.assertRaises(AssembleError):
+            assemble("#pragma version 8\ntxn Nothing\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
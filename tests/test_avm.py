@@ -0,0 +1,248 @@
+import unittest
+
+from compiler.assembler import assemble
+from compiler.avm import (
+    APP_CALL_BUDGET,
+    MIN_BALANCE,
+    OPT_IN,
+    Ledger,
+    application_address,
+    evaluate_group,
+    new_txn,
+)
+from compiler.manifest import program_address
+
+SENDER = b"s" * 32
+RECEIVER = b"r" * 32
+STRANGER = b"x" * 32
+
+APPROVE = "#pragma version 8\nint 1\n"
+
+# * Issues as many inner payments of 0 to the sender as its first argument says
+INNER_PAYMENTS = """#pragma version 8
+int 0
+store 0
+loop:
+itxn_begin
+int pay
+itxn_field TypeEnum
+txn Sender
+itxn_field Receiver
+itxn_submit
+load 0
+int 1
++
+dup
+store 0
+txna ApplicationArgs 0
+btoi
+<
+bnz loop
+int 1
+"""
+
+
+class EvaluatorTest(unittest.TestCase):
+    def setUp(self):
+        self.ledger = Ledger()
+        self.ledger.account(SENDER)["balance"] = 10 * MIN_BALANCE
+
+    def create_app(self, teal, **schema):
+        app_id = self.ledger.create_app(
+            SENDER, assemble(teal), assemble(APPROVE), schema=schema
+        )
+        self.ledger.account(application_address(app_id))["balance"] = MIN_BALANCE
+        return app_id
+
+    def call(self, app_id, *args, **fields):
+        txn = new_txn(
+            Type=b"appl",
+            Sender=SENDER,
+            ApplicationID=app_id,
+            ApplicationArgs=list(args),
+            **fields
+        )
+        return evaluate_group(self.ledger, [txn])[0]
+
+    def pay(self, amount, receiver=RECEIVER):
+        txn = new_txn(Type=b"pay", Sender=SENDER, Receiver=receiver, Amount=amount)
+        return evaluate_group(self.ledger, [txn])[0]
+
+    def assertRejected(self, result, message):
+        self.assertIsNotNone(result)
+        self.assertFalse(result.passed)
+        self.assertRegex(result.error or "", message)
+
+
+class MinBalanceTest(EvaluatorTest):
+    def test_payment_below_the_senders_minimum_is_rejected(self):
+        # * An asset holding raises the minimum to 200000
+        asset_id = self.ledger.create_asset(SENDER, {"AssetTotal": 1})
+        self.ledger.account(SENDER)["balance"] = 300000
+        self.ledger.account(RECEIVER)["balance"] = MIN_BALANCE
+
+        self.assertRejected(
+            self.pay(299000), "balance 1000 below min %d" % (2 * MIN_BALANCE)
+        )
+        self.assertEqual(self.ledger.account(SENDER)["balance"], 300000)
+        self.assertIn(asset_id, self.ledger.account(SENDER)["assets"])
+
+        self.assertIsNone(self.pay(100000))
+        self.assertEqual(self.ledger.account(SENDER)["balance"], 2 * MIN_BALANCE)
+
+    def test_payment_leaving_the_receiver_below_its_minimum_is_rejected(self):
+        self.assertRejected(self.pay(1000), "balance 1000 below min %d" % MIN_BALANCE)
+        self.assertIsNone(self.pay(MIN_BALANCE))
+
+    def test_account_can_be_emptied(self):
+        self.assertIsNone(self.pay(10 * MIN_BALANCE))
+        self.assertEqual(self.ledger.account(SENDER)["balance"], 0)
+
+    def test_inner_payment_below_the_app_minimum_is_rejected(self):
+        app_id = self.create_app(
+            "#pragma version 8\nitxn_begin\nint pay\nitxn_field TypeEnum\n"
+            "txn Sender\nitxn_field Receiver\nint 1\nitxn_field Amount\n"
+            "itxn_submit\nint 1\n"
+        )
+        self.assertRejected(self.call(app_id), "below min")
+        self.assertEqual(
+            self.ledger.account(application_address(app_id))["balance"], MIN_BALANCE
+        )
+
+    def test_app_schema_raises_the_creators_minimum(self):
+        self.create_app(APPROVE, global_num_uint=1, global_num_byte_slice=1)
+        self.assertEqual(
+            self.ledger.min_balance(SENDER), 2 * MIN_BALANCE + 28500 + 50000
+        )
+
+
+class SchemaTest(EvaluatorTest):
+    GLOBAL_PUTS = (
+        '#pragma version 8\nbyte "n"\nint 1\napp_global_put\n'
+        'byte "b"\nbyte 0x%s\napp_global_put\nint 1\n'
+    )
+
+    def test_global_put_without_schema_is_rejected(self):
+        app_id = self.create_app(self.GLOBAL_PUTS % "01")
+        self.assertRejected(
+            self.call(app_id), "store integer count 1 exceeds schema integer count 0"
+        )
+        self.assertEqual(self.ledger.apps[app_id]["global"], {})
+
+    def test_global_puts_within_schema_pass(self):
+        app_id = self.create_app(
+            self.GLOBAL_PUTS % "01", global_num_uint=1, global_num_byte_slice=1
+        )
+        self.assertTrue(self.call(app_id).passed)
+        self.assertEqual(self.ledger.apps[app_id]["global"], {b"n": 1, b"b": b"\x01"})
+
+        # * Overwriting a key does not count twice
+        self.assertTrue(self.call(app_id).passed)
+
+    def test_bytes_over_the_byte_slice_count_are_rejected(self):
+        app_id = self.create_app(
+            self.GLOBAL_PUTS % "01", global_num_uint=2, global_num_byte_slice=0
+        )
+        self.assertRejected(
+            self.call(app_id), "store bytes count 1 exceeds schema bytes count 0"
+        )
+
+    def test_key_and_value_over_128_bytes_are_rejected(self):
+        app_id = self.create_app(
+            self.GLOBAL_PUTS % ("00" * 200), global_num_uint=1, global_num_byte_slice=1
+        )
+        self.assertRejected(self.call(app_id), "key and value too long: 201 bytes")
+
+        app_id = self.create_app(
+            self.GLOBAL_PUTS % ("00" * 127), global_num_uint=1, global_num_byte_slice=1
+        )
+        self.assertTrue(self.call(app_id).passed)
+
+    def test_key_over_64_bytes_is_rejected(self):
+        app_id = self.create_app(
+            "#pragma version 8\nbyte 0x%s\nint 1\napp_global_put\nint 1\n"
+            % ("00" * 65),
+            global_num_uint=1,
+        )
+        self.assertRejected(self.call(app_id), "key too long: 65 bytes")
+
+    def test_local_put_is_held_to_the_local_schema(self):
+        teal = '#pragma version 8\ntxn Sender\nbyte "n"\nint 1\napp_local_put\nint 1\n'
+        app_id = self.create_app(teal)
+        self.assertRejected(
+            self.call(app_id, OnCompletion=OPT_IN),
+            "store integer count 1 exceeds schema integer count 0",
+        )
+        self.assertNotIn(app_id, self.ledger.account(SENDER)["local"])
+
+        app_id = self.create_app(teal, local_num_uint=1)
+        self.assertTrue(self.call(app_id, OnCompletion=OPT_IN).passed)
+        self.assertEqual(self.ledger.account(SENDER)["local"][app_id], {b"n": 1})
+
+
+class LimitsTest(EvaluatorTest):
+    def test_sixteen_inner_transactions_per_app_call(self):
+        app_id = self.create_app(INNER_PAYMENTS)
+        result = self.call(app_id, (16).to_bytes(8, "big"))
+        self.assertTrue(result.passed, result.error)
+        self.assertEqual(result.inner_txns, 16)
+        self.assertRejected(
+            self.call(app_id, (17).to_bytes(8, "big")), "too many inner transactions"
+        )
+
+    def test_inner_transactions_are_pooled_across_the_group(self):
+        app_id = self.create_app(INNER_PAYMENTS)
+        group = [
+            new_txn(
+                Type=b"appl",
+                Sender=SENDER,
+                ApplicationID=app_id,
+                ApplicationArgs=[count.to_bytes(8, "big")],
+            )
+            for count in (30, 3)
+        ]
+        first, second = evaluate_group(self.ledger, group)
+        self.assertTrue(first.passed, first.error)
+        self.assertRejected(second, "too many inner transactions")
+
+    def test_budget_is_pooled_across_the_group(self):
+        # * 4 ops per iteration: 200 iterations cost more than one call's budget
+        app_id = self.create_app(
+            "#pragma version 8\ntxna ApplicationArgs 0\nbtoi\nloop:\n"
+            "int 1\n-\ndup\nbnz loop\npop\nint 1\n"
+        )
+        self.assertRejected(
+            self.call(app_id, (200).to_bytes(8, "big")), "dynamic cost budget exceeded"
+        )
+
+        group = [
+            new_txn(
+                Type=b"appl",
+                Sender=SENDER,
+                ApplicationID=app_id,
+                ApplicationArgs=[count.to_bytes(8, "big")],
+            )
+            for count in (1, 200)
+        ]
+        results = evaluate_group(self.ledger, group)
+        self.assertEqual([result.passed for result in results], [True, True])
+        self.assertGreater(results[1].cost, APP_CALL_BUDGET)
+
+    def test_unreferenced_account_is_unavailable(self):
+        teal = "#pragma version 8\naddr %s\nbalance\npop\nint 1\n"
+        app_id = self.create_app(teal % program_address(STRANGER.hex()))
+        self.assertRejected(self.call(app_id), "unavailable account")
+        self.assertTrue(self.call(app_id, Accounts=[STRANGER]).passed)
+
+    def test_unreferenced_asset_is_unavailable(self):
+        asset_id = self.ledger.create_asset(SENDER, {"AssetTotal": 1})
+        app_id = self.create_app(
+            "#pragma version 8\nint %d\nasset_params_get AssetTotal\n"
+            "assert\nint 1\n==\n" % asset_id
+        )
+        self.assertRejected(self.call(app_id), "unavailable asset")
+        self.assertTrue(self.call(app_id, Assets=[asset_id]).passed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from compiler.avm import MIN_TXN_FEE
+from compiler.bench import compare
+
+
+class BaselineTest(unittest.TestCase):
+    def test_bids_cost_less_than_before_nft_apps_bid(self):
+        _, steps = compare("bid")
+        (first_before, first_after), *outbids = steps["auction"]
+        for before, after in steps["auction"]:
+            with self.subTest(before.label):
+                self.assertTrue(before.passed, before.error)
+                self.assertTrue(after.passed, after.error)
+                self.assertLess(after.cost, before.cost)
+        self.assertEqual(first_after.inner_txns, first_before.inner_txns)
+        # * The refund and the new bid are one inner call instead of two
+        for before, after in outbids:
+            self.assertEqual(after.inner_txns, before.inner_txns - 1)
+            self.assertEqual(after.fee, before.fee - MIN_TXN_FEE)
+
+    def test_settlements_halve_their_inner_transactions(self):
+        # * One settle call replaces six calls into nft_app, the four payouts
+        # * they make remain
+        _, steps = compare("settle")
+        for before, after in steps["sale"] + steps["auction"]:
+            with self.subTest(before.label):
+                self.assertTrue(before.passed, before.error)
+                self.assertTrue(after.passed, after.error)
+                self.assertEqual(after.inner_txns * 2, before.inner_txns)
+                self.assertLess(after.cost * 1.5, before.cost)
+
+
+if __name__ == "__main__":
+    unittest.main()
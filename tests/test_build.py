@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from compiler.graph import ROOT
+
+
+def copy_sources(directory):
+    """
+    - copies the contracts, the build tooling and the CLI into directory, so a
+      test can edit them and build without touching the checkout
+    """
+    for name in ("contracts", "compiler"):
+        shutil.copytree(
+            os.path.join(ROOT, name),
+            os.path.join(directory, name),
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+    shutil.copy(os.path.join(ROOT, "compile_contracts.py"), directory)
+
+
+def edit(path, old, new):
+    with open(path) as source:
+        content = source.read()
+    assert old in content, old
+    with open(path, "w") as output:
+        output.write(content.replace(old, new))
+
+
+def read_outputs(directory):
+    outputs = {}
+    for file_name in os.listdir(directory):
+        with open(os.path.join(directory, file_name)) as source:
+            outputs[file_name] = source.read()
+    return outputs
+
+
+class IncrementalBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        copy_sources(self.directory)
+
+    def build(self, *args):
+        """
+        - runs the CLI in the copy and returns the targets it rebuilt
+        """
+        env = dict(os.environ)
+        for variable in ("TEAL_VERSION", "DISPATCH_PROFILE"):
+            env.pop(variable, None)
+        output = subprocess.run(
+            [sys.executable, "compile_contracts.py", *args],
+            cwd=self.directory,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return set(re.findall(r"^Rebuilding (\w+) ", output, re.MULTILINE))
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def test_edited_constant_rebuilds_every_dependent_target(self):
+        self.build("--out", "out")
+        before = read_outputs(self.path("out"))
+
+        # * migration reads the module codes through getattr(constants, name)
+        edit(
+            self.path("contracts", "constants.py"),
+            '"AUCTION_MODULE": "ma"',
+            '"AUCTION_MODULE": "mx"',
+        )
+        rebuilt = self.build("--out", "out")
+        self.build("--out", "fresh", "--force")
+
+        after = read_outputs(self.path("out"))
+        fresh = read_outputs(self.path("fresh"))
+        self.assertEqual(after, fresh)
+
+        changed = {
+            file_name.split("_approval")[0]
+            for file_name in fresh
+            if file_name.endswith("_approval.teal")
+            and before[file_name] != fresh[file_name]
+        }
+        self.assertTrue({"auction", "migration"} <= changed, changed)
+        self.assertTrue(changed <= rebuilt, (changed, rebuilt))
+        self.assertNotIn("admin", rebuilt)
+
+    def test_force_does_not_read_the_cache(self):
+        self.build("--out", "out", "--only", "auction")
+        expected = read_outputs(self.path("out"))
+
+        # * A cache entry whose program is not the one its key stands for
+        cache_dir = self.path(".build_cache")
+        for file_name in os.listdir(cache_dir):
+            if file_name != "state.json":
+                with open(os.path.join(cache_dir, file_name), "w") as output:
+                    json.dump({"auction_approval": "stale\n"}, output)
+
+        self.assertEqual(
+            self.build("--out", "fresh", "--only", "auction", "--force"), {"auction"}
+        )
+        self.assertEqual(read_outputs(self.path("fresh")), expected)
+
+    def test_unchanged_sources_are_skipped(self):
+        self.build("--out", "out")
+        self.assertEqual(self.build("--out", "out"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import ast
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from compiler import graph
+from compiler.graph import DependencyGraph, _referenced_names, changed_symbols
+from tests.test_build import copy_sources, edit
+
+
+def names(source):
+    return _referenced_names(ast.parse(source))
+
+
+class ReferencedNamesTest(unittest.TestCase):
+    def test_attribute_of_a_name_is_qualified(self):
+        self.assertEqual(names("constants.OWNER"), {"constants.OWNER"})
+
+    def test_getattr_with_a_literal_is_qualified(self):
+        self.assertEqual(
+            names("getattr(constants, 'OWNER')"), {"getattr", "constants.OWNER"}
+        )
+
+    def test_getattr_with_a_computed_name_reads_the_whole_name(self):
+        self.assertEqual(
+            names("getattr(constants, name)"), {"getattr", "constants", "name"}
+        )
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        copy_sources(self.directory)
+        patch = mock.patch.object(graph, "ROOT", self.directory)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def path(self, *names):
+        return os.path.join(self.directory, "contracts", *names)
+
+    def closures(self):
+        dependencies = DependencyGraph()
+        return {name: dependencies.target_symbols(name) for name in graph.TARGETS}
+
+    def rebuilt(self, before, after):
+        return {name for name in before if before[name] != after[name]}
+
+    def test_module_imported_from_its_package(self):
+        module = DependencyGraph().module("contracts.migration")
+        self.assertEqual(module.module_imports["constants"], "contracts.constants")
+        self.assertIn(
+            "contracts.constants", DependencyGraph().dependencies("contracts.migration")
+        )
+
+    def test_computed_getattr_depends_on_every_definition(self):
+        symbols = DependencyGraph().target_symbols("migration")
+        self.assertIn("contracts.constants.AUCTION_MODULE", symbols)
+        self.assertIn("contracts.constants.REWARD_MODULE", symbols)
+
+    def test_edited_constant_invalidates_its_users_only(self):
+        before = self.closures()
+        edit(
+            self.path("constants.py"),
+            '"AUCTION_MODULE": "ma"',
+            '"AUCTION_MODULE": "mx"',
+        )
+        after = self.closures()
+
+        self.assertEqual(
+            changed_symbols(before["auction"], after["auction"]),
+            ["contracts.constants.AUCTION_MODULE"],
+        )
+        self.assertIn("migration", self.rebuilt(before, after))
+        self.assertNotIn("admin", self.rebuilt(before, after))
+
+    def test_comment_invalidates_nothing(self):
+        before = self.closures()
+        edit(self.path("records.py"), "def pack(", "# * packs a record\ndef pack(")
+        self.assertEqual(self.rebuilt(before, self.closures()), set())
+
+    def test_edited_subroutine_invalidates_the_targets_using_it(self):
+        before = self.closures()
+        edit(
+            self.path("records.py"),
+            "def decode(record, value):",
+            "def decode(record, value, unused=None):",
+        )
+        # * decode is tooling only, no program is generated from it
+        self.assertEqual(self.rebuilt(before, self.closures()), set())
+
+        edit(
+            self.path("records.py"),
+            "def pack(record, values):",
+            "def pack(record, values, unused=None):",
+        )
+        using = {
+            name
+            for name, symbols in before.items()
+            if "contracts.records.pack" in symbols
+        }
+        self.assertEqual(self.rebuilt(before, self.closures()), using)
+        self.assertIn("nft_app", using)
+        self.assertNotIn("auction", using)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+
+from compiler.avm import Ledger, evaluate_group, new_txn
+from compiler.registry import registry
+from compiler.targets import TARGETS
+from contracts import abi, constants
+from contracts.abi import constant_bytes
+
+OWNER = b"o" * 32
+HOLDER = b"h" * 32
+STRANGER = b"x" * 32
+
+
+def code(name):
+    return constant_bytes(getattr(constants, name))
+
+
+def byte_array(value):
+    return len(value).to_bytes(2, "big") + value
+
+
+class MigrationTest(unittest.TestCase):
+    """
+    - an app holding its state under the legacy names, updated to the migration
+      program; it is its own admin, so its OWNER may migrate it
+    """
+
+    GLOBAL_STATE = {b"OWNER": OWNER}
+
+    def setUp(self):
+        target = TARGETS["migration"]
+        self.ledger = Ledger()
+        for account in (OWNER, HOLDER, STRANGER):
+            self.ledger.account(account)["balance"] = 10**10
+        self.app_id = self.ledger.create_app(
+            OWNER,
+            registry.get(target.approval).bytecode,
+            registry.get(target.clear).bytecode,
+            global_state=self.GLOBAL_STATE,
+            schema={
+                "global_num_uint": 16,
+                "global_num_byte_slice": 16,
+                "local_num_uint": 4,
+                "local_num_byte_slice": 4,
+            },
+        )
+
+    @property
+    def globals(self):
+        # * A rejected call restores the ledger's apps from a copy
+        return self.ledger.apps[self.app_id]["global"]
+
+    def call(self, method, *args, sender=OWNER, accounts=()):
+        txn = new_txn(
+            Type=b"appl",
+            Sender=sender,
+            ApplicationID=self.app_id,
+            ApplicationArgs=[abi.selector(method), *args],
+            Accounts=list(accounts),
+        )
+        return evaluate_group(self.ledger, [txn])[0]
+
+    def migrate(self, legacy_key, name, **fields):
+        result = self.call(
+            "MIGRATE_STATE", byte_array(legacy_key), byte_array(code(name)), **fields
+        )
+        self.assertTrue(result.passed, result.error)
+        return result
+
+
+class KeyTest(MigrationTest):
+    GLOBAL_STATE = {b"OWNER": OWNER, b"NFT_ID": 7, b"NFT_OWNER": HOLDER}
+
+    def test_legacy_keys_move_to_their_codes(self):
+        # * The owner moves first: the calls after it find it under its code
+        for name in ("OWNER", "NFT_ID", "NFT_OWNER"):
+            self.migrate(name.encode(), name)
+        self.assertEqual(
+            self.globals,
+            {code("OWNER"): OWNER, code("NFT_ID"): 7, code("NFT_OWNER"): HOLDER},
+        )
+
+    def test_every_state_key_has_its_own_code(self):
+        codes = constants.state_keys()
+        self.assertEqual(len(codes), len(set(codes.values())))
+        for name in codes.values():
+            self.assertLessEqual(len(code(name)), 2, name)
+
+    def test_only_the_owner_migrates(self):
+        result = self.call(
+            "MIGRATE_STATE",
+            byte_array(b"NFT_ID"),
+            byte_array(code("NFT_ID")),
+            sender=STRANGER,
+        )
+        self.assertFalse(result.passed)
+        self.assertEqual(self.globals[b"NFT_ID"], 7)
+
+    def test_missing_key_is_left_alone(self):
+        self.migrate(b"ROYALTY", "ROYALTY")
+        self.assertNotIn(code("ROYALTY"), self.globals)
+
+
+class ModuleNameTest(MigrationTest):
+    GLOBAL_STATE = {b"OWNER": OWNER, b"MODULE_NAME": b"AUCTION_MODULE"}
+
+    def test_module_name_is_rewritten_to_its_code(self):
+        self.migrate(b"MODULE_NAME", "MODULE_NAME")
+        self.assertEqual(self.globals[code("MODULE_NAME")], code("AUCTION_MODULE"))
+        self.assertNotIn(b"MODULE_NAME", self.globals)
+
+        # * Once the key is moved, migrating it onto itself still rewrites it
+        self.globals[code("MODULE_NAME")] = b"LIST_MODULE"
+        self.migrate(code("MODULE_NAME"), "MODULE_NAME")
+        self.assertEqual(self.globals[code("MODULE_NAME")], code("LIST_MODULE"))
+
+
+class LocalStateTest(MigrationTest):
+    def test_local_state_moves_for_the_referenced_accounts(self):
+        for account in (HOLDER, STRANGER):
+            self.ledger.account(account)["local"][self.app_id] = {b"ROLE": 1}
+
+        self.migrate(b"ROLE", "ROLE", accounts=[HOLDER])
+        self.assertEqual(
+            self.ledger.account(HOLDER)["local"][self.app_id], {code("ROLE"): 1}
+        )
+        self.assertEqual(
+            self.ledger.account(STRANGER)["local"][self.app_id], {b"ROLE": 1}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import unittest
+from unittest import mock
+
+from pyteal import App, Assert, Bytes, Int, Return, Seq
+
+from compiler.assembler import assemble
+from compiler.avm import UPDATE_APPLICATION, Ledger, evaluate_group, new_txn
+from contracts import constants
+from contracts.records import REPLACE_VERSION, decode, field, pack, replace, size
+from contracts.teal import DEFAULT_TEAL_VERSION, MIN_TEAL_VERSION, compile_application
+from tests.test_migration import OWNER, MigrationTest, code
+
+CREATOR = b"c" * 32
+BIDDER = b"b" * 32
+LISTING = {
+    "price": 1_000_000,
+    "platform_fee": 5,
+    "payment_asset": 0,
+    "royalty": 10,
+    "owner": OWNER,
+    "creator": CREATOR,
+}
+AUCTION = {
+    "start": 2000,
+    "end": 5000,
+    "min_bid_increment": 10,
+    "start_price": 100,
+    "payment_asset": 31566704,
+    "current_bid": 300,
+    "bidder": BIDDER,
+}
+KEY = b"r"
+
+
+def expression(value):
+    return Bytes(value) if isinstance(value, bytes) else Int(value)
+
+
+def expressions(fields):
+    return {name: expression(value) for name, value in fields.items()}
+
+
+def stored(build, version):
+    """
+    - returns the value the expression build() returns at the AVM version, as
+      the program stores it in global state
+    """
+    with mock.patch.dict(os.environ, {"TEAL_VERSION": str(version)}):
+        teal = compile_application(
+            Seq(App.globalPut(Bytes(KEY), build()), Return(Int(1)))
+        )
+    ledger = Ledger()
+    ledger.account(OWNER)["balance"] = 10**10
+    app_id = ledger.create_app(
+        OWNER,
+        assemble(teal),
+        assemble("#pragma version %d\nint 1\n" % version),
+        schema={"global_num_byte_slice": 1},
+    )
+    call = new_txn(Type=b"appl", Sender=OWNER, ApplicationID=app_id)
+    result = evaluate_group(ledger, [call])[0]
+    if not result.passed:
+        raise AssertionError(result.error)
+    return ledger.apps[app_id]["global"][KEY]
+
+
+class RecordTest(unittest.TestCase):
+    def test_pack_decodes_to_its_fields(self):
+        for record, fields in (("LISTING", LISTING), ("AUCTION", AUCTION)):
+            for version in (MIN_TEAL_VERSION, DEFAULT_TEAL_VERSION):
+                with self.subTest(record, version=version):
+                    value = stored(lambda: pack(record, expressions(fields)), version)
+                    self.assertEqual(len(value), size(record))
+                    self.assertEqual(decode(record, value), fields)
+
+    def test_field_reads_each_field(self):
+        def build():
+            value = pack("AUCTION", expressions(AUCTION))
+            return Seq(
+                *[
+                    Assert(field("AUCTION", value, name) == expression(expected))
+                    for name, expected in AUCTION.items()
+                ],
+                value,
+            )
+
+        self.assertEqual(
+            decode("AUCTION", stored(build, DEFAULT_TEAL_VERSION)), AUCTION
+        )
+
+    def test_replace_sets_one_field(self):
+        # * Before replace2/replace3 the value is cut and concatenated again
+        for version in (REPLACE_VERSION - 1, REPLACE_VERSION):
+            for name, new in (("price", 7), ("royalty", 3), ("creator", BIDDER)):
+                with self.subTest(name, version=version):
+                    value = stored(
+                        lambda: replace(
+                            "LISTING",
+                            pack("LISTING", expressions(LISTING)),
+                            name,
+                            expression(new),
+                        ),
+                        version,
+                    )
+                    self.assertEqual(decode("LISTING", value), {**LISTING, name: new})
+
+    def test_decode_checks_the_size(self):
+        with self.assertRaisesRegex(ValueError, "LISTING record is 96 bytes, got 95"):
+            decode("LISTING", bytes(95))
+
+
+class PackRecordsTest(MigrationTest):
+    """
+    - an NFT app whose keys are moved, still keeping its listing and its auction
+      field by field
+    """
+
+    GLOBAL_STATE = {
+        b"OWNER": OWNER,
+        code("NFT_ID"): 7,
+        code("USDC_ASSET_ID"): AUCTION["payment_asset"],
+        code("PAYMENT_OPTION"): constants.USDC.value,
+        code("NFT_PRICE"): 1_000_000,
+        code("PLATFORM_FEE"): 5,
+        code("ROYALTY"): 10,
+        code("NFT_OWNER"): OWNER,
+        code("NFT_CREATOR"): CREATOR,
+        code("START_AUCTION"): 2000,
+        code("END_AUCTION"): 5000,
+        code("MIN_BID_INCREMENT"): 10,
+        code("START_PRICE"): 100,
+        code("CURRENT_BID"): 300,
+        code("BIDDER_WINNER"): BIDDER,
+    }
+
+    def test_fields_are_packed_into_the_records(self):
+        self.assertFalse(self.update().passed)
+
+        result = self.call("PACK_RECORDS")
+        self.assertTrue(result.passed, result.error)
+        self.assertEqual(
+            decode("LISTING", self.globals[code("LISTING")]),
+            {**LISTING, "payment_asset": AUCTION["payment_asset"]},
+        )
+        self.assertEqual(decode("AUCTION", self.globals[code("AUCTION")]), AUCTION)
+        for name in ("NFT_PRICE", "PLATFORM_FEE", "CURRENT_BID", "BIDDER_WINNER"):
+            self.assertNotIn(code(name), self.globals)
+
+        self.assertTrue(self.update().passed)
+
+    def update(self):
+        txn = new_txn(
+            Type=b"appl",
+            Sender=OWNER,
+            ApplicationID=self.app_id,
+            OnCompletion=UPDATE_APPLICATION,
+        )
+        return evaluate_group(self.ledger, [txn])[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import importlib
+import os
+import re
+import unittest
+from unittest import mock
+
+from compiler.assembler import assemble, label_addresses
+from compiler.avm import Ledger, evaluate_group, new_txn
+from compiler.registry import ProgramRegistry
+from compiler.targets import TARGETS
+from contracts import abi
+from contracts.router import MATCH_VERSION
+
+SENDER = b"s" * 32
+# * No method has this selector
+UNKNOWN = bytes(4)
+
+
+def approval(name, version):
+    with mock.patch.dict(os.environ, {"TEAL_VERSION": str(version)}):
+        return ProgramRegistry().get(TARGETS[name].approval).teal
+
+
+def methods(name):
+    module, attribute = TARGETS[name].interface.rsplit(".", 1)
+    return getattr(importlib.import_module(module), attribute)
+
+
+def call_path(teal, selector):
+    """
+    - returns (labels a call with only the selector passes, its error without
+      the pcs)
+    """
+    labels = {pc: label for label, pc in label_addresses(teal).items()}
+    ledger = Ledger()
+    app_id = ledger.create_app(
+        SENDER, assemble(teal), assemble("#pragma version 8\nint 1\n")
+    )
+    call = new_txn(
+        Type=b"appl", Sender=SENDER, ApplicationID=app_id, ApplicationArgs=[selector]
+    )
+    result = evaluate_group(ledger, [call], trace=True)[0]
+    return (
+        [labels[pc] for pc, _ in result.trace if pc in labels],
+        re.sub(r"pc=\d+: ", "", result.error or ""),
+    )
+
+
+class DispatchTest(unittest.TestCase):
+    def test_match_dispatches_like_the_branch_chain(self):
+        for name in TARGETS:
+            chain = approval(name, MATCH_VERSION - 1)
+            matched = approval(name, MATCH_VERSION)
+            self.assertNotIn("\nmatch ", chain)
+            self.assertIn("\nmatch ", matched)
+            for method in [*methods(name), None]:
+                selector = UNKNOWN if method is None else abi.selector(method)
+                with self.subTest(name, method=method):
+                    self.assertEqual(
+                        call_path(chain, selector), call_path(matched, selector)
+                    )
+
+    def test_bytecblock_keeps_constants_read_twice(self):
+        for name in TARGETS:
+            lines = approval(name, MATCH_VERSION).split("\n")
+            blocks = [
+                line.split()[1:] for line in lines if line.startswith("bytecblock")
+            ]
+            reads = " ".join(lines)
+            for index, constant in enumerate(blocks[0] if blocks else []):
+                op = "bytec_%d" % index if index < 4 else "bytec %d" % index
+                with self.subTest(name, constant=constant):
+                    self.assertGreaterEqual(
+                        len(re.findall(r"(?<!\S)%s(?!\S)" % op, reads)), 2
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import base64
+import unittest
+
+from compiler.assembler import AssembleError
+from compiler.manifest import program_address
+from compiler.registry import program_hash
+from compiler.server import compile_response
+
+
+def compiled(teal):
+    return base64.b64decode(compile_response(teal)["result"]).hex()
+
+
+class CompileTest(unittest.TestCase):
+    def test_response_hash_is_the_program_address(self):
+        response = compile_response("#pragma version 8\npushint 1\n")
+        bytecode = base64.b64decode(response["result"])
+        self.assertEqual(response["hash"], program_address(program_hash(bytecode)))
+
+    def test_constant_used_once_is_pushed(self):
+        self.assertEqual(compiled("#pragma version 6\nint 1\n"), "068101")
+
+    def test_constants_are_sorted_by_use_count(self):
+        teal = (
+            "#pragma version 8\nint 5\nint 7\nint 7\n"
+            'byte "a"\nbyte 0x62\nbyte 0x61\nloop:\nb loop\n'
+        )
+        self.assertEqual(
+            compiled(teal),
+            # * intcblock 7, bytecblock "a", then pushint 5, intc_0 intc_0,
+            # * bytec_0, pushbytes "b", bytec_0 and the branch
+            "08 200107 26010161 8105 22 22 28 800162 28 42fffd".replace(" ", ""),
+        )
+
+    def test_constants_keep_their_order_before_v4(self):
+        self.assertEqual(
+            compiled("#pragma version 3\nint 1\nint 2\nint 2\n"),
+            "03 2002 0102 22 23 23".replace(" ", ""),
+        )
+
+    def test_named_integers(self):
+        self.assertEqual(
+            compiled("#pragma version 8\nint appl\nint DeleteApplication\n"),
+            "08 8106 8105".replace(" ", ""),
+        )
+
+    def test_int_uses_the_programs_own_block(self):
+        self.assertEqual(
+            compiled("#pragma version 8\nintcblock 3 4\nint 4\n"), "082002030423"
+        )
+        with self.assertRaisesRegex(AssembleError, "used without it in intcblock"):
+            compile_response("#pragma version 8\nintcblock 3 4\nint 5\n")
+
+    def test_addr_pushes_the_public_key(self):
+        public_key = bytes(range(32))
+        teal = "#pragma version 8\naddr %s\n" % program_address(public_key.hex())
+        self.assertEqual(compiled(teal), "08 8020".replace(" ", "") + public_key.hex())
+
+    def test_addr_checksum_is_checked(self):
+        address = "B" + program_address(bytes(32).hex())[1:]
+        with self.assertRaisesRegex(AssembleError, "not a valid address"):
+            compile_response("#pragma version 8\naddr %s\n" % address)
+
+    def test_method_pushes_the_selector(self):
+        # * The example of ARC-4
+        self.assertEqual(
+            compiled('#pragma version 8\nmethod "add(uint64,uint64)uint128"\n'),
+            "0880048aa3b61f",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()